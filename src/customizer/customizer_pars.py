@@ -16,6 +16,11 @@ Parametre :
 -d DATETRAITEMENT       Date YYYYMMDD permettant de calculer la date pour l'argument 'moisprincipaldeclar'
 --archive_original      Aide au developpeur: Bypass l'activation du archive_original_files du ../param/*.properties
 --forcefeature          Aide au developpeur
+--workers N             Nombre de .par personnalises simultanement (1 = sequentiel, par defaut)
+--workers_mode MODE     thread (defaut, E/S NFS) | process (pool de processus)
+--par_full_scan         Lit le BATCH_CODE de tous les .par (sans index par nom de fichier)
+--incremental           Ignore les .par deja personnalises avec les memes regles et la meme date plan
+                        (journal SQLite dans le repertoire des .par)
 ======================================================================================================================
 Chemin du log /data/package/clevacol/envir/log/shell/
 ======================================================================================================================
@@ -42,12 +47,19 @@ import csv
 import argparse
 import getpass
 import glob
+import hashlib
+import json
 import re
 import shutil
+import sqlite3
 import sys
 import logging
 import os
 import time
+import functools
+from collections import namedtuple
+from fnmatch import fnmatchcase
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 import pandas as pd
 import datetime
@@ -81,6 +93,10 @@ param_log_verbose = ''
 param_dateTraitement = ''
 param_archive_original = False
 param_force_feature = False
+param_workers = 1
+param_workers_mode = 'thread'
+param_par_full_scan = False
+param_incremental = False
 this_program_log_path = ''
 
 # REFERENCE_BATCH_TECHNIC_LOG_PATH = '/data/package/clevacol/*/log/shell/'
@@ -93,6 +109,11 @@ RULES_FILE_PATH = RULES_FILE_DIR + RULES_FILE_NAME
 
 PAR_FILE_DIR = '/data/share/interfaces/appcleva/batch/pars/'
 PAR_FILE_MASK  = "*.par"
+# Conventions de nommage des .par par BATCH_CODE (cf. getBatchType de batch_launcher.sh)
+PAR_FILE_INTERFACE_BATCH_CODE_REGEX = r'INTERFACE.*'
+PAR_FILE_INTERFACE_MASK = "GenericBatch_%s_*.par"
+PAR_FILE_PROGICIEL_MASK = "*_%s_*.par"
+PAR_FILE_NAMING_MASK = "*_*_*.par"  # .par nomme selon la convention (BATCH_CODE encadre par '_')
 DATE_MASK_01MMYYYY = "01/%m/%Y"
 DATE_MASK_YYYYMMDD   = "%Y%m%d"
 
@@ -111,6 +132,33 @@ MODE_TRT = 'MODE'
 ARGUMENT = 'KEY'
 VALEUR = 'VALUE'
 RULE__DATE_MOIS_PRECEDENT = "DATE_MOIS_PRECEDENT"
+PAR_LINE_FIN = 'FIN'
+
+# -----------------------------------------------
+# Traitement des .par en parallele (--workers / --workers_mode)
+WORKERS_MODE_THREAD = 'thread'
+WORKERS_MODE_PROCESS = 'process'
+WORKERS_MODES = [WORKERS_MODE_THREAD, WORKERS_MODE_PROCESS]
+PAR_STATUS_UPDATED = 'UPDATED'
+PAR_STATUS_SKIPPED = 'SKIPPED'
+PAR_STATUS_ERROR = 'ERROR'
+
+# -----------------------------------------------
+# Cache BATCH_CODE des .par (nom + mtime + taille) conserve d'un run a l'autre dans PAR_FILE_DIR
+BATCH_CODE_CACHE_FILENAME = '.customizer_batch_codes.json'
+BATCH_CODE_CACHE_VERSION = 1
+PAR_HEADER_SNIFF_MAX_BYTES = 8192  # lecture du BATCH_CODE limitee a l'entete du .par
+
+# -----------------------------------------------
+# Journal des .par personnalises (--incremental), SQLite dans PAR_FILE_DIR
+PAR_JOURNAL_FILENAME = '.customizer_journal.sqlite'
+PAR_JOURNAL_TABLE = 'par_journal'
+
+# -----------------------------------------------
+# Plan de regles compile par BATCH_CODE (cf. compile_rules_plans)
+# value : valeur a ecrire dans le .par (REGLE_xx deja calculee), source_value : VALUE du referentiel
+CompiledRule = namedtuple('CompiledRule', ['rule_num', 'mode', 'key', 'value', 'source_value'])
+RulesPlan = namedtuple('RulesPlan', ['batch_code', 'rules', 'keys'])
 
 ############################################################################################################################
 ### Public library - # https://gist.github.com/techtonik/5694830
@@ -157,11 +205,43 @@ def decode_utf8_str(s):
             pass
     return decode_utf8_str
 
+#############################################################################################################################
+class BufferedLogger:
+    """
+    Journal d'un .par traite dans un worker (thread ou processus) : les messages sont conserves
+    puis rejoues dans le logger principal (cf. replay_buffered_log), dans l'ordre des fichiers.
+    """
+    def __init__(self, level=logging.DEBUG):
+        self.level = level
+        self.records = []
+
+    def log(self, level, msg):
+        if level >= self.level:
+            self.records.append((level, msg))
+
+    def debug(self, msg):
+        self.log(logging.DEBUG, msg)
+
+    def info(self, msg):
+        self.log(logging.INFO, msg)
+
+    def warning(self, msg):
+        self.log(logging.WARNING, msg)
+
+    def error(self, msg):
+        self.log(logging.ERROR, msg)
+
+#############################################################################################################################
+def replay_buffered_log(records: list):
+    for level, msg in records:
+        logger.log(level, msg)
+
 #############################################################################################################################
 #############################################################################################################################
 def parseArgs():
     global  \
-        param_logshell_path, param_log_verbose, param_dateTraitement, param_force_feature, param_archive_original, par_file_path
+        param_logshell_path, param_log_verbose, param_dateTraitement, param_force_feature, param_archive_original, par_file_path, \
+        param_workers, param_workers_mode, param_par_full_scan, param_incremental
 
     parser = argparse.ArgumentParser(prog=ThisProgramVersion.split('-')[0],
                                     formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -191,6 +271,19 @@ def parseArgs():
     ## Bypass l'activation du archive_original_files du ../param/*.properties (alimente par TFS) (for DEVELOPER)
     parser.add_argument('--archive_original', action='store_true', help='Activation archivage file')
 
+    ## Personnalisation des .par en parallele
+    parser.add_argument('--workers', type=int, metavar='N', default=1,
+                        help='Nombre de .par personnalises simultanement (defaut: 1, sequentiel)')
+    parser.add_argument('--workers_mode', type=str.lower, choices=WORKERS_MODES, default=WORKERS_MODE_THREAD,
+                        help='thread (defaut) | process')
+
+    ## Lecture du BATCH_CODE de tous les .par, sans index par nom de fichier (for DEVELOPER)
+    parser.add_argument('--par_full_scan', action='store_true', help='Ignore l\'index BATCH_CODE par nom de .par')
+
+    ## Mode incremental : .par deja personnalises (memes regles, meme date plan) ignores
+    parser.add_argument('--incremental', action='store_true',
+                        help='Ignore les .par deja personnalises (journal %s)' % PAR_JOURNAL_FILENAME)
+
     ## ----------------------------------
 
     input_args = parser.parse_args()
@@ -221,6 +314,21 @@ def parseArgs():
     if input_args.archive_original:
         param_archive_original = True
         log_before_logger('Init: Mode [%s] actif [%s]' % ('ForceArchiveOriginal', param_archive_original))
+
+    if input_args.workers < 1:
+        parser.error('--workers doit etre >= 1')
+    param_workers = input_args.workers
+    param_workers_mode = input_args.workers_mode
+    if param_workers > 1:
+        log_before_logger('Init: Mode [%s] actif [%s] [%s]' % ('Workers', param_workers, param_workers_mode))
+
+    if input_args.par_full_scan:
+        param_par_full_scan = True
+        log_before_logger('Init: Mode [%s] actif [%s]' % ('ParFullScan', param_par_full_scan))
+
+    if input_args.incremental:
+        param_incremental = True
+        log_before_logger('Init: Mode [%s] actif [%s]' % ('Incremental', param_incremental))
     if not check_feature_enabled() and not param_force_feature:
         # capte toutes properties, dont PROP_LINE_PALIER_ENABLE
         log_before_logger('Feature Disabled. Quitting...')
@@ -540,67 +648,396 @@ def genere_rule_mois_principal_declare(date_traitement_YYYYMMDD: str) -> (bool,
     return (True, result_date.strftime(DATE_MASK_01MMYYYY))
 
 ############################################################################################################################
-def apply_rules_on_par_files(df_rules: pd.DataFrame, par_file_path: str, date_traitement_YYYYMMDD: str) \
-        -> (bool, int):
+def compile_rules_plans(df_valid_rules: pd.DataFrame, date_traitement_YYYYMMDD: str) -> dict:
+    """
+    Compile une seule fois les regles valides (cf. check_rules_file) en un plan par BATCH_CODE
+    { BATCH_CODE: RulesPlan(batch_code, rules, keys) }, regles dans l'ordre du referentiel.
+    Les valeurs calculees (REGLE_01 DATE_MOIS_PRECEDENT, ...) sont resolues ici et non plus par fichier.
+    Une regle dont la valeur ne peut etre calculee est ecartee (deja fait par check_rules_file).
+    """
+    rules_plans = {}
+    generated_values = {}
+    for rule in df_valid_rules.to_dict(orient='records'):
+        rule_value = rule[VALEUR]
+
+        # REGLE_01 Gestion specifique pour 'moisPrincipalDeclare'
+        if rule_value == RULE__DATE_MOIS_PRECEDENT:
+            if rule_value not in generated_values:
+                generated_values[rule_value] = genere_rule_mois_principal_declare(date_traitement_YYYYMMDD)
+            (success, value) = generated_values[rule_value]
+            if not success:
+                continue
+            rule_value = value
+
+        # REGLE_02 .....
+
+        rules_plans.setdefault(rule[BATCH_CODE], []).append(
+            CompiledRule(rule[RULE_NUM], rule[MODE_TRT].lower(), rule[ARGUMENT], rule_value, rule[VALEUR]))
+
+    return {batch_code: RulesPlan(batch_code, rules, frozenset(rule.key for rule in rules))
+            for batch_code, rules in rules_plans.items()}
+
+############################################################################################################################
+def apply_rules_on_par_files(rules_plans: dict, par_file_path: str, date_traitement_YYYYMMDD: str) -> int:
     # Recherche les .PAR depuis "par_file_path" et appliquer l'ensemble des règles
+    # rules_plans : plans compiles par BATCH_CODE (cf. compile_rules_plans)
+    # Retour : RC_SUCCESS, RC_NO_VALID_RULES, RC_NO_PAR_FILE ou RC_FAILED_APPLY_RULES si un .par est en erreur
 
-    if len(df_rules) == 0:
+    if len(rules_plans) == 0:
         logger.info("No valid rule, no file processing")
-        return (False, pd.DataFrame())
-
-    # Isoler les BATCH_CODE (unique) car plusieurs regle peuvent solliciter le meme BATCH_CODE
-    df_grouped_rules = df_rules.groupby(BATCH_CODE)
-    valid_par_batch_code = set(df_rules[BATCH_CODE])
+        return RC_NO_VALID_RULES
 
-    par_file_list = findfiles(filemask=PAR_FILE_MASK, search_path=par_file_path)
+    if param_par_full_scan:
+        par_file_list = findfiles(filemask=PAR_FILE_MASK, search_path=par_file_path)
+    else:
+        par_file_list = find_par_files_for_batch_codes(par_file_path, set(rules_plans))
     if len(par_file_list) == 0:
         logger.info('No par file found [%s] [%s]'% (par_file_path, PAR_FILE_MASK))
         return RC_NO_PAR_FILE
 
-    pars_files_treated = 0
-    # Parcourir les fichiers .par
-    for parfilepath in par_file_list:
+    # Mode incremental : .par deja personnalises avec le meme plan de regles et la meme date plan
+    par_journal = None
+    already_customized = 0
+    if param_incremental:
+        par_journal = open_par_journal(par_file_path)
+    if par_journal is not None:
+        rules_hashes = {batch_code: rules_plan_hash(rules_plan) for batch_code, rules_plan in rules_plans.items()}
+        journal_entries = load_par_journal(par_journal)
+        par_files_to_customize = []
+        for parfilepath in par_file_list:
+            if par_file_already_customized(parfilepath, journal_entries, rules_hashes, date_traitement_YYYYMMDD):
+                logger.debug("PAR already customized [%s]" % os.path.basename(parfilepath))
+                already_customized += 1
+            else:
+                par_files_to_customize.append(parfilepath)
+        par_file_list = par_files_to_customize
+
+    # BATCH_CODE deja connus : .par inchange (mtime, taille) depuis un run precedent
+    batch_code_cache_path = os.path.join(par_file_path, BATCH_CODE_CACHE_FILENAME)
+    batch_code_cache = load_batch_code_cache(batch_code_cache_path)
+    par_file_signatures = [par_file_signature(parfilepath) for parfilepath in par_file_list]
+    known_batch_codes = []
+    for parfilepath, signature in zip(par_file_list, par_file_signatures):
+        cache_entry = batch_code_cache.get(os.path.basename(parfilepath))
+        if signature is not None and cache_entry is not None and cache_entry[:2] == signature:
+            known_batch_codes.append(cache_entry[2])
+        else:
+            known_batch_codes.append(None)
+
+    # Traitement de chaque .par (eventuellement en parallele), journal rejoue dans l'ordre de la liste
+    customize_worker = functools.partial(
+        customize_par_file, rules_plans=rules_plans, date_traitement_YYYYMMDD=date_traitement_YYYYMMDD,
+        archive_original=archive_original_files, log_level=logger.getEffectiveLevel())
+    par_files_status = {PAR_STATUS_UPDATED: 0, PAR_STATUS_SKIPPED: 0, PAR_STATUS_ERROR: 0}
+    updated_batch_code_cache = {}
+    journal_records = []
+    customized_par_files = iter_customized_par_files(customize_worker, par_file_list, known_batch_codes)
+    for parfilepath, signature, (status, records, batch_code_value, written_par_file) in \
+            zip(par_file_list, par_file_signatures, customized_par_files):
+        replay_buffered_log(records)
+        par_files_status[status] += 1
+        # Un .par mis a jour est renomme (_updated) ou archive : son entree ne resservira pas
+        if status != PAR_STATUS_UPDATED and signature is not None and batch_code_value is not None:
+            updated_batch_code_cache[os.path.basename(parfilepath)] = signature + [batch_code_value]
+        if par_journal is not None and written_par_file is not None:
+            journal_record = par_journal_record(written_par_file, batch_code_value,
+                                                rules_hashes[batch_code_value], date_traitement_YYYYMMDD)
+            if journal_record is not None:
+                journal_records.append(journal_record)
+
+    save_batch_code_cache(batch_code_cache_path, updated_batch_code_cache)
+    if par_journal is not None:
+        save_par_journal(par_journal, journal_records)
+        par_journal.close()
+        logger.info("Total PAR already customized (journal): [%s]" % already_customized)
+    known_count = len(known_batch_codes) - known_batch_codes.count(None)
+    logger.info("BATCH_CODE cache: known [%s] read [%s]" % (known_count, len(par_file_list) - known_count))
+    logger.info("Total PAR updated: [%s]" % par_files_status[PAR_STATUS_UPDATED])
+    if par_files_status[PAR_STATUS_ERROR] > 0:
+        logger.error("Total PAR in error: [%s]" % par_files_status[PAR_STATUS_ERROR])
+        return RC_FAILED_APPLY_RULES
+    return RC_SUCCESS
+
+############################################################################################################################
+def par_file_masks_for_batch_code(batch_code: str) -> list:
+    # Masque des .par d'un BATCH_CODE, identique a batch_launcher.sh : GenericBatch_ pour les INTERFACE
+    # re.search : le test bash [[ =~ ]] n'est pas ancre, INTERFACE peut etre au milieu du BATCH_CODE
+    if re.search(PAR_FILE_INTERFACE_BATCH_CODE_REGEX, batch_code):
+        return [PAR_FILE_INTERFACE_MASK % batch_code]
+    return [PAR_FILE_PROGICIEL_MASK % batch_code]
+
+############################################################################################################################
+def index_par_files_by_batch_code(par_file_path: str, batch_codes: set) -> (dict, list, int):
+    """
+    Index BATCH_CODE -> .par candidats, a partir du nom des fichiers (une seule lecture du repertoire).
+    Un .par nomme selon la convention mais pour un autre BATCH_CODE est ignore sans etre ouvert.
+    Un .par hors convention de nommage est retenu pour lecture de son contenu (repli).
+
+    Retour : (index, fallback, ignored)
+        index    { BATCH_CODE: [chemins .par] }
+        fallback [chemins .par hors convention]
+        ignored  nombre de .par ecartes par leur nom
+    """
+    batch_code_masks = {batch_code: par_file_masks_for_batch_code(batch_code) for batch_code in sorted(batch_codes)}
+    index = {batch_code: [] for batch_code in batch_code_masks}
+    fallback = []
+    ignored = 0
+    with os.scandir(par_file_path) as scan:
+        for entry in scan:
+            # meme selection que findfiles (glob) : fichiers caches exclus
+            if entry.name.startswith('.') or not fnmatchcase(entry.name, PAR_FILE_MASK):
+                continue
+            par_filepath = os.path.join(par_file_path, entry.name)
+            matched = False
+            for batch_code, masks in batch_code_masks.items():
+                if any(fnmatchcase(entry.name, mask) for mask in masks):
+                    index[batch_code].append(par_filepath)
+                    matched = True
+            if matched:
+                continue
+            if fnmatchcase(entry.name, PAR_FILE_NAMING_MASK):
+                ignored += 1
+            else:
+                fallback.append(par_filepath)
+    return (index, fallback, ignored)
+
+############################################################################################################################
+def find_par_files_for_batch_codes(par_file_path: str, batch_codes: set) -> list:
+    # .par a traiter pour les BATCH_CODE ayant des regles : candidats par nom + repli sur contenu
+    # Le BATCH_CODE reel de chaque candidat reste verifie dans le fichier (cf. customize_par_file)
+    try:
+        (index, fallback, ignored) = index_par_files_by_batch_code(par_file_path, batch_codes)
+    except OSError as e:
+        logger.warning("Unable to index PAR directory [%s] [%s], full scan" % (par_file_path, e))
+        return findfiles(filemask=PAR_FILE_MASK, search_path=par_file_path)
+
+    par_file_list = []
+    seen_par_files = set()
+    for batch_code, par_filepaths in index.items():
+        logger.debug("PAR index BATCH_CODE [%s] candidates [%s]" % (batch_code, len(par_filepaths)))
+        for par_filepath in par_filepaths:
+            if par_filepath not in seen_par_files:
+                seen_par_files.add(par_filepath)
+                par_file_list.append(par_filepath)
+    logger.info("PAR index: candidates by name [%s] content fallback [%s] ignored by name [%s]"
+                % (len(par_file_list), len(fallback), ignored))
+    return par_file_list + fallback
+
+############################################################################################################################
+def iter_customized_par_files(customize_worker, par_file_list: list, known_batch_codes: list):
+    # Resultats (status, records, batch_code, written_par_file) dans l'ordre de par_file_list, sequentiel ou pool de --workers
+    workers = min(param_workers, len(par_file_list))
+    if workers <= 1:
+        yield from map(customize_worker, par_file_list, known_batch_codes)
+        return
+
+    if param_workers_mode == WORKERS_MODE_PROCESS:
+        executor_class = ProcessPoolExecutor
+    else:
+        executor_class = ThreadPoolExecutor
+    logger.info("PAR customization workers [%s] mode [%s] files [%s]" % (workers, param_workers_mode, len(par_file_list)))
+    # Processus : envoi des fichiers par lots pour limiter les echanges inter-processus
+    chunksize = max(1, len(par_file_list) // (workers * 4))
+    with executor_class(max_workers=workers) as executor:
+        yield from executor.map(customize_worker, par_file_list, known_batch_codes, chunksize=chunksize)
+
+############################################################################################################################
+def customize_par_file(parfilepath: str, known_batch_code: str, rules_plans: dict, date_traitement_YYYYMMDD: str,
+                       archive_original: bool, log_level: int = logging.DEBUG) -> (str, list, str):
+    """
+    Personnalisation complete d'un .par : BATCH_CODE, application du plan de regles et sauvegarde.
+    Executable dans un worker : les messages sont bufferises (BufferedLogger) et retournes.
+    Le BATCH_CODE vient du cache (known_batch_code) ou de la lecture de l'entete (sniff_par_batch_code) :
+    le fichier complet n'est lu que si son BATCH_CODE a des regles.
+
+    Retour : (status, records, batch_code, written_par_file)
+        status PAR_STATUS_UPDATED | PAR_STATUS_SKIPPED | PAR_STATUS_ERROR
+        batch_code '' si absent du .par, None si illisible
+        written_par_file (chemin du .par ecrit, empreinte du contenu) si PAR_STATUS_UPDATED, sinon None
+    """
+    log = BufferedLogger(log_level)
+    batch_code_value = known_batch_code
+    try:
+        if batch_code_value is None:
+            batch_code_value = sniff_par_batch_code(parfilepath)
+        par_filename = os.path.basename(parfilepath)
+        if batch_code_value is None:
+            log.warning("BATCH_CODE not found in PAR header [%s] first [%s] bytes"
+                        % (parfilepath, PAR_HEADER_SNIFF_MAX_BYTES))
+        if batch_code_value:
+            log.info("Batch code found in PAR [%s] BATCH_CODE [%s]" % (parfilepath, batch_code_value))
+
+        if not batch_code_value or (batch_code_value not in rules_plans):
+            return (PAR_STATUS_SKIPPED, log.records, batch_code_value, None)
+        log.debug('PAR to update [%s]' % par_filename)
+
         with open(parfilepath, 'r', encoding='utf-8') as par_file_read:
             par_file_lines = par_file_read.readlines()
 
-        # Verifier si une ligne contient exactement le batch_code
-        batch_code_value = ''
+        rules_to_apply = rules_plans[batch_code_value]
+        log.info("Rules to apply Nb[%s] PAR [%s] BATCH_CODE [%s] [%s]" % (len(rules_to_apply.rules), par_filename, batch_code_value, [{ARGUMENT: rule.key, VALEUR: rule.source_value} for rule in rules_to_apply.rules]))
+        # Mise a jour des .pars
+        (apply_success, updated_lines) = apply_rules_on_single_par_file(
+            par_file_lines, rules_to_apply, date_traitement_YYYYMMDD, batch_code_value, par_filename, log=log)
+        # sauvegarde des .pars
+        if not apply_success:
+            return (PAR_STATUS_SKIPPED, log.records, batch_code_value, None)
+        if not save_updated_file(parfilepath, updated_lines, archive_original=archive_original, log=log):
+            return (PAR_STATUS_ERROR, log.records, batch_code_value, None)
+    except Exception as e:
+        log.error("Unable to customize PAR [%s] [%s]" % (parfilepath, e))
+        return (PAR_STATUS_ERROR, log.records, None, None)
+    written_par_file = (updated_par_file_path(parfilepath), par_content_hash(''.join(updated_lines).encode('utf-8')))
+    return (PAR_STATUS_UPDATED, log.records, batch_code_value, written_par_file)
 
+############################################################################################################################
+def sniff_par_batch_code(parfilepath: str) -> str:
+    # Lecture de l'entete du .par (PAR_HEADER_SNIFF_MAX_BYTES au plus) jusqu'a la ligne BATCH_CODE
+    # '' si le .par complet ne contient pas de BATCH_CODE, None si absent de l'entete lue
+    with open(parfilepath, 'rb') as par_file_read:
+        par_header = par_file_read.read(PAR_HEADER_SNIFF_MAX_BYTES + 1)
+    header_truncated = len(par_header) > PAR_HEADER_SNIFF_MAX_BYTES
+    par_header_lines = par_header[:PAR_HEADER_SNIFF_MAX_BYTES].split(b'\n')
+    if header_truncated:
+        # derniere ligne coupee par la limite de lecture
+        par_header_lines.pop()
+    for par_header_line in par_header_lines:
+        par_file_line = par_header_line.decode('utf-8')
         # Verifier si la ligne commence par 'BATCH_CODE'
-        for par_file_line in par_file_lines:
-            if par_file_line.strip().upper().startswith("BATCH_CODE\t"):
-                    key, value = par_file_line.split("\t", 1)
-                    batch_code_value = value.strip()
-                    logger.info("Batch code found in PAR [%s] BATCH_CODE [%s]" % (parfilepath, batch_code_value))
-                    par_filename = os.path.basename(parfilepath)
-                    break
-
-        if not batch_code_value or (batch_code_value not in valid_par_batch_code):
-            continue
-        logger.debug('PAR to update [%s]' % par_filename)
-
-        if batch_code_value in df_grouped_rules.groups:
-            rules_to_apply = df_grouped_rules.get_group(batch_code_value)
-            logger.info("Rules to apply Nb[%s] PAR [%s] BATCH_CODE [%s] [%s]" % (len(rules_to_apply), par_filename, batch_code_value, rules_to_apply[[ARGUMENT, VALEUR]].to_dict(orient='records')))
-            # Mise a jour des .pars
-            (apply_success, updated_lines) = apply_rules_on_single_par_file(
-                par_file_lines, rules_to_apply, date_traitement_YYYYMMDD, batch_code_value, par_filename)
-            # sauvegarde des .pars
-            if apply_success:
-                save_updated_file(parfilepath, updated_lines)
-                pars_files_treated += 1
-        else:
-            logger.info("No rule applies BATCH_CODE[%s] PAR [%s]" % (batch_code_value,par_filename))
-    logger.info("Total PAR updated: [%s]" % pars_files_treated)
-    return RC_SUCCESS
+        if par_file_line.strip().upper().startswith("BATCH_CODE\t"):
+            key, value = par_file_line.split("\t", 1)
+            return value.strip()
+    return None if header_truncated else ''
+
+############################################################################################################################
+def par_file_signature(parfilepath: str) -> list:
+    # [mtime_ns, taille] du .par, None si inaccessible
+    try:
+        par_stat = os.stat(parfilepath)
+    except OSError:
+        return None
+    return [par_stat.st_mtime_ns, par_stat.st_size]
+
+############################################################################################################################
+def load_batch_code_cache(cache_path: str) -> dict:
+    # { nom du .par: [mtime_ns, taille, BATCH_CODE] } du run precedent, vide si absent ou illisible
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as cache_file:
+            cache_data = json.load(cache_file)
+        if cache_data.get("version") == BATCH_CODE_CACHE_VERSION:
+            return cache_data.get("entries", {})
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.debug("BATCH_CODE cache unreadable [%s] [%s]" % (cache_path, e))
+    return {}
+
+############################################################################################################################
+def save_batch_code_cache(cache_path: str, cache_entries: dict):
+    # Fusion avec le cache existant : les entrees des .par non lus par ce run sont conservees,
+    # celles des .par disparus (renommes _updated, archives, supprimes) sont retirees
+    # Ecriture atomique (fichier temporaire + rename), non bloquant en cas d'erreur
+    tmp_path = cache_path + '.tmp'
+    try:
+        merged_entries = load_batch_code_cache(cache_path)
+        merged_entries.update(cache_entries)
+        par_filenames = set(os.listdir(os.path.dirname(cache_path) or '.'))
+        merged_entries = {par_filename: cache_entry for par_filename, cache_entry in merged_entries.items()
+                          if par_filename in par_filenames}
+        with open(tmp_path, 'w', encoding='utf-8') as cache_file:
+            json.dump({"version": BATCH_CODE_CACHE_VERSION, "entries": merged_entries}, cache_file)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        logger.warning("Unable to save BATCH_CODE cache [%s] [%s]" % (cache_path, e))
+
+############################################################################################################################
+def rules_plan_hash(rules_plan: RulesPlan) -> str:
+    # Empreinte du plan de regles d'un BATCH_CODE (regles, modes et valeurs calculees, dans l'ordre)
+    rules_content = json.dumps([[rule.rule_num, rule.mode, rule.key, rule.value] for rule in rules_plan.rules])
+    return hashlib.sha256(rules_content.encode('utf-8')).hexdigest()
+
+############################################################################################################################
+def par_content_hash(par_content: bytes) -> str:
+    return hashlib.sha256(par_content).hexdigest()
+
+############################################################################################################################
+def open_par_journal(par_file_path: str):
+    # Connexion au journal SQLite des .par personnalises, None si indisponible (mode incremental desactive)
+    journal_path = os.path.join(par_file_path, PAR_JOURNAL_FILENAME)
+    try:
+        par_journal = sqlite3.connect(journal_path)
+        par_journal.execute(
+            "CREATE TABLE IF NOT EXISTS %s ("
+            " par_filename TEXT PRIMARY KEY, inode INTEGER, size INTEGER, mtime_ns INTEGER, content_hash TEXT,"
+            " batch_code TEXT, rules_hash TEXT, date_plan TEXT, customized_at TEXT)" % PAR_JOURNAL_TABLE)
+        par_journal.commit()
+    except sqlite3.Error as e:
+        logger.warning("PAR journal unavailable [%s] [%s], incremental mode disabled" % (journal_path, e))
+        return None
+    return par_journal
+
+############################################################################################################################
+def load_par_journal(par_journal) -> dict:
+    # { nom du .par: (inode, size, mtime_ns, content_hash, batch_code, rules_hash, date_plan) }
+    try:
+        rows = par_journal.execute(
+            "SELECT par_filename, inode, size, mtime_ns, content_hash, batch_code, rules_hash, date_plan FROM %s"
+            % PAR_JOURNAL_TABLE).fetchall()
+    except sqlite3.Error as e:
+        logger.warning("PAR journal unreadable [%s]" % e)
+        return {}
+    return {row[0]: row[1:] for row in rows}
+
+############################################################################################################################
+def par_file_already_customized(parfilepath: str, journal_entries: dict, rules_hashes: dict,
+                                date_traitement_YYYYMMDD: str) -> bool:
+    # .par ecrit par un run precedent avec le meme plan de regles et la meme date plan, et non modifie depuis :
+    # identite (inode, taille, mtime) inchangee, ou contenu identique (empreinte) si seule l'identite a change
+    journal_entry = journal_entries.get(os.path.basename(parfilepath))
+    if journal_entry is None:
+        return False
+    (inode, size, mtime_ns, content_hash, batch_code, rules_hash, date_plan) = journal_entry
+    if date_plan != date_traitement_YYYYMMDD or rules_hash != rules_hashes.get(batch_code):
+        return False
+    try:
+        par_stat = os.stat(parfilepath)
+        if (par_stat.st_ino, par_stat.st_size, par_stat.st_mtime_ns) == (inode, size, mtime_ns):
+            return True
+        if par_stat.st_size != size:
+            return False
+        with open(parfilepath, 'rb') as par_file_read:
+            return par_content_hash(par_file_read.read()) == content_hash
+    except OSError:
+        return False
+
+############################################################################################################################
+def par_journal_record(written_par_file: tuple, batch_code: str, rules_hash: str, date_traitement_YYYYMMDD: str) -> tuple:
+    # Ligne du journal pour un .par ecrit par ce run, None si le fichier n'est plus accessible
+    (par_filepath, content_hash) = written_par_file
+    try:
+        par_stat = os.stat(par_filepath)
+    except OSError:
+        return None
+    return (os.path.basename(par_filepath), par_stat.st_ino, par_stat.st_size, par_stat.st_mtime_ns, content_hash,
+            batch_code, rules_hash, date_traitement_YYYYMMDD, datetime.datetime.now().isoformat(timespec='seconds'))
+
+############################################################################################################################
+def save_par_journal(par_journal, journal_records: list):
+    # Enregistrement des .par ecrits par ce run, en une transaction ; non bloquant en cas d'erreur
+    try:
+        with par_journal:
+            par_journal.executemany("INSERT OR REPLACE INTO %s VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)" % PAR_JOURNAL_TABLE,
+                                    journal_records)
+    except sqlite3.Error as e:
+        logger.warning("Unable to save PAR journal [%s]" % e)
 
 ############################################################################################################################
 def apply_rules_on_single_par_file(par_file_lines: list,
-                                   rules_to_apply: pd.DataFrame, date_traitement_YYYYMMDD: str,
-                                   batch_code: str, par_filename: str) \
+                                   rules_to_apply: RulesPlan, date_traitement_YYYYMMDD: str,
+                                   batch_code: str, par_filename: str, log=None) \
         -> (bool, list):
     """
-    Applique les regles pour chaque fichier .par
+    Applique le plan de regles du BATCH_CODE (cf. compile_rules_plans) sur un fichier .par
     Mode UPDATE modifie le .par si KEY existe dans .par
     Mode NEW    modifie le .par avec la nouvelle KEY/VALUE
 
@@ -610,91 +1047,93 @@ def apply_rules_on_single_par_file(par_file_lines: list,
       MonBatchCode;         new;    maNouvelleClé;          GRAA
     La valeur indiquée est soit une valeur fixe (ici GRAA)
     soit le nom d'une "METHODE" générant la valeur à calculer : ici "DATE_MOIS_PRECEDENT"
+    (valeur deja calculee dans le plan)
+    log : journal du fichier (BufferedLogger d'un worker), logger principal par defaut
+
+    Une seule lecture des lignes du .par : index KEY -> numero de ligne (premiere occurrence)
+    et position de FIN. Les KEY ajoutees (NEW) sont inserees ensemble avant FIN, dans l'ordre des regles ;
+    une regle suivante sur une KEY deja ajoutee met a jour cette ligne (comme l'insertion immediate d'origine).
     """
     par_basename = os.path.basename(par_filename)
-    #par_file_lines = None
-
-    # First, Get BATCH_CODE from PARS_FILE_LINES
-    # .......
+    if log is None:
+        log = logger
+
+    # Index des KEY du plan presentes dans le .par et de la ligne FIN
+    key_index = {}
+    fin_index = None
+    for lineno, line in enumerate(par_file_lines):
+        key = line.split('\t', 1)[0] if '\t' in line else None
+        if key in rules_to_apply.keys and key not in key_index:
+            key_index[key] = lineno
+        elif fin_index is None and line.strip() == PAR_LINE_FIN:
+            fin_index = lineno
 
     ## Parcourir les rules
     update_par_sucess = False
-    for idx, rule in rules_to_apply.iterrows():
-        KEY_SEARCH = rule[ARGUMENT]
-        RULENAME_OR_FIXVALUE = rule[VALEUR]
-        MODE_UPDATE_OR_NEW = rule[MODE_TRT].lower()
-
-        # Limite apply rule on batch_code related
-        # if batch_code ==  BATCH_CODE_TO_APPLY:
-
+    new_lines = []
+    new_key_index = {}  # KEY ajoutee -> position dans new_lines
+    for rule in rules_to_apply.rules:
+        KEY_SEARCH = rule.key
+        RULENAME_OR_FIXVALUE = rule.value
 
-        # REGLE_01 Gestion specifique pour 'moisPrincipalDeclare'
-        if RULENAME_OR_FIXVALUE == RULE__DATE_MOIS_PRECEDENT:
-            (success, value) = genere_rule_mois_principal_declare(date_traitement_YYYYMMDD)
-            if success:
-                RULENAME_OR_FIXVALUE = value
-            else:
-                # On en doit jamais arriver en FAILED car le CHECK initial a écarter la règle INVALIDE
-                # logger.warning("Rule PAR [%s] KEY [%s] VALUE [%s] Unable to generate" %
-                               #(par_basename, KEY_SEARCH, RULE__DATE_MOIS_PRECEDENT))
-                continue
+        # Mise a jour rule si elle existe dans .par avec la nouvelle valeur
+        lineno = key_index.get(KEY_SEARCH)
+        if lineno is not None:
+            par_file_lines[lineno] = f"{KEY_SEARCH}\t{RULENAME_OR_FIXVALUE}\n"
+            log.info("Rule [Update] PAR [%s] KEY [%s] VALUE [%s]" % (par_basename, KEY_SEARCH, RULENAME_OR_FIXVALUE))
+            update_par_sucess = True
+            continue
 
-        # REGLE_02 .....
+        # Mise a jour d'une KEY ajoutee par une regle precedente (en attente d'insertion avant FIN)
+        new_lineno = new_key_index.get(KEY_SEARCH)
+        if new_lineno is not None:
+            new_lines[new_lineno] = f"{KEY_SEARCH}\t{RULENAME_OR_FIXVALUE}\n"
+            log.info("Rule [Update] PAR [%s] KEY [%s] VALUE [%s]" % (par_basename, KEY_SEARCH, RULENAME_OR_FIXVALUE))
+            continue
 
-        # Mise a jour rule si elle existe dans .par avec la nouvelle valeur
-        key_found = False
-        for lineno, line in enumerate(par_file_lines):  ##peut on modifier une liste qui est en cours de lecture ?
-            if line.startswith(f"{KEY_SEARCH}\t"):
-                key_found = True
-                par_file_lines[lineno] = f"{KEY_SEARCH}\t{RULENAME_OR_FIXVALUE}\n"
-                logger.info("Rule [Update] PAR [%s] KEY [%s] VALUE [%s]" % (par_basename, KEY_SEARCH, RULENAME_OR_FIXVALUE))
-                update_par_sucess = True
-                break ## Hypothese: une seule regle par ligne d'un fichier .PAR
-
-        if not key_found and (MODE_UPDATE_OR_NEW == 'update'):
-                logger.warning("Rule [Update] PAR [%s] KEY [%s] unfound" % (par_basename, KEY_SEARCH))
-                continue
+        if rule.mode == 'update':
+            log.warning("Rule [Update] PAR [%s] KEY [%s] unfound" % (par_basename, KEY_SEARCH))
+            continue
 
         # Ajouter rule si le mode 'new' et la ligne n'existe pas dans le par
-        if not key_found and (MODE_UPDATE_OR_NEW == 'new'):
-            fin_index = None
-            for index, line in enumerate(par_file_lines):
-                if line.strip() == 'FIN':
-                    fin_index = index
-                    break
-
-            if fin_index is not None:
-                par_file_lines.insert(fin_index, f"{KEY_SEARCH}\t{RULENAME_OR_FIXVALUE}\n")
-                logger.info("Rule [New] PAR [%s] KEY [%s] VALUE[%s] " % (
-                        par_filename, KEY_SEARCH, RULENAME_OR_FIXVALUE)) # rules_to_apply[[KEY_SEARCH, RULENAME_OR_FIXVALUE]].to_dict(orient='records'
-                update_par_sucess = True
-            else:
-                logger.warning("Rule [New] PAR [%s] Line [FIN] unfound" % par_basename)
+        if fin_index is not None:
+            new_key_index[KEY_SEARCH] = len(new_lines)
+            new_lines.append(f"{KEY_SEARCH}\t{RULENAME_OR_FIXVALUE}\n")
+            log.info("Rule [New] PAR [%s] KEY [%s] VALUE[%s] " % (
+                    par_filename, KEY_SEARCH, RULENAME_OR_FIXVALUE))
+            update_par_sucess = True
+        else:
+            log.warning("Rule [New] PAR [%s] Line [FIN] unfound" % par_basename)
+
+    # Insertion groupee des nouvelles KEY avant FIN
+    if new_lines:
+        par_file_lines[fin_index:fin_index] = new_lines
 
     return (update_par_sucess, par_file_lines)
 
 #############################################################################################################################
-def save_updated_file(parfilepath: str, updated_lines: list) -> bool:
+def save_updated_file(parfilepath: str, updated_lines: list, archive_original: bool = None, log=None) -> bool:
     # Sauvegarde des fichiers pars modifier
     # Creation repertoire pour archiver les par original (/ORIGINAL_pars)
+    # archive_original : archive_original_files par defaut / log : logger principal par defaut
+    if archive_original is None:
+        archive_original = archive_original_files
+    if log is None:
+        log = logger
     dir_path = os.path.dirname(parfilepath)
     base_name = os.path.basename(parfilepath)
-    name_without_ext, ext = os.path.splitext(base_name)
-    if "_updated" not in name_without_ext.lower():
-        updated_filename = f"{name_without_ext}_updated{ext}"
-    else:
-        updated_filename = base_name
-    updated_filepath = os.path.join(dir_path, updated_filename)
+    updated_filepath = updated_par_file_path(parfilepath)
+    updated_filename = os.path.basename(updated_filepath)
 
-    if archive_original_files:
+    if archive_original:
         # Archivage active
         original_dir = os.path.join(dir_path, "ORIGINAL_pars")
         if not os.path.exists(original_dir):
             try:
                 os.makedirs(original_dir)
-                logger.info("Directory created [%s]" % original_dir)
+                log.info("Directory created [%s]" % original_dir)
             except Exception as e:
-                logger.error("Unable to create directory [%s] [%s]" % (original_dir,e))
+                log.error("Unable to create directory [%s] [%s]" % (original_dir,e))
 
         original_pars_new_name = f"{base_name}.original"
         original_pars_new_path = os.path.join(original_dir, original_pars_new_name)
@@ -702,27 +1141,41 @@ def save_updated_file(parfilepath: str, updated_lines: list) -> bool:
         # Deplacer le fichier original vers ORIGINAL_pars
         try:
             shutil.move(parfilepath, original_pars_new_path)
-            logger.info("Move original file PAR [%s] [%s]" % (parfilepath, original_pars_new_path))
+            log.info("Move original file PAR [%s] [%s]" % (parfilepath, original_pars_new_path))
 
             # ecrire le fichier mis a jour
             with open(updated_filepath, 'w', encoding='utf-8') as file:
                 file.writelines(updated_lines)
         except Exception as e:
-            logger.error("Unable to move file PAR path [%s] New path [%s] [%s]" % (parfilepath,original_pars_new_path, e))
+            log.error("Unable to move file PAR path [%s] New path [%s] [%s]" % (parfilepath,original_pars_new_path, e))
+            return False
     else:
         # Archivage desactive
         # Renommer directement le fichier original en _updated
         try:
             shutil.move(parfilepath, updated_filepath)
-            logger.info("Rename original PAR [%s] to [%s]" % (base_name,updated_filename))
+            log.info("Rename original PAR [%s] to [%s]" % (base_name,updated_filename))
 
             # Reecrire le contenu modifie dans un fichier _updated
             with open(updated_filepath, 'w', encoding='utf-8') as file:
                 file.writelines(updated_lines)
         except Exception as e:
-            logger.error("Unable to save PAR [%s] [%s]" % (updated_filepath, e))
+            log.error("Unable to save PAR [%s] [%s]" % (updated_filepath, e))
+            return False
     return True
 
+#############################################################################################################################
+def updated_par_file_path(parfilepath: str) -> str:
+    # Nom du .par personnalise : <nom>_updated.par (inchange s'il contient deja _updated)
+    dir_path = os.path.dirname(parfilepath)
+    base_name = os.path.basename(parfilepath)
+    name_without_ext, ext = os.path.splitext(base_name)
+    if "_updated" not in name_without_ext.lower():
+        updated_filename = f"{name_without_ext}_updated{ext}"
+    else:
+        updated_filename = base_name
+    return os.path.join(dir_path, updated_filename)
+
 #############################################################################################################################
 #############################################################################################################################
 def main():
@@ -737,7 +1190,11 @@ def main():
             return RC_NO_VALID_RULES
 
         if len(df_valid_rules) > 0:
-            apply_rules_on_par_files(df_valid_rules, par_file_path, param_dateTraitement)
+            rules_plans = compile_rules_plans(df_valid_rules, param_dateTraitement)
+            rc_apply = apply_rules_on_par_files(rules_plans, par_file_path, param_dateTraitement)
+            if rc_apply == RC_FAILED_APPLY_RULES:
+                logger.error("Error processing files pars")
+                return RC_FAILED_APPLY_RULES
             return RC_SUCCESS
         else:
             logger.error("Error processing files pars")
@@ -9,14 +9,29 @@ selon un fichier de mapping CSV (prefixes/extensions/exclusions).
 
 Fonctionnalites majeures
 ------------------------
-- Lecture d'un CSV de mapping et generation d'un plan de copie
+- Lecture d'un CSV de mapping et generation d'un plan de copie (generateur de taches
+  CopyTask, chaque tache produite des que sa ligne CSV est resolue)
+- Mapping compile (lignes normalisees + masques) mis en cache JSON a cote du CSV,
+  invalide si le CSV change
+- Export/import du plan de copie en JSON (--plan_out / --plan_in)
 - Matching par combinaisons prefix/extension et motifs d'exclusion
-- Politique date: 'LATEST_YYYYMMDD' pour descendre dans le dernier sous-dossier horodaté
-- Purge optionnelle des fichiers du dossier destination (purge=YES)
+- Politique date: 'LATEST_YYYYMMDD' pour descendre dans le dernier sous-dossier horodaté,
+  'LATEST_YYYYMMDD_DATEPLAN' pour le dernier sous-dossier anterieur ou egal a la date plan
+- Purge optionnelle des fichiers du dossier destination (purge=YES), en une passe
+  par destination avant toute copie, parallelisee entre destinations
 - Ajout automatique de l'extension .txt si le fichier source n'est pas deja en .txt
 - Controle doublon apres copie dans DONE/WAIT
 - Renommage optionnel en cas de doublon (feature flag, desactive par defaut)
 - Arret au premier echec critique (mkdir, purge, copie)
+- Copie parallele optionnelle (--workers N), DONE toujours traite avant WAIT
+- Pipeline optionnel (--pipeline): planification et copie simultanees (asyncio)
+- Resume JSON du run a cote du log (durees par phase, appels stat/listdir/open, octets,
+  code retour par date plan)
+- Rattrapage multi-dates (-d liste ou plage): mapping charge une fois, listings des
+  dossiers source partages entre les dates
+- Copie noyau (copy_file_range / sendfile) avec repli bufferise, debit par destination
+- Ecriture atomique: copie dans '.<nom>.part' puis rename; reprise ou nettoyage
+  des transferts partiels laisses par un run interrompu
 
 Contexte d'execution
 --------------------
@@ -27,14 +42,30 @@ Contexte d'execution
 Parametres
 --------------
 Obligatoires:
-  -d AAAAMMJJ            Date plan utilisee pour le chemin destination
-  --ref_mapping <path>   CSV de mapping des fichiers a copier
+  -d AAAAMMJJ            Date plan utilisee pour le chemin destination. Plusieurs dates
+                         (rattrapage) : liste AAAAMMJJ,AAAAMMJJ ou plage AAAAMMJJ..AAAAMMJJ,
+                         traitees dans l'ordre avec un seul chargement du mapping
+                         (incompatible avec --plan_in / --plan_out)
+  --ref_mapping <path>   CSV de mapping des fichiers a copier (sauf si --plan_in)
 
 Optionnels:
   --mode_copie           MODECLEVADSN pour traiter CLEVADSN (sinon CLEVA/DSN par defaut)
   --webdav_path          Racine WebDAV (par defaut WEBDAV_HOME)
   --interfaces_path      Racine des flux sources (sinon CLEVA/DSN par defaut)
   --logshell_path        Dossier explicite des logs du script
+  --workers N            Nombre de copies simultanees (1 = sequentiel, par defaut)
+  --copy_buffer_kb N     Taille du buffer de copie en Ko si la copie noyau est indisponible (1024)
+  --plan_out <path>      Ecrit le plan resolu en JSON (sources, destinations, fichiers,
+                         tailles, purge) sans copier
+  --plan_in <path>       Execute un plan JSON produit par --plan_out, sans relire le CSV
+                         ni rescanner les interfaces
+  --dry_run              Simulation: plan, purge et copie journalises sans aucune modification
+  --pipeline             Copie en pipeline: les copies demarrent pendant la construction du plan,
+                         au plus N (--workers) copies simultanees par point de montage
+                         (ignore avec --plan_in, --plan_out et --dry_run)
+  --sync_mode MODE       Fichier deja present en destination: exists (skip, par defaut),
+                         stat (recopie si taille/mtime differents), checksum (stat puis
+                         confirmation par empreinte du contenu)
   -v                     Niveau de log: debug | info | warn | error
 
 CSV de mapping
@@ -49,7 +80,8 @@ Colonnes dynamiques optionnelles:
 
 Autres colonnes optionnelles:
   purge            YES pour purger le dossier destination avant copie
-  date_policy      LATEST_YYYYMMDD pour descendre dans le sous-dossier date le plus recent
+  date_policy      LATEST_YYYYMMDD pour descendre dans le sous-dossier date le plus recent,
+                   LATEST_YYYYMMDD_DATEPLAN pour le plus recent <= date plan (-d)
 
 Codes retour (un seul sys.exit() dans main)
 -------------------------------------------
@@ -67,14 +99,24 @@ import shutil
 import sys
 import pprint
 import re
+import json
+import time
+import hashlib
+import errno
+import calendar
 
-import pandas as pd
 import argparse
+import stat
+import asyncio
+import csv
 import glob
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 import getpass
-from fnmatch import fnmatch
+import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from fnmatch import translate
 
 # =============================================================================
 # === IDENTITE ET HORODATAGE D'EXECUTION ========================
@@ -103,6 +145,33 @@ logger = None  # handle du logger initialise par startLogger()
 # === OPTIONS / FEATURE FLAGS ==================================================
 # =============================================================================
 ENABLE_RENAME = False  # Renommage en cas de doublon (desactive par defaut)
+ENABLE_DONE_INDEX_CACHE = True  # Index DONE persistant entre les runs (fichier .done_index.json)
+ENABLE_FINGERPRINT_STORE = True  # Empreintes BLAKE2 persistees pour --sync_mode checksum
+ENABLE_ZERO_COPY = True  # Copie noyau (copy_file_range / sendfile) si disponible
+ENABLE_COMPILED_MAPPING_CACHE = True  # Mapping compile (JSON) a cote du CSV, invalide si le CSV change
+
+# =============================================================================
+# === MOTEUR DE COPIE ==========================================================
+# =============================================================================
+COPY_BUFFER_SIZE_DEFAULT = 1024 * 1024  # taille du buffer de la copie bufferisee (octets)
+COPY_METHOD_COPY_FILE_RANGE = "copy_file_range"
+COPY_METHOD_SENDFILE = "sendfile"
+COPY_METHOD_BUFFERED = "buffered"
+# errno signalant une methode noyau non supportee pour le couple source/destination
+ZERO_COPY_UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP,
+                                errno.ENOTSUP, errno.EBADF, errno.ETXTBSY, errno.EPERM}
+# Transfert en cours: '.<nom destination>.part' dans le dossier destination, renomme en fin de copie
+PARTIAL_TRANSFER_PREFIX = "."
+PARTIAL_TRANSFER_SUFFIX = ".part"
+
+# =============================================================================
+# === SYNCHRONISATION INCREMENTALE (--sync_mode) ==============================
+# =============================================================================
+SYNC_MODE_EXISTS = "exists"      # present en destination -> skip (comportement historique)
+SYNC_MODE_STAT = "stat"          # recopie si taille ou mtime differents
+SYNC_MODE_CHECKSUM = "checksum"  # stat differents -> recopie seulement si le contenu differe
+SYNC_MODES = [SYNC_MODE_EXISTS, SYNC_MODE_STAT, SYNC_MODE_CHECKSUM]
+SYNC_MTIME_TOLERANCE_NS = 1000 * 1000 * 1000  # ecart mtime toléré (precision NFS/WebDAV)
 
 # =============================================================================
 # === MESSAGES FIXES ===========================================================
@@ -129,6 +198,9 @@ PAR_EXCLUDE_PREFIX = "exclude_prefix"  # colonnes dynamiques: exclude_prefix01,
 PAR_EXTENSION_BASE = "extension"  # colonnes dynamiques: extension01, extension02, ...
 PAR_PURGE = "purge"  # yes/no pour purge du dossier destination
 DATE_POLICY = "date_policy"  # identification sous-dossier d'archivage
+DATE_POLICY_LATEST = "LATEST_YYYYMMDD"  # sous-dossier date le plus recent
+DATE_POLICY_LATEST_DATEPLAN = "LATEST_YYYYMMDD_DATEPLAN"  # plus recent anterieur ou egal a la date plan
+YYYYMMDD_DIR_REGEX = re.compile(r'(\d{4})(\d{2})(\d{2})')
 
 # =============================================================================
 # === PARAMETRES RUNTIME RENSEIGNES ================================
@@ -136,12 +208,20 @@ DATE_POLICY = "date_policy"  # identification sous-dossier d'archivage
 param_log_verbose = "INFO"
 init_log_msg = ""  # buffer des traces emises avant l'initialisation du logger
 this_program_log_path = ""  # chemin retenu pour les logs du script
-param_date_traitement = ""  # valeur de dateplan -d AAAAMMJJ
+param_date_traitement = ""  # valeur de dateplan -d AAAAMMJJ (date en cours de traitement)
+param_dates_traitement = []  # dates plan de -d (liste ou plage), dans l'ordre de traitement
 param_mode_copie = ""
 param_webdav_path = ""
 param_interface_path = ""
 param_logshell_path = ""
 param_ref_mapping_path = ""
+param_workers = 1  # nombre de copies simultanees (--workers)
+param_copy_buffer_size = COPY_BUFFER_SIZE_DEFAULT  # buffer de copie (--copy_buffer_kb)
+param_sync_mode = SYNC_MODE_EXISTS  # comparaison source/destination (--sync_mode)
+param_dry_run = False  # simulation sans suppression ni copie (--dry_run)
+param_plan_out_path = ""  # export JSON du plan sans copie (--plan_out)
+param_plan_in_path = ""  # execution d'un plan JSON deja calcule (--plan_in)
+param_pipeline = False  # planification et copie en pipeline asyncio (--pipeline)
 
 # =============================================================================
 # === REPERTOIRE WEBDAV WAIT/DONE PAR DOMAINE ================================
@@ -157,6 +237,38 @@ DOMAIN_WAIT_DONE_PATHS = {
     },
 }
 # =============================================================================
+# === INDEX DONE PERSISTANT ===================================================
+# =============================================================================
+DONE_INDEX_CACHE_FILENAME = ".done_index.json"  # stocke a cote du dossier DONE (pars/<domaine>/)
+DONE_INDEX_CACHE_VERSION = 1
+# Marge sous laquelle le mtime du dossier n'est pas juge fiable (granularite NFS)
+DONE_INDEX_MTIME_GUARD_NS = 2 * 1000 * 1000 * 1000
+# =============================================================================
+# === EMPREINTES FICHIERS (--sync_mode checksum) ==============================
+# =============================================================================
+FINGERPRINT_STORE_FILENAME = ".fingerprints.json"  # stocke sous le dossier date (<webdav>/<date>/)
+FINGERPRINT_STORE_VERSION = 1
+FINGERPRINT_DIGEST_SIZE = 16  # octets, blake2b
+# =============================================================================
+# === PLAN DE COPIE SERIALISE (--plan_out / --plan_in) ========================
+# =============================================================================
+PLAN_FILE_VERSION = 1
+
+# =============================================================================
+# === DATES PLAN MULTIPLES (-d liste ou plage) ================================
+# =============================================================================
+DATE_PLAN_LIST_SEPARATOR = ","  # -d 20251220,20251222
+DATE_PLAN_RANGE_SEPARATOR = ".."  # -d 20251220..20251223 (bornes incluses)
+DATE_PLAN_MAX_DATES = 366  # garde-fou sur l'expansion des plages
+# =============================================================================
+# === MAPPING COMPILE ========================
+# =============================================================================
+COMPILED_MAPPING_SUFFIX = ".compiled.json"  # '.<mapping.csv>.compiled.json' dans le dossier du CSV
+COMPILED_MAPPING_VERSION = 2
+# champs MappingRow conserves dans le cache (le matcher est reconstruit depuis les masques)
+COMPILED_MAPPING_FIELDS = ("line_number", "row_type", "source", "destination", "prefixes", "extensions",
+                           "exclude_prefixes", "purge", "date_policy", "filename_masks", "basename_masks")
+# =============================================================================
 # === CODES DE RETOUR ========================================
 # =============================================================================
 RC_OK = 0
@@ -165,6 +277,89 @@ RC_CONFIG_NOT_FOUND = 2
 RC_CONFIG_INVALID = 3
 RC_NOTHING_TO_DO = 4
 RC_RUNTIME_ERROR = 5
+# Code retour global d'un run multi-dates: le plus grave rencontre, dans cet ordre
+RC_DATES_PRECEDENCE = (RC_RUNTIME_ERROR, RC_CONFIG_INVALID, RC_CONFIG_NOT_FOUND, RC_OK, RC_NOTHING_TO_DO)
+# =============================================================================
+# === STATUTS DE COPIE UNITAIRE ================================================
+# =============================================================================
+COPY_STATUS_COPIED = "COPIED"
+COPY_STATUS_SKIPPED = "SKIPPED"
+COPY_STATUS_ERROR = "ERROR"
+# =============================================================================
+# === INSTRUMENTATION DU RUN ===================================================
+# =============================================================================
+METRIC_STAT = "stat"  # stat / exists / isfile / getsize
+METRIC_LISTDIR = "listdir"  # scandir / listdir / glob
+METRIC_OPEN = "open"  # ouvertures de fichiers (lecture ou ecriture)
+METRIC_BYTES_COPIED = "bytes_copied"  # octets ecrits en destination
+METRIC_FILES_COPIED = "files_copied"
+METRIC_FILES_SKIPPED = "files_skipped"  # fichiers deja presents / a jour en destination
+METRIC_BYTES_COMPARED = "bytes_compared"  # octets lus pour les comparaisons WAIT/DONE et empreintes
+RUN_SUMMARY_VERSION = 2
+
+
+class RunMetrics:
+    """
+    Chronometres par phase (appels et secondes cumulees, tous threads confondus)
+    et compteurs d'appels systeme de fichiers / octets d'un run.
+    Les mises a jour concurrentes passent par 'lock'.
+    """
+
+    def __init__(self):
+        self.started_at = datetime.now()
+        self.started_perf = time.perf_counter()
+        self.timers = {}
+        self.counters = dict.fromkeys([METRIC_STAT, METRIC_LISTDIR, METRIC_OPEN, METRIC_BYTES_COPIED,
+                                       METRIC_FILES_COPIED, METRIC_FILES_SKIPPED, METRIC_BYTES_COMPARED], 0)
+        self.lock = threading.Lock()
+
+    def count(self, name: str, increment: int = 1) -> None:
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + increment
+
+    def add_time(self, name: str, seconds: float) -> None:
+        with self.lock:
+            timer = self.timers.setdefault(name, {"calls": 0, "seconds": 0.0})
+            timer["calls"] += 1
+            timer["seconds"] += seconds
+
+    def summary(self) -> dict:
+        with self.lock:
+            return {
+                "started_at": self.started_at.isoformat(timespec='seconds'),
+                "duration_seconds": round(time.perf_counter() - self.started_perf, 6),
+                "timers": {name: {"calls": timer["calls"], "seconds": round(timer["seconds"], 6)}
+                           for name, timer in self.timers.items()},
+                "counters": dict(self.counters),
+            }
+
+    def log_summary(self) -> None:
+        for name, timer in self.timers.items():
+            logger.info('Phase [%s] appels [%s] duree [%.3fs]' % (name, timer["calls"], timer["seconds"]))
+        logger.info('Appels fichiers: stat [%s] listdir [%s] open [%s] - octets copies [%s] compares [%s]'
+                    % (self.counters[METRIC_STAT], self.counters[METRIC_LISTDIR], self.counters[METRIC_OPEN],
+                       self.counters[METRIC_BYTES_COPIED], self.counters[METRIC_BYTES_COMPARED]))
+
+
+run_metrics = RunMetrics()
+# =============================================================================
+def path_exists(path: str) -> bool:
+    """os.path.exists compte dans run_metrics (appel stat)."""
+    run_metrics.count(METRIC_STAT)
+    return os.path.exists(path)
+# =============================================================================
+def timed_phase(phase_name: str):
+    """Decorateur: cumule la duree de chaque appel de la fonction dans run_metrics[phase_name]."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                run_metrics.add_time(phase_name, time.perf_counter() - start)
+        return wrapper
+    return decorator
 # =============================================================================
 # === FONCTIONS UTILITAIRES PRE-LOGGER (NE PAS MODIFIER) ======================
 # =============================================================================
@@ -239,6 +434,42 @@ def set_reference_batch_vars(mode_copy_par) -> None:
         REFERENCE_BATCH_PREFIX_LOG_FILENAME = DSN_BATCH_PREFIX_LOG_FILENAME
         REFERENCE_BATCH_TECHNIC_LOG_PATH = DSN_BATCH_TECHNIC_LOG_PATH
 # =============================================================================
+def parse_date_plans(value: str) -> list:
+    """
+    Developpe la valeur de -d en liste de dates plan AAAAMMJJ: elements separes
+    par ',' et plages 'debut..fin' (bornes incluses). Ordre conserve, doublons
+    retires.
+
+    Exceptions:
+        ValueError: date invalide, plage inversee ou plus de DATE_PLAN_MAX_DATES dates
+    """
+    date_plans = []
+    for item in value.split(DATE_PLAN_LIST_SEPARATOR):
+        item = item.strip()
+        if not item:
+            continue
+        if DATE_PLAN_RANGE_SEPARATOR in item:
+            first, _, last = item.partition(DATE_PLAN_RANGE_SEPARATOR)
+            first_day = datetime.strptime(first.strip(), '%Y%m%d')
+            last_day = datetime.strptime(last.strip(), '%Y%m%d')
+            if last_day < first_day:
+                raise ValueError('plage inversee [%s]' % item)
+            if (last_day - first_day).days >= DATE_PLAN_MAX_DATES:
+                raise ValueError('plage de plus de %s jours [%s]' % (DATE_PLAN_MAX_DATES, item))
+            day = first_day
+            while day <= last_day:
+                date_plans.append(day.strftime('%Y%m%d'))
+                day += timedelta(days=1)
+        else:
+            date_plans.append(datetime.strptime(item, '%Y%m%d').strftime('%Y%m%d'))
+
+    date_plans = list(dict.fromkeys(date_plans))
+    if not date_plans:
+        raise ValueError('aucune date')
+    if len(date_plans) > DATE_PLAN_MAX_DATES:
+        raise ValueError('plus de %s dates' % DATE_PLAN_MAX_DATES)
+    return date_plans
+# =============================================================================
 def parseArgs():
     """
     Analyse les arguments et renseigne les parametres globaux.
@@ -247,7 +478,9 @@ def parseArgs():
     """
     global \
         param_date_traitement, param_mode_copie, param_ref_mapping_path, \
-        param_webdav_path, param_interface_path, param_logshell_path, param_log_verbose
+        param_webdav_path, param_interface_path, param_logshell_path, param_log_verbose, \
+        param_workers, param_copy_buffer_size, param_sync_mode, param_dry_run, \
+        param_plan_out_path, param_plan_in_path, param_pipeline, param_dates_traitement
 
     parser = argparse.ArgumentParser(
         prog=THIS_PROGRAM,
@@ -283,10 +516,11 @@ def parseArgs():
 
     # # Parametres obligatoires ##
     parser.add_argument('-d', type=str, metavar='dateTraitement', required=True,
-                        help="Date de planification au format AAAAMMJJ")
+                        help="Date de planification au format AAAAMMJJ"
+                             " (ou liste AAAAMMJJ,AAAAMMJJ / plage AAAAMMJJ..AAAAMMJJ)")
 
-    parser.add_argument('--ref_mapping', type=str, metavar='refMappingPath', required=True,
-                        help='(*)Chemin du referentiel des fichiers a traiter')
+    parser.add_argument('--ref_mapping', type=str, metavar='refMappingPath',
+                        help='(*)Chemin du referentiel des fichiers a traiter (sauf si --plan_in)')
 
     # # Parametres optionnels ##
     parser.add_argument("--mode_copie", type=str, metavar='modeCopie',
@@ -303,6 +537,28 @@ def parseArgs():
     parser.add_argument('--logshell_path', type=str,
                         help='Chemin explicite du log python')
 
+    parser.add_argument('--workers', type=int, metavar='N', default=1,
+                        help='Nombre de copies simultanees (defaut: 1, sequentiel)')
+
+    parser.add_argument('--copy_buffer_kb', type=int, metavar='Ko',
+                        help='Taille du buffer de copie en Ko (defaut: %s)' % (COPY_BUFFER_SIZE_DEFAULT // 1024))
+
+    parser.add_argument('--sync_mode', '--sync-mode', dest='sync_mode', type=str.lower,
+                        choices=SYNC_MODES, default=SYNC_MODE_EXISTS,
+                        help='Fichier deja present: exists | stat | checksum (defaut: exists)')
+
+    parser.add_argument('--plan_out', '--plan-out', dest='plan_out', type=str, metavar='planJsonPath',
+                        help='Ecrit le plan de copie resolu en JSON, sans copier')
+
+    parser.add_argument('--plan_in', '--plan-in', dest='plan_in', type=str, metavar='planJsonPath',
+                        help='Execute un plan JSON (--plan_out) sans relire le CSV ni scanner les sources')
+
+    parser.add_argument('--dry_run', '--dry-run', dest='dry_run', action='store_true',
+                        help='Simulation: purge et copie journalisees sans modification')
+
+    parser.add_argument('--pipeline', action='store_true',
+                        help='Copie demarree pendant la construction du plan (--workers copies par montage)')
+
     parser.add_argument('-v', type=str, metavar='Log_Level', nargs='?', const='info',
                         choices=['debug', 'info', 'warn', 'error', 'critical'], default='info',
                         help='Definition du niveau de logging,\n debug | info | warning | error | critical')
@@ -314,17 +570,40 @@ def parseArgs():
 
     if input_args.d:
         param_date_traitement = str(input_args.d).strip()
-        try:
-            datetime.strptime(param_date_traitement, '%Y%m%d')
-        except ValueError:
-            log_before_logger('Init: Date Plan invalide [%s]' % param_date_traitement)
+        if DATE_PLAN_LIST_SEPARATOR in param_date_traitement or DATE_PLAN_RANGE_SEPARATOR in param_date_traitement:
+            try:
+                param_dates_traitement = parse_date_plans(param_date_traitement)
+            except ValueError as error:
+                log_before_logger('Init: Date Plan invalide [%s] (%s)' % (param_date_traitement, str(error)))
+                parser.error('-d invalide [%s] (%s)' % (param_date_traitement, str(error)))
+            if len(param_dates_traitement) > 1 and (input_args.plan_in or input_args.plan_out):
+                parser.error('--plan_in / --plan_out incompatibles avec plusieurs dates plan')
+            param_date_traitement = param_dates_traitement[0]
+            log_before_logger('Init: Dates Plan [%s] date(s) %s'
+                              % (len(param_dates_traitement), param_dates_traitement))
+        else:
+            try:
+                datetime.strptime(param_date_traitement, '%Y%m%d')
+            except ValueError:
+                log_before_logger('Init: Date Plan invalide [%s]' % param_date_traitement)
+            param_dates_traitement = [param_date_traitement]
 
-        log_before_logger('Init: Date Plan [%s]' % param_date_traitement)
+            log_before_logger('Init: Date Plan [%s]' % param_date_traitement)
 
     if input_args.ref_mapping:
         param_ref_mapping_path = str(input_args.ref_mapping).strip()
         log_before_logger('Init: Fichier CSV [%s]' % param_ref_mapping_path)
 
+    if input_args.plan_in:
+        param_plan_in_path = str(input_args.plan_in).strip()
+        log_before_logger('Init: Mode [%s] active [%s]' % ('Plan_in', param_plan_in_path))
+    elif not input_args.ref_mapping:
+        parser.error('--ref_mapping obligatoire (sauf si --plan_in)')
+
+    if input_args.plan_out:
+        param_plan_out_path = str(input_args.plan_out).strip()
+        log_before_logger('Init: Mode [%s] active [%s]' % ('Plan_out', param_plan_out_path))
+
     if input_args.mode_copie:
         param_mode_copie = str(input_args.mode_copie).strip().upper()
         if param_mode_copie == "CLEVADSN":
@@ -350,6 +629,33 @@ def parseArgs():
         param_logshell_path = input_args.logshell_path.replace('\\', '/')
         log_before_logger('Init: Mode [%s] active [%s]' % ('Logshell_path', param_logshell_path))
 
+    if input_args.workers is not None:
+        if input_args.workers < 1:
+            log_before_logger('Init: Nombre de workers invalide [%s]' % input_args.workers)
+            parser.error('--workers doit etre >= 1')
+        param_workers = input_args.workers
+        if param_workers > 1:
+            log_before_logger('Init: Mode [%s] active [%s]' % ('Copie_parallele', param_workers))
+
+    if input_args.copy_buffer_kb is not None:
+        if input_args.copy_buffer_kb < 1:
+            log_before_logger('Init: Taille buffer invalide [%s]' % input_args.copy_buffer_kb)
+            parser.error('--copy_buffer_kb doit etre >= 1')
+        param_copy_buffer_size = input_args.copy_buffer_kb * 1024
+        log_before_logger('Init: Mode [%s] active [%s Ko]' % ('Buffer_copie', input_args.copy_buffer_kb))
+
+    if input_args.sync_mode:
+        param_sync_mode = input_args.sync_mode
+        log_before_logger('Init: Mode [%s] active [%s]' % ('Sync_mode', param_sync_mode))
+
+    if input_args.dry_run:
+        param_dry_run = True
+        log_before_logger('Init: Mode [%s] active' % 'Dry_run')
+
+    if input_args.pipeline:
+        param_pipeline = True
+        log_before_logger('Init: Mode [%s] active' % 'Pipeline')
+
     if input_args.v:
         param_log_verbose = input_args.v.upper()
     return input_args
@@ -383,7 +689,7 @@ def resolve_duplicate_name(destination_dir: str,
     candidate = dest_filename
     candidate_path = os.path.join(destination_dir, candidate)
 
-    if os.path.exists(candidate_path):
+    if path_exists(candidate_path):
         # Inserer avant la premiere extension
         first_ext = dest_filename.find(".")
         if first_ext == 1:
@@ -397,7 +703,7 @@ def resolve_duplicate_name(destination_dir: str,
         # S'il existe encore, numeroter
         if allow_sequence:
             i = 1
-            while os.path.exists(candidate_path):
+            while path_exists(candidate_path):
                 candidate = f"{base}{relance_tag}-{i}{ext}"
                 candidate_path = os.path.join(destination_dir, candidate)
                 i += 1
@@ -406,7 +712,7 @@ def resolve_duplicate_name(destination_dir: str,
 
     return candidate
 # =============================================================================
-def extract_header_columns(df: pd.DataFrame, base_name_header: str) -> list:
+def extract_header_columns(columns: list, base_name_header: str) -> list:
     """
     Retourne la liste des colonnes dont le nom commence par 'base_name_header'
     (comparaison insensible a la casse). Loggue les colonnes detectees
@@ -414,7 +720,7 @@ def extract_header_columns(df: pd.DataFrame, base_name_header: str) -> list:
     """
     matching_headers = []
     logger.debug('Colonne dynamique trouvee:')
-    for header in df.columns:
+    for header in columns:
         if header.lower().startswith(base_name_header.lower()):
             matching_headers.append(header)
 
@@ -423,48 +729,518 @@ def extract_header_columns(df: pd.DataFrame, base_name_header: str) -> list:
 
     return matching_headers
 # =============================================================================
-def find_latest_yyyymmdd_subdir(source_arch_par_base: str) -> str or None:
+class MappingRow:
+    """
+    Ligne du CSV de mapping, valeurs nettoyees (strip) et colonnes dynamiques
+    prefix## / extension## / exclude_prefix## deja extraites (valeurs non vides,
+    dans l'ordre des colonnes).
+    Les attributs filename_masks / basename_masks / matcher sont renseignes par
+    compile_mapping_row().
+    """
+    __slots__ = ("line_number", "row_type", "source", "destination",
+                 "prefixes", "extensions", "exclude_prefixes", "purge", "date_policy",
+                 "filename_masks", "basename_masks", "matcher")
+
+    def __init__(self, line_number: int, row_type: str, source: str, destination: str,
+                 prefixes: list, extensions: list, exclude_prefixes: list,
+                 purge: bool, date_policy: str):
+        self.line_number = line_number
+        self.row_type = row_type
+        self.source = source
+        self.destination = destination
+        self.prefixes = prefixes
+        self.extensions = extensions
+        self.exclude_prefixes = exclude_prefixes
+        self.purge = purge
+        self.date_policy = date_policy
+        self.filename_masks = None
+        self.basename_masks = None
+        self.matcher = None
+
+    def __repr__(self) -> str:
+        return 'MappingRow(%s)' % ', '.join('%s=%r' % (name, getattr(self, name)) for name in self.__slots__)
+# =============================================================================
+def load_mapping_rows(mapping_path: str) -> tuple:
     """
-    Parcourt les sous-dossiers directs de 'source_arch_par_base' et retourne
-    le chemin du sous-dossier au format YYYYMMDD le plus recent. Retourne None
-    si aucun ne correspond.
+    Lit le CSV de mapping (separateur ';') avec le module csv standard.
+    Reprend les regles de l'ancienne lecture pandas (read_csv dtype=str + fillna):
+    en-tetes nettoyes, cellules absentes = '', lignes vides ignorees, ligne avec
+    plus de valeurs que d'en-tetes = CSV invalide.
+
+    Retour:
+        (rows, rc):
+            rows (list[MappingRow]): toutes les lignes, sans filtrage par type
+            rc (int): RC_OK / RC_CONFIG_INVALID
+    """
+    try:
+        run_metrics.count(METRIC_OPEN)
+        with open(mapping_path, 'r', encoding='utf-8-sig', newline='') as mapping_file:
+            reader = csv.reader(mapping_file, delimiter=';')
+            header = next(reader, None)
+            if header is None:
+                raise ValueError('fichier vide')
+            columns = [column.strip() for column in header]
+            raw_rows = []
+            for values in reader:
+                if not values:
+                    continue
+                if len(values) > len(columns) and any(value.strip() for value in values[len(columns):]):
+                    raise ValueError('ligne %s: %s valeurs pour %s colonnes'
+                                     % (reader.line_num, len(values), len(columns)))
+                raw_rows.append((reader.line_num, values))
+    except Exception as error:
+        logger.error('Fichier reference invalide [%s] (%s)' % (mapping_path, str(error)))
+        return [], RC_CONFIG_INVALID
+
+    # Colonnes obligatoires
+    required_cols = [PAR_FILE_TYPE, PAR_SOURCE_PATH, PAR_DESTINATION_PATH]
+    missing_req = [c for c in required_cols if c not in columns]
+    if missing_req:
+        logger.error('Colonnes obligatoires manquantes dans le CSV [%s]' % ','.join(missing_req))
+        return [], RC_CONFIG_INVALID
+
+    # Colonnes dynamiques (index), resolues une fois pour toutes les lignes
+    def column_indexes(base_name_header: str) -> list:
+        headers = extract_header_columns(columns, base_name_header=base_name_header)
+        return [index for index, column in enumerate(columns) if column in headers]
+
+    prefix_indexes = column_indexes(PAR_PREFIX_BASE)
+    extension_indexes = column_indexes(PAR_EXTENSION_BASE)
+    exclude_prefix_indexes = column_indexes(PAR_EXCLUDE_PREFIX)
+    type_index = columns.index(PAR_FILE_TYPE)
+    source_index = columns.index(PAR_SOURCE_PATH)
+    destination_index = columns.index(PAR_DESTINATION_PATH)
+    purge_index = columns.index(PAR_PURGE) if PAR_PURGE in columns else None
+    date_policy_index = columns.index(DATE_POLICY) if DATE_POLICY in columns else None
+
+    rows = []
+    for line_number, values in raw_rows:
+        cells = [value.strip() for value in values[:len(columns)]]
+        cells.extend([''] * (len(columns) - len(cells)))
+
+        def dynamic_values(indexes: list) -> list:
+            return [cells[index] for index in indexes if cells[index]]
+
+        rows.append(MappingRow(
+            line_number=line_number,
+            row_type=cells[type_index].upper(),
+            source=cells[source_index],
+            destination=cells[destination_index].lstrip("/"),
+            prefixes=dynamic_values(prefix_indexes),
+            extensions=dynamic_values(extension_indexes),
+            exclude_prefixes=dynamic_values(exclude_prefix_indexes),
+            purge=(purge_index is not None and cells[purge_index].upper() == 'YES'),
+            date_policy=(cells[date_policy_index].upper() if date_policy_index is not None else ''),
+        ))
+    return rows, RC_OK
+# =============================================================================
+def compile_mapping_row(row: MappingRow) -> MappingRow:
+    """
+    Normalise une ligne de mapping une fois pour toutes: prefixes dedupliques
+    ('*' ignore s'il existe un prefixe plus specifique), masques prefix x extension
+    dedupliques (suites de '*' reduites), matcher compile sur les masques sans
+    sous-dossier.
+    """
+    # Normalisation liste prefixes: déduplication et suppression du préfixe générique '*' s'il existe un préfixe plus spécifique
+    prefixes = row.prefixes
+    if prefixes:
+        normalized_prefixes = []
+        for p in prefixes:
+            if p not in normalized_prefixes:
+                normalized_prefixes.append(p)
+        if '*' in normalized_prefixes and any(p != '*' for p in normalized_prefixes):
+            normalized_prefixes = [p for p in normalized_prefixes if p != '*']
+            logger.debug("Prefix '*' ignoré car d'autres prefixes spécifiques présents: %s" % normalized_prefixes)
+        prefixes = normalized_prefixes
+    row.prefixes = prefixes
+
+    # Construction des patterns depuis le referentiel CSV
+    extensions = row.extensions
+    filename_masks = []
+    if prefixes and extensions:
+        for prefix_value in prefixes:
+            for extension_value in extensions:
+                filename_masks.append(prefix_value + extension_value)
+    elif not prefixes and extensions:
+        filename_masks = list(extensions)
+    elif prefixes and not extensions:
+        filename_masks = list(prefixes)
+
+    # Normalisation & déduplication des patterns (suppression doublons et multi-*)
+    if filename_masks:
+        cleaned = []
+        seen = set()
+        for raw in filename_masks:
+            # remplace suites de * par un seul * (ex: '**.par' -> '*.par')
+            norm = re.sub(r'\*{2,}', '*', raw)
+            if norm not in seen:
+                seen.add(norm)
+                cleaned.append(norm)
+        if len(cleaned) != len(filename_masks):
+            logger.debug(
+                'Patterns normalisés/dédupliqués de %s à %s: %s' % (len(filename_masks), len(cleaned), cleaned))
+        filename_masks = cleaned
+
+    row.filename_masks = filename_masks
+    row.basename_masks = [mask for mask in filename_masks if os.sep not in mask and '/' not in mask]
+    row.matcher = FilenameMatcher(row.basename_masks, row.exclude_prefixes)
+    return row
+# =============================================================================
+def get_compiled_mapping_path(mapping_path: str) -> str:
+    mapping_dir, mapping_name = os.path.split(os.path.abspath(mapping_path))
+    return os.path.join(mapping_dir, '.' + mapping_name + COMPILED_MAPPING_SUFFIX)
+# =============================================================================
+def restore_compiled_mapping_row(row_values: dict) -> MappingRow:
+    """
+    Reconstruit une ligne compilee depuis le cache JSON: champs controles
+    (types attendus), matcher recompile depuis les masques sans sous-dossier.
+    Leve ValueError si l'entree est invalide.
+    """
+    if not isinstance(row_values, dict) or set(row_values) != set(COMPILED_MAPPING_FIELDS):
+        raise ValueError('entree de mapping compile invalide')
+    for name in ("row_type", "source", "destination", "date_policy"):
+        if not isinstance(row_values[name], str):
+            raise ValueError('champ [%s] invalide' % name)
+    for name in ("prefixes", "extensions", "exclude_prefixes", "filename_masks", "basename_masks"):
+        if not isinstance(row_values[name], list) or not all(isinstance(value, str) for value in row_values[name]):
+            raise ValueError('champ [%s] invalide' % name)
+    if not isinstance(row_values["line_number"], int) or not isinstance(row_values["purge"], bool):
+        raise ValueError('champ [line_number] / [purge] invalide')
+
+    row = MappingRow(
+        line_number=row_values["line_number"],
+        row_type=row_values["row_type"],
+        source=row_values["source"],
+        destination=row_values["destination"],
+        prefixes=row_values["prefixes"],
+        extensions=row_values["extensions"],
+        exclude_prefixes=row_values["exclude_prefixes"],
+        purge=row_values["purge"],
+        date_policy=row_values["date_policy"],
+    )
+    row.filename_masks = row_values["filename_masks"]
+    row.basename_masks = row_values["basename_masks"]
+    row.matcher = FilenameMatcher(row.basename_masks, row.exclude_prefixes)
+    return row
+# =============================================================================
+@timed_phase('mapping')
+def load_compiled_mapping(mapping_path: str) -> tuple:
+    """
+    Retourne les lignes du mapping compilees (cf. compile_mapping_row): prefixes
+    normalises, masques dedupliques et matcher compile une fois par ligne.
+    Le resultat est mis en cache (JSON, donnees uniquement) a cote du CSV,
+    indexe par l'empreinte du contenu du CSV: tant que le CSV ne change pas, le
+    run suivant recharge les lignes normalisees et les masques sans reparser le
+    CSV, seuls les matchers sont reconstruits (cf. restore_compiled_mapping_row).
+    Un cache absent, illisible, invalide ou non ecrivable n'est pas bloquant.
+
+    Retour:
+        (rows, rc): rows (list[MappingRow]), rc RC_OK / RC_CONFIG_INVALID
+    """
+    try:
+        run_metrics.count(METRIC_OPEN)
+        with open(mapping_path, 'rb') as mapping_file:
+            mapping_digest = hashlib.blake2b(mapping_file.read(), digest_size=FINGERPRINT_DIGEST_SIZE).hexdigest()
+    except Exception as error:
+        logger.error('Fichier reference invalide [%s] (%s)' % (mapping_path, str(error)))
+        return [], RC_CONFIG_INVALID
+
+    compiled_path = get_compiled_mapping_path(mapping_path)
+    if ENABLE_COMPILED_MAPPING_CACHE:
+        try:
+            run_metrics.count(METRIC_OPEN)
+            with open(compiled_path, 'r', encoding='utf-8') as compiled_file:
+                compiled = json.load(compiled_file)
+            if (isinstance(compiled, dict) and compiled.get("version") == COMPILED_MAPPING_VERSION
+                    and compiled.get("mapping_digest") == mapping_digest and compiled.get("sep") == os.sep
+                    and isinstance(compiled.get("rows"), list)):
+                rows = [restore_compiled_mapping_row(row_values) for row_values in compiled["rows"]]
+                logger.info('Mapping compile charge depuis le cache [%s] (%s ligne(s))' % (compiled_path, len(rows)))
+                return rows, RC_OK
+            logger.debug('Mapping compile obsolete [%s], recompilation' % compiled_path)
+        except FileNotFoundError:
+            pass
+        except Exception as error:
+            logger.debug('Mapping compile illisible [%s] (%s)' % (compiled_path, str(error)))
+
+    rows, rc = load_mapping_rows(mapping_path)
+    if rc != RC_OK:
+        return [], rc
+    for row in rows:
+        compile_mapping_row(row)
+
+    if ENABLE_COMPILED_MAPPING_CACHE:
+        tmp_path = compiled_path + ".tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as compiled_file:
+                json.dump({
+                    "version": COMPILED_MAPPING_VERSION,
+                    "mapping_digest": mapping_digest,
+                    "sep": os.sep,
+                    "rows": [{name: getattr(row, name) for name in COMPILED_MAPPING_FIELDS} for row in rows],
+                }, compiled_file)
+            os.replace(tmp_path, compiled_path)
+            logger.debug('Mapping compile mis en cache [%s]' % compiled_path)
+        except Exception as error:
+            logger.debug('Ecriture mapping compile impossible [%s] (%s)' % (compiled_path, str(error)))
+    return rows, RC_OK
+# =============================================================================
+def is_valid_yyyymmdd(name: str) -> bool:
+    """Nom de 8 chiffres correspondant a une date calendaire valide (sans strptime)."""
+    match = YYYYMMDD_DIR_REGEX.fullmatch(name)
+    if match is None:
+        return False
+    year, month, day = int(match.group(1)), int(match.group(2)), int(match.group(3))
+    if year < 1 or not 1 <= month <= 12 or day < 1:
+        return False
+    return day <= calendar.monthrange(year, month)[1]
+# =============================================================================
+def list_yyyymmdd_subdirs(source_arch_par_base: str, not_after: str = None, limit: int = None,
+                          fs_stats: dict = None) -> list:
+    """
+    Retourne les sous-dossiers directs de 'source_arch_par_base' nommes YYYYMMDD
+    (date valide), du plus recent au plus ancien.
+    Un seul os.scandir: le type de chaque entree provient du DirEntry et seuls les
+    noms de 8 chiffres sont examines (fichiers et dossiers parasites ignores sans stat).
 
     Parametres:
         source_arch_par_base (str): chemin du dossier parent
+        not_after (str):            date YYYYMMDD maximale incluse (ex. date plan), None = sans borne
+        limit (int):                nombre maximal de sous-dossiers retournes (les N plus recents)
+        fs_stats (dict):            compteur {"fs_calls"} incremente si fourni
 
     Retour:
-        str | None: chemin du dernier sous-dossier YYYYMMDD, ou None
+        list[str]: chemins complets des sous-dossiers retenus (liste vide si aucun)
     """
+    if fs_stats is None:
+        fs_stats = {"fs_calls": 0}
+    candidate_names = []
     try:
-        archive_par_paths = os.listdir(source_arch_par_base)
+        fs_stats["fs_calls"] += 1
+        run_metrics.count(METRIC_LISTDIR)
+        with os.scandir(source_arch_par_base) as scan:
+            for entry in scan:
+                name = entry.name
+                if len(name) != 8 or not name.isdigit():
+                    continue
+                if not_after is not None and name > not_after:
+                    continue
+                try:
+                    if not entry.is_dir():
+                        continue
+                except OSError:
+                    continue
+                candidate_names.append(name)
     except Exception as error:
         logger.warning('Erreur listage sur source_root [%s] (%s)' % (source_arch_par_base, str(error)))
-        return None
+        return []
 
-    latest_arch_par_dir_name = None
-    for arch_par_dir_name in archive_par_paths:
-        arch_par_path = os.path.join(source_arch_par_base, arch_par_dir_name)
-        if not os.path.isdir(arch_par_path):
+    # YYYYMMDD: l'ordre des noms est l'ordre chronologique; validation des seuls
+    # candidats retenus, du plus recent au plus ancien
+    subdir_paths = []
+    for name in sorted(candidate_names, reverse=True):
+        if not is_valid_yyyymmdd(name):
             continue
-        if len(arch_par_dir_name) != 8:
-            continue
-        if not arch_par_dir_name.isdigit():
-            continue
-        try:
-            datetime.strptime(arch_par_dir_name, '%Y%m%d')
-        except ValueError:
-            continue
-        if latest_arch_par_dir_name is None or arch_par_dir_name > latest_arch_par_dir_name:
-            latest_arch_par_dir_name = arch_par_dir_name
+        subdir_paths.append(os.path.join(source_arch_par_base, name))
+        if limit is not None and len(subdir_paths) >= limit:
+            break
+    return subdir_paths
+# =============================================================================
+def find_latest_yyyymmdd_subdir(source_arch_par_base: str, fs_stats: dict = None,
+                                not_after: str = None) -> str or None:
+    """
+    Retourne le chemin du sous-dossier au format YYYYMMDD le plus recent de
+    'source_arch_par_base' (anterieur ou egal a 'not_after' si fourni).
+    Retourne None si aucun ne correspond.
+
+    Parametres:
+        source_arch_par_base (str): chemin du dossier parent
+        fs_stats (dict):            compteur {"fs_calls"} incremente si fourni
+        not_after (str):            date YYYYMMDD maximale incluse, None = sans borne
 
-    if latest_arch_par_dir_name is None:
+    Retour:
+        str | None: chemin du dernier sous-dossier YYYYMMDD, ou None
+    """
+    latest_paths = list_yyyymmdd_subdirs(source_arch_par_base, not_after=not_after, limit=1, fs_stats=fs_stats)
+    if not latest_paths:
         logger.debug('Aucun sous-dossier date trouve sous [%s]' % source_arch_par_base)
         return None
 
-    latest_full_path = os.path.join(source_arch_par_base, latest_arch_par_dir_name)
+    latest_full_path = latest_paths[0]
     logger.info('Sous-dossier le plus recent selectionne [%s]' % latest_full_path)
     return latest_full_path
 # =============================================================================
+def resolve_source_directory(source_path: str, date_policy: str,
+                             resolution_cache: dict, resolution_stats: dict) -> tuple:
+    """
+    Resout le dossier source effectif d'une ligne CSV: existence du dossier puis,
+    selon date_policy, descente dans le dernier sous-dossier date (LATEST_YYYYMMDD)
+    ou dans le dernier sous-dossier anterieur ou egal a la date plan
+    (LATEST_YYYYMMDD_DATEPLAN).
+    Le resultat est memorise par (source, date_policy, date plan): les lignes
+    partageant la meme source et la meme politique ne refont aucun appel
+    systeme de fichiers.
+
+    Parametres:
+        source_path (str):       dossier source de la ligne (avant politique date)
+        date_policy (str):       politique date de la ligne ('', LATEST_YYYYMMDD, LATEST_YYYYMMDD_DATEPLAN)
+        resolution_cache (dict): cache (source, politique, date plan) -> (existe, dossier resolu, cout)
+        resolution_stats (dict): compteurs {"resolutions", "saved", "fs_calls", "fs_calls_saved"}
+
+    Retour:
+        (exists, resolved_path):
+            exists (bool):              dossier source present
+            resolved_path (str | None): dossier a lister, None si absent ou sans sous-dossier date
+    """
+    not_after = param_date_traitement if date_policy == DATE_POLICY_LATEST_DATEPLAN else None
+    cache_key = (os.path.normpath(source_path), date_policy, not_after)
+    cached = resolution_cache.get(cache_key)
+    if cached is not None:
+        exists, resolved_path, fs_calls = cached
+        resolution_stats["saved"] += 1
+        resolution_stats["fs_calls_saved"] += fs_calls
+        return exists, resolved_path
+
+    fs_stats = {"fs_calls": 1}
+    exists = path_exists(source_path)
+    resolved_path = source_path if exists else None
+    if exists and date_policy in (DATE_POLICY_LATEST, DATE_POLICY_LATEST_DATEPLAN):
+        logger.debug('Politique date %s active [%s]' % (date_policy.lower(), source_path))
+        resolved_path = find_latest_yyyymmdd_subdir(source_path, fs_stats, not_after=not_after)
+
+    resolution_stats["resolutions"] += 1
+    resolution_stats["fs_calls"] += fs_stats["fs_calls"]
+    resolution_cache[cache_key] = (exists, resolved_path, fs_stats["fs_calls"])
+    return exists, resolved_path
+# =============================================================================
+def list_source_directory(source_path: str, listing_cache: dict, listing_stats: dict) -> list:
+    """
+    Retourne le contenu direct de 'source_path' sous forme [(nom, est_fichier), ...].
+    Un seul os.scandir par dossier: le resultat est conserve dans 'listing_cache'
+    et reutilise par tous les motifs et toutes les lignes CSV partageant ce dossier.
+    Le type de chaque entree provient du DirEntry (pas de stat supplementaire
+    sur la plupart des systemes de fichiers).
+
+    Parametres:
+        source_path (str):    dossier a lister
+        listing_cache (dict): cache chemin -> liste d'entrees
+        listing_stats (dict): compteurs {"listings", "saved"} mis a jour
+
+    Retour:
+        list[tuple]: entrees du dossier (liste vide si dossier illisible)
+    """
+    cache_key = os.path.normpath(source_path)
+    if cache_key in listing_cache:
+        listing_stats["saved"] += 1
+        return listing_cache[cache_key]
+
+    entries = []
+    try:
+        run_metrics.count(METRIC_LISTDIR)
+        with os.scandir(source_path) as scan:
+            for entry in scan:
+                try:
+                    is_file = entry.is_file()
+                except OSError:
+                    is_file = False
+                entries.append((entry.name, is_file, entry))
+    except Exception as error:
+        logger.warning('Erreur listage repertoire source [%s] (%s)' % (source_path, str(error)))
+
+    listing_stats["listings"] += 1
+    listing_cache[cache_key] = entries
+    return entries
+# =============================================================================
+class FilenameMatcher:
+    """
+    Motifs d'inclusion et d'exclusion d'une ligne CSV compiles une seule fois.
+    Chaque cote est reduit a un ensemble de noms litteraux (chemin rapide, sans
+    regex) et a une unique regex d'alternance construite avec fnmatch.translate.
+
+    Semantique identique a glob (inclusion) + fnmatch (exclusion):
+        - un motif d'inclusion sans '.' initial ne retient pas les fichiers caches
+        - un nom litteral est retenu meme s'il est cache
+        - la casse suit os.path.normcase (sensible sous Unix)
+    """
+    __slots__ = ("include_masks", "exclude_patterns",
+                 "_include_literals", "_include_regex", "_include_hidden_regex",
+                 "_exclude_literals", "_exclude_regex")
+
+    def __init__(self, include_masks: list, exclude_patterns: list):
+        self.include_masks = list(include_masks)
+        self.exclude_patterns = list(exclude_patterns or [])
+
+        include_literals, include_wild, include_hidden_wild = set(), [], []
+        for mask in self.include_masks:
+            mask = os.path.normcase(mask)
+            if not glob.has_magic(mask):
+                include_literals.add(mask)
+            elif mask.startswith('.'):
+                include_hidden_wild.append(mask)
+            else:
+                include_wild.append(mask)
+
+        exclude_literals, exclude_wild = set(), []
+        for pattern in self.exclude_patterns:
+            pattern = os.path.normcase(pattern)
+            if glob.has_magic(pattern):
+                exclude_wild.append(pattern)
+            else:
+                exclude_literals.add(pattern)
+
+        self._include_literals = frozenset(include_literals)
+        self._include_regex = self._compile(include_wild)
+        self._include_hidden_regex = self._compile(include_hidden_wild)
+        self._exclude_literals = frozenset(exclude_literals)
+        self._exclude_regex = self._compile(exclude_wild)
+
+    @staticmethod
+    def _compile(patterns: list):
+        if not patterns:
+            return None
+        return re.compile('|'.join('(?:%s)' % translate(pattern) for pattern in patterns))
+
+    def is_included(self, filename: str) -> bool:
+        name = os.path.normcase(filename)
+        if name in self._include_literals:
+            return True
+        if name.startswith('.'):
+            return self._include_hidden_regex is not None and self._include_hidden_regex.match(name) is not None
+        return self._include_regex is not None and self._include_regex.match(name) is not None
+
+    def is_excluded(self, filename: str) -> bool:
+        name = os.path.normcase(filename)
+        if name in self._exclude_literals:
+            return True
+        return self._exclude_regex is not None and self._exclude_regex.match(name) is not None
+
+    def select(self, entries: list) -> tuple:
+        """
+        Classe un listing [(nom, est_fichier, ...), ...] en une seule passe.
+
+        Retour:
+            (matched, excluded): entrees de listing retenues, noms inclus mais exclus
+        """
+        matched, excluded = [], []
+        for entry in entries:
+            name = entry[0]
+            if not self.is_included(name):
+                continue
+            if self.is_excluded(name):
+                excluded.append(name)
+                continue
+            if entry[1]:
+                matched.append(entry)
+        return matched, excluded
+
+    def classify(self, entries: list) -> tuple:
+        """
+        Retour:
+            (matched, excluded): noms de fichiers retenus, noms inclus mais exclus
+        """
+        matched, excluded = self.select(entries)
+        return [entry[0] for entry in matched], excluded
+# =============================================================================
 def compute_logical_key(filename: str) -> str:
     """
     Construit la cle logique utilisee pour detecter des doublons WAIT/DONE.
@@ -478,8 +1254,10 @@ def compute_logical_key(filename: str) -> str:
         logical_key = prefix + '.par.txt'
     return logical_key
 # =============================================================================
+@timed_phase('compare')
 def files_are_different_streaming(wait_path: str, done_path: str, chunk_size: int = 1024 * 1024) -> bool:
     try:
+        run_metrics.count(METRIC_STAT, 2)
         sw = os.path.getsize(wait_path)
         sd = os.path.getsize(done_path)
     except Exception:
@@ -489,10 +1267,12 @@ def files_are_different_streaming(wait_path: str, done_path: str, chunk_size: in
         return True
 
     try:
+        run_metrics.count(METRIC_OPEN, 2)
         with open(wait_path, 'rb') as fw, open(done_path, 'rb') as fd:
             while True:
                 bw = fw.read(chunk_size)
                 bd = fd.read(chunk_size)
+                run_metrics.count(METRIC_BYTES_COMPARED, len(bw) + len(bd))
                 if not bw and not bd:
                     return False
                 if bw != bd:
@@ -500,6 +1280,119 @@ def files_are_different_streaming(wait_path: str, done_path: str, chunk_size: in
     except Exception:
         return True
 # =============================================================================
+def hash_file_streaming(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Empreinte BLAKE2b (hex) du contenu du fichier, lu par blocs."""
+    digest = hashlib.blake2b(digest_size=FINGERPRINT_DIGEST_SIZE)
+    run_metrics.count(METRIC_OPEN)
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            run_metrics.count(METRIC_BYTES_COMPARED, len(chunk))
+            digest.update(chunk)
+    return digest.hexdigest()
+# =============================================================================
+class FingerprintStore:
+    """
+    Cache persistant des empreintes de contenu (--sync_mode checksum), indexe par
+    chemin et valide par la signature stat (taille, mtime, inode). Tant que la
+    signature d'un fichier est inchangee, son empreinte est reprise du cache sans
+    relire le fichier. Les fichiers supprimes par le run (doublons WAIT, purge)
+    sont retires du cache (forget / forget_directory).
+
+    Le cache est stocke en JSON sous le dossier date et n'est reecrit que s'il a
+    ete modifie pendant le run. Les compteurs hits/misses sont journalises en fin
+    de copie (log_stats).
+    """
+
+    def __init__(self, store_path: str):
+        self.store_path = store_path
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        try:
+            with open(self.store_path, 'r', encoding='utf-8') as store_file:
+                data = json.load(store_file)
+            if data.get("version") == FINGERPRINT_STORE_VERSION and isinstance(data.get("entries"), dict):
+                self.entries = data["entries"]
+        except FileNotFoundError:
+            pass
+        except Exception as error:
+            logger.debug('Cache empreintes illisible [%s] (%s)' % (self.store_path, str(error)))
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        tmp_path = self.store_path + ".tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as store_file:
+                json.dump({"version": FINGERPRINT_STORE_VERSION, "entries": self.entries}, store_file)
+            os.replace(tmp_path, self.store_path)
+            self._dirty = False
+        except Exception as error:
+            logger.debug('Ecriture cache empreintes impossible [%s] (%s)' % (self.store_path, str(error)))
+
+    @staticmethod
+    def signature(file_stat: os.stat_result) -> list:
+        return [file_stat.st_size, file_stat.st_mtime_ns, file_stat.st_ino]
+
+    def fingerprint(self, file_path: str, file_stat: os.stat_result) -> tuple:
+        """
+        Retour:
+            (digest, cached): empreinte du fichier, True si reprise du cache
+        """
+        signature = self.signature(file_stat)
+        with self._lock:
+            entry = self.entries.get(file_path)
+            if entry is not None and entry[:3] == signature:
+                self.hits += 1
+                return entry[3], True
+            self.misses += 1
+
+        digest = hash_file_streaming(file_path)
+        with self._lock:
+            self.entries[file_path] = signature + [digest]
+            self._dirty = True
+        return digest, False
+
+    def forget(self, file_path: str) -> None:
+        """Retire l'empreinte d'un fichier supprime par le run."""
+        with self._lock:
+            if self.entries.pop(file_path, None) is not None:
+                self._dirty = True
+
+    def forget_directory(self, directory: str) -> None:
+        """Retire les empreintes des fichiers d'un dossier purge."""
+        with self._lock:
+            forgotten = [file_path for file_path in self.entries if os.path.dirname(file_path) == directory]
+            for file_path in forgotten:
+                del self.entries[file_path]
+            if forgotten:
+                self._dirty = True
+
+    def log_stats(self) -> None:
+        logger.info('Cache empreintes: hits [%s] misses [%s]' % (self.hits, self.misses))
+# =============================================================================
+def open_fingerprint_store() -> FingerprintStore or None:
+    """Ouvre le cache d'empreintes du dossier date courant (None si desactive)."""
+    if not ENABLE_FINGERPRINT_STORE:
+        return None
+    _, base_dir = get_base_webdav_and_base_dir()
+    fingerprint_store = FingerprintStore(os.path.join(base_dir, FINGERPRINT_STORE_FILENAME))
+    fingerprint_store.load()
+    return fingerprint_store
+# =============================================================================
+def close_fingerprint_store(fingerprint_store: FingerprintStore or None) -> None:
+    if fingerprint_store is None:
+        return
+    fingerprint_store.log_stats()
+    fingerprint_store.save()
+# =============================================================================
 def get_base_webdav_and_base_dir() -> tuple:
     base_webdav = (param_webdav_path if param_webdav_path else WEBDAV_HOME)
     base_dir = os.path.join(base_webdav, param_date_traitement)
@@ -519,20 +1412,185 @@ def match_domain_destination(destination_dir: str) -> tuple:
 
     return None, None, None, None
 # =============================================================================
+def get_done_index_cache_path(done_dir: str) -> str:
+    return os.path.join(os.path.dirname(done_dir.rstrip("/")), DONE_INDEX_CACHE_FILENAME)
+# =============================================================================
+def load_done_index_cache(done_dir: str) -> dict or None:
+    """
+    Charge l'index DONE persistant associe a 'done_dir'. Retourne None si absent,
+    illisible ou d'une autre version.
+    """
+    cache_path = get_done_index_cache_path(done_dir)
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as cache_file:
+            cache = json.load(cache_file)
+    except FileNotFoundError:
+        return None
+    except Exception as error:
+        logger.debug('Index DONE persistant illisible [%s] (%s)' % (cache_path, str(error)))
+        return None
+    if not isinstance(cache, dict) or cache.get("version") != DONE_INDEX_CACHE_VERSION \
+            or not isinstance(cache.get("files"), dict):
+        return None
+    return cache
+# =============================================================================
+def save_done_index_cache(done_dir: str, dir_mtime_ns: int, done_files: dict) -> None:
+    """
+    Ecrit l'index DONE persistant (ecriture dans un fichier temporaire puis rename).
+    Un echec d'ecriture n'est pas bloquant: l'index sera reconstruit au prochain run.
+    """
+    cache_path = get_done_index_cache_path(done_dir)
+    cache = {
+        "version": DONE_INDEX_CACHE_VERSION,
+        "done_dir": done_dir,
+        "mtime_ns": dir_mtime_ns,
+        "saved_at_ns": time.time_ns(),
+        "entries": len(done_files),
+        "files": done_files,
+    }
+    tmp_path = cache_path + ".tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as cache_file:
+            json.dump(cache, cache_file)
+        os.replace(tmp_path, cache_path)
+    except Exception as error:
+        logger.debug('Ecriture index DONE persistant impossible [%s] (%s)' % (cache_path, str(error)))
+# =============================================================================
+@timed_phase('done_index')
 def build_done_index(done_dir: str) -> dict:
+    """
+    Construit l'index cle logique -> chemin des fichiers du dossier DONE.
+
+    Avec ENABLE_DONE_INDEX_CACHE, l'index est persiste a cote du dossier DONE
+    (nom de fichier -> cle logique, mtime et nombre d'entrees du dossier):
+        - mtime du dossier inchange: l'index stocke est reutilise sans listage
+        - sinon: listage du dossier, seules les cles des nouveaux fichiers sont
+          recalculees, les fichiers disparus sont retires, puis l'index est resauve
+    """
     done_index = {}
     try:
-        for done_file in os.listdir(done_dir):
-            done_path = os.path.join(done_dir, done_file)
-            if not os.path.isfile(done_path):
-                continue
-            key = compute_logical_key(done_file)
+        run_metrics.count(METRIC_STAT)
+        dir_mtime_ns = os.stat(done_dir).st_mtime_ns
+        cache = load_done_index_cache(done_dir) if ENABLE_DONE_INDEX_CACHE else None
+
+        if cache is not None and cache.get("mtime_ns") == dir_mtime_ns \
+                and cache.get("saved_at_ns", 0) - dir_mtime_ns > DONE_INDEX_MTIME_GUARD_NS:
+            done_files = cache["files"]
+            logger.debug('Index DONE reutilise [%s] [%s] entrees' % (done_dir, len(done_files)))
+        else:
+            known_files = cache["files"] if cache is not None else {}
+            done_files = {}
+            added = 0
+            run_metrics.count(METRIC_LISTDIR)
+            with os.scandir(done_dir) as scan:
+                for entry in scan:
+                    if not entry.is_file() or is_partial_transfer_name(entry.name):
+                        continue
+                    key = known_files.get(entry.name)
+                    if key is None:
+                        key = compute_logical_key(entry.name)
+                        added += 1
+                    done_files[entry.name] = key
+            if cache is not None:
+                logger.debug('Index DONE mis a jour [%s] ajouts [%s] suppressions [%s]'
+                             % (done_dir, added, len(set(known_files) - set(done_files))))
+            if ENABLE_DONE_INDEX_CACHE:
+                save_done_index_cache(done_dir, dir_mtime_ns, done_files)
+
+        for done_file, key in done_files.items():
             if key not in done_index:
-                done_index[key] = done_path
+                done_index[key] = os.path.join(done_dir, done_file)
     except Exception as error:
         logger.warning('Erreur indexation DONE [%s] (%s)' % (done_dir, str(error)))
     return done_index
 # =============================================================================
+class FileEntry:
+    """
+    Fichier source releve au scan du plan: nom et champs utiles du stat (taille,
+    mtime, inode, mode). Les attributs portent les noms de os.stat_result, une
+    FileEntry s'utilise donc a sa place (comparaison sync_mode, empreintes,
+    reprise des transferts partiels) sans nouvel appel systeme.
+    """
+    __slots__ = ("name", "st_size", "st_mtime_ns", "st_ino", "st_mode")
+
+    def __init__(self, name: str, file_stat: os.stat_result):
+        self.name = name
+        self.st_size = file_stat.st_size
+        self.st_mtime_ns = file_stat.st_mtime_ns
+        self.st_ino = file_stat.st_ino
+        self.st_mode = file_stat.st_mode
+
+    def __repr__(self) -> str:
+        return 'FileEntry(%r, size=%s, mtime_ns=%s)' % (self.name, self.st_size, self.st_mtime_ns)
+# =============================================================================
+def scan_file_entry(file_path: str, file_name: str, stat_function, file_entry_cache: dict):
+    """
+    FileEntry d'un fichier source, 'stat_function' n'etant appelee qu'une fois
+    par chemin (DirEntry.stat du listing ou os.stat). None si le fichier n'est
+    plus accessible: la copie refera alors son propre stat.
+    """
+    if file_path in file_entry_cache:
+        return file_entry_cache[file_path]
+    try:
+        run_metrics.count(METRIC_STAT)
+        file_entry = FileEntry(file_name, stat_function())
+    except OSError:
+        file_entry = None
+    file_entry_cache[file_path] = file_entry
+    return file_entry
+# =============================================================================
+def task_file_entry(copy_task, file_name: str):
+    # FileEntry du scan pour un fichier de la tache (None pour un plan dict / --plan_in)
+    file_entries = copy_task.get("file_entries")
+    if not file_entries:
+        return None
+    return file_entries.get(file_name)
+# =============================================================================
+class CopyTask:
+    """
+    Tache du plan de copie: dossier source, dossier destination, fichiers a
+    copier et drapeau purge. Representation compacte (__slots__) qui garde
+    l'acces par cle des plans dict (task["source"], task.get("purge")), utilise
+    par tout le code de copie, les plans --plan_in et les tests.
+    'file_entries' ({nom: FileEntry}) porte le stat releve au scan; il ne fait
+    pas partie de la representation dict (export, comparaison).
+    """
+    __slots__ = ("source", "destination", "files", "purge", "file_entries")
+
+    def __init__(self, source: str, destination: str, files: list, purge: bool = False,
+                 file_entries: dict = None):
+        self.source = source
+        self.destination = destination
+        self.files = files
+        self.purge = purge
+        self.file_entries = file_entries
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def as_dict(self) -> dict:
+        return {"source": self.source, "destination": self.destination,
+                "files": self.files, "purge": self.purge}
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, CopyTask):
+            other = other.as_dict()
+        return self.as_dict() == other
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return 'CopyTask(%r)' % self.as_dict()
+# =============================================================================
 def copy_task_priority(copy_task: dict) -> int:
     destination_path = copy_task.get("destination", "").replace("\\", "/")
     if "/DONE" in destination_path:
@@ -541,64 +1599,84 @@ def copy_task_priority(copy_task: dict) -> int:
         return 1
     return 2
 # =============================================================================
-def prepare_copy_plan_from_reference() -> tuple:
+def load_reference_mapping() -> tuple:
     """
-    Lit le CSV de reference, applique les regles de filtrage et construit une
-    liste d'instructions de copie (plan de copie) vers WebDAV.
+    Charge le CSV de reference (--ref_mapping) compile et retient les lignes du
+    mode courant (CLEVA par defaut, ou CLEVADSN si mode full).
 
     Retour:
-        (copy_plan, rc) :
-            copy_plan (list[dict]):
-        Une liste de dicts : [
-            {"source": ..., "destination": ..., "files": [...] , "purge": bool},
-            ...
-        ]
-        rc (int): code retour (RC_OK / RC_CONFIG_NOT_FOUND / RC_CONFIG_INVALID / RC_NOTHING_TO_DO)
+        (rows, rc): rows (list[MappingRow]), rc RC_OK / RC_CONFIG_NOT_FOUND / RC_CONFIG_INVALID
     """
     # Fichier de configuration (mapping) present
-    if not os.path.exists(param_ref_mapping_path):
+    if not path_exists(param_ref_mapping_path):
         logger.error('Fichier configuration introuvable [%s]' % param_ref_mapping_path)
         return [], RC_CONFIG_NOT_FOUND
 
-    try:
-        logger.info('Lecture fichier reference [%s]' % param_ref_mapping_path)
-        reference_df = pd.read_csv(param_ref_mapping_path, sep=";", dtype=str)
-        reference_df = reference_df.fillna('')
-        reference_df.columns = reference_df.columns.str.strip()
-    except Exception as error:
-        logger.error('Fichier reference invalide [%s] (%s)' % (param_ref_mapping_path, str(error)))
-        return [], RC_CONFIG_INVALID
-
-    # Colonnes obligatoires
-    required_cols = {PAR_FILE_TYPE, PAR_SOURCE_PATH, PAR_DESTINATION_PATH}
-    missing_req = [c for c in required_cols if c not in reference_df.columns]
-    if missing_req:
-        logger.error('Colonnes obligatoires manquantes dans le CSV [%s]' % ','.join(missing_req))
-        return [], RC_CONFIG_INVALID
+    logger.info('Lecture fichier reference [%s]' % param_ref_mapping_path)
+    mapping_rows, rc_mapping = load_compiled_mapping(param_ref_mapping_path)
+    if rc_mapping != RC_OK:
+        return [], rc_mapping
 
     # Selection par type (CLEVA par defaut, ou CLEVADSN si mode full)
     mode_full = (param_mode_copie.upper() == "CLEVADSN")
     rows = []
-    for _, row in reference_df.iterrows():
-        row_type = (row[PAR_FILE_TYPE] or '').strip().upper()
+    for row in mapping_rows:
         if mode_full:
-            if row_type != "CLEVADSN":
+            if row.row_type != "CLEVADSN":
                 continue
         else:
-            if row_type != MODE_COPY_PAR:
+            if row.row_type != MODE_COPY_PAR:
                 continue
         rows.append(row)
+    return rows, RC_OK
+# =============================================================================
+def mapping_destination_path(row: MappingRow) -> str:
+    """Chemin destination WebDAV d'une ligne de mapping pour la date plan courante."""
+    destination_base = param_webdav_path if param_webdav_path else WEBDAV_HOME
+    return os.path.join(
+        destination_base, param_date_traitement, row.destination
+    ).replace("\\", "/")
+# =============================================================================
+def iter_copy_plan_from_reference(listing_cache: dict = None, resolution_cache: dict = None,
+                                  mapping_rows: list = None):
+    """
+    Generateur du plan de copie: lit le CSV de reference, applique les regles de
+    filtrage et produit chaque tache (CopyTask) des que sa ligne CSV est resolue,
+    sans attendre les lignes suivantes ni materialiser le plan complet.
+    Le code retour est la valeur de retour du generateur (StopIteration.value).
 
-    # Colonnes dynamiques
-    prefix_columns = extract_header_columns(reference_df, base_name_header=PAR_PREFIX_BASE)
-    extension_columns = extract_header_columns(reference_df, base_name_header=PAR_EXTENSION_BASE)
-    exclude_prefix_columns = extract_header_columns(reference_df, base_name_header=PAR_EXCLUDE_PREFIX)
-
-    copy_plan = []
+    Parametres:
+        listing_cache (dict):    index des listings de dossiers source (cf. list_source_directory),
+                                 partageable entre plusieurs appels. Cree si absent.
+        resolution_cache (dict): dossiers source resolus par (source, date_policy)
+                                 (cf. resolve_source_directory). Cree si absent.
+        mapping_rows (list):     lignes deja chargees par load_reference_mapping (sinon lecture du CSV)
+
+    Produit:
+        CopyTask: {"source", "destination", "files", "purge"}, ordre des lignes CSV,
+                  avec le stat releve au scan de chaque fichier (file_entries)
+    Retour:
+        rc (int): RC_OK / RC_CONFIG_NOT_FOUND / RC_CONFIG_INVALID / RC_NOTHING_TO_DO
+    """
+    if mapping_rows is None:
+        mapping_rows, rc_mapping = load_reference_mapping()
+        if rc_mapping != RC_OK:
+            return rc_mapping
+    rows = mapping_rows
+
+    planned_tasks = 0
+    if listing_cache is None:
+        listing_cache = {}
+    listing_stats = {"listings": 0, "saved": 0}
+    if resolution_cache is None:
+        resolution_cache = {}
+    resolution_stats = {"resolutions": 0, "saved": 0, "fs_calls": 0, "fs_calls_saved": 0}
+    # stat des fichiers retenus, une fois par chemin pour tout le plan
+    file_entry_cache = {}
 
     # Construction du plan
     for row in rows:
-        file_type = (row[PAR_FILE_TYPE] or '').strip().upper()
+        file_type = row.row_type
 
         # Base source selon type
         if param_interface_path:
@@ -612,91 +1690,32 @@ def prepare_copy_plan_from_reference() -> tuple:
                 source_base = CLEVA_DATA_HOME
             else:
                 logger.error('Type fichier invalide [%s]' % file_type)
-                return [], RC_CONFIG_INVALID
+                return RC_CONFIG_INVALID
 
-        source_dir = (row[PAR_SOURCE_PATH] or '').strip()
-        destination_dir = (row[PAR_DESTINATION_PATH] or '').strip().lstrip("/")
+        source_dir = row.source
 
         source_path = os.path.join(source_base, source_dir)
+        destination_path = mapping_destination_path(row)
 
-        destination_base = param_webdav_path if param_webdav_path else WEBDAV_HOME
-        destination_path = os.path.join(
-            destination_base, param_date_traitement, destination_dir
-        ).replace("\\", "/")
-
-        if not os.path.exists(source_path):
+        # Existence + politique de date (dernier sous-dossier YYYYMMDD), resolues
+        # une seule fois par couple (source, date_policy)
+        source_exists, resolved_source_path = resolve_source_directory(
+            source_path, row.date_policy, resolution_cache, resolution_stats)
+        if not source_exists:
             logger.warning('Repertoire source introuvable [%s]' % source_path)
             # on ignore cette ligne et on continue a construire le plan
             continue
+        if resolved_source_path is None:
+            logger.debug('Ligne ignoree: aucun sous-dossier date sous [%s]' % source_path)
+            continue
+        source_path = resolved_source_path
 
-        # Extraction des valeurs dynamiques
-        prefixes = [
-            str(row[col]).strip()
-            for col in prefix_columns
-            if col in row and str(row[col]).strip()
-        ]
-        extensions = [
-            str(row[col]).strip()
-            for col in extension_columns
-            if col in row and str(row[col]).strip()
-        ]
-        exclude_prefixes = [
-            str(row[col]).strip()
-            for col in exclude_prefix_columns
-            if col in row and str(row[col]).strip()
-        ]
-
-        # Normalisation liste prefixes: déduplication et suppression du préfixe générique '*' s'il existe un préfixe plus spécifique
-        if prefixes:
-            normalized_prefixes = []
-            for p in prefixes:
-                if p not in normalized_prefixes:
-                    normalized_prefixes.append(p)
-            if '*' in normalized_prefixes and any(p != '*' for p in normalized_prefixes):
-                normalized_prefixes = [p for p in normalized_prefixes if p != '*']
-                logger.debug("Prefix '*' ignoré car d'autres prefixes spécifiques présents: %s" % normalized_prefixes)
-            prefixes = normalized_prefixes
-
-        # Politique de date: descendre dans le dernier sous-dossier YYYYMMDD
-        date_policy_value = ''
-        if DATE_POLICY in reference_df.columns:
-            raw_policy = row[DATE_POLICY]
-            if raw_policy is not None:
-                date_policy_value = str(raw_policy).strip().upper()
-
-        if date_policy_value == 'LATEST_YYYYMMDD':
-            logger.debug('Politique date latest_yyyymmdd active [%s]' % source_path)
-            latest_arch_dir = find_latest_yyyymmdd_subdir(source_path)
-            if latest_arch_dir is None:
-                logger.debug('Ligne ignoree: aucun sous-dossier date sous [%s]' % source_path)
-                continue
-            source_path = latest_arch_dir
-
-        # Construction des patterns depuis le referentiel CSV
-        filename_masks = []
-        if prefixes and extensions:
-            for prefix_value in prefixes:
-                for extension_value in extensions:
-                    filename_masks.append(prefix_value + extension_value)
-        elif not prefixes and extensions:
-            filename_masks = list(extensions)
-        elif prefixes and not extensions:
-            filename_masks = list(prefixes)
-
-        # Normalisation & déduplication des patterns (suppression doublons et multi-*)
-        if filename_masks:
-            cleaned = []
-            seen = set()
-            for raw in filename_masks:
-                # remplace suites de * par un seul * (ex: '**.par' -> '*.par')
-                norm = re.sub(r'\*{2,}', '*', raw)
-                if norm not in seen:
-                    seen.add(norm)
-                    cleaned.append(norm)
-            if len(cleaned) != len(filename_masks):
-                logger.debug(
-                    'Patterns normalisés/dédupliqués de %s à %s: %s' % (len(filename_masks), len(cleaned), cleaned))
-            filename_masks = cleaned
+        exclude_prefixes = row.exclude_prefixes
+
+        # Masques et matcher precompiles (cf. compile_mapping_row)
+        filename_masks = row.filename_masks
+        basename_masks = row.basename_masks
+        matcher = row.matcher
 
         if not filename_masks:
             logger.debug('Aucun pattern pour [%s], ligne ignoree' % source_path)
@@ -712,27 +1731,37 @@ def prepare_copy_plan_from_reference() -> tuple:
                     str(len(filename_masks)), str(filename_masks),
                     str(len(excludes)), str(excludes))
 
-        # Recherche des fichiers correspondants
+        # Recherche des fichiers correspondants: listing du dossier source mutualise,
+        # classe en une passe par le matcher compile de la ligne
+        matched_entries, excluded_names = [], []
+        if basename_masks:
+            source_entries = list_source_directory(source_path, listing_cache, listing_stats)
+            matched_entries, excluded_names = matcher.select(source_entries)
+        for excluded_name in excluded_names:
+            logger.debug('Exclusion du fichier [%s] par motif [%s]'
+                         % (os.path.join(source_path, excluded_name), str(exclude_prefixes)))
         matched_fullpaths = set()
+        file_entries = {}
+        for name, _, dir_entry in matched_entries:
+            file_path = os.path.join(source_path, name)
+            matched_fullpaths.add(file_path)
+            file_entries[name] = scan_file_entry(file_path, name, dir_entry.stat, file_entry_cache)
+
+        # Motif avec sous-dossier: non couvert par l'index, recherche directe
         for filename_mask in filename_masks:
-            filename_paths = os.path.join(source_path, filename_mask)
-            for filename_path in glob.glob(filename_paths):
-                base_filename = os.path.basename(filename_path)
-                if exclude_prefixes:
-                    exclude_matched = False
-                    for exclude_prefix in exclude_prefixes:
-                        if fnmatch(base_filename, exclude_prefix):
-                            exclude_matched = True
-                            break
-                    if exclude_matched:
-                        logger.debug(
-                            'Exclusion du fichier [%s] par motif [%s]' % (filename_path, str(exclude_prefixes)))
-                        continue
-                try:
-                    if os.path.isfile(filename_path):
-                        matched_fullpaths.add(filename_path)
-                except Exception as error:
-                    logger.warning('Erreur sur motif_fichier [%s] (%s)' % (filename_path, str(error)))
+            if filename_mask in basename_masks:
+                continue
+            run_metrics.count(METRIC_LISTDIR)
+            for filename_path in glob.glob(os.path.join(source_path, filename_mask)):
+                if matcher.is_excluded(os.path.basename(filename_path)):
+                    logger.debug('Exclusion du fichier [%s] par motif [%s]' % (filename_path, str(exclude_prefixes)))
+                    continue
+                file_name = os.path.basename(filename_path)
+                file_entry = scan_file_entry(filename_path, file_name,
+                                             functools.partial(os.stat, filename_path), file_entry_cache)
+                if file_entry is not None and stat.S_ISREG(file_entry.st_mode):
+                    matched_fullpaths.add(filename_path)
+                    file_entries[file_name] = file_entry
 
         if not matched_fullpaths:
             logger.info('Aucun fichier a copier depuis [%s]' % source_path)
@@ -743,31 +1772,632 @@ def prepare_copy_plan_from_reference() -> tuple:
         logger.info('Pret a copier %s fichiers dest[%s]' % (str(len(matching_files)),
                                                              destination_path[destination_path.find('/tech'):]))
 
-        purge_flag = False
-        if PAR_PURGE in reference_df.columns:
-            purge_value = (row[PAR_PURGE] or '').strip().upper()
-            purge_flag = (purge_value == 'YES')
+        purge_flag = row.purge
+
+        planned_tasks += 1
+        yield CopyTask(source_path, destination_path, matching_files, purge_flag,
+                       file_entries={name: file_entries.get(name) for name in matching_files})
+
+    logger.info('Index repertoires source: [%s] listing(s), [%s] listing(s) evite(s)'
+                % (listing_stats["listings"], listing_stats["saved"]))
+    logger.info('Resolution repertoires source: [%s] resolution(s), [%s] evitee(s), '
+                '[%s] appel(s) systeme de fichiers evite(s)'
+                % (resolution_stats["resolutions"], resolution_stats["saved"],
+                   resolution_stats["fs_calls_saved"] + listing_stats["saved"]))
+
+    if not planned_tasks:
+        return RC_NOTHING_TO_DO
+    return RC_OK
+# =============================================================================
+@timed_phase('plan')
+def prepare_copy_plan_from_reference(listing_cache: dict = None, resolution_cache: dict = None,
+                                     mapping_rows: list = None) -> tuple:
+    """
+    Plan de copie complet (liste), construit par iter_copy_plan_from_reference.
+
+    Retour:
+        (copy_plan, rc) :
+            copy_plan (list[CopyTask]): taches {"source", "destination", "files", "purge"}
+            rc (int): code retour (RC_OK / RC_CONFIG_NOT_FOUND / RC_CONFIG_INVALID / RC_NOTHING_TO_DO)
+    """
+    copy_plan = []
+    plan_stream = iter_copy_plan_from_reference(listing_cache, resolution_cache, mapping_rows)
+    while True:
+        try:
+            copy_plan.append(next(plan_stream))
+        except StopIteration as stop:
+            rc = stop.value
+            break
+    if rc != RC_OK:
+        return [], rc
+
+    logger.debug('Plan copie genere:\n%s' % pprint.pformat([copy_task.as_dict() for copy_task in copy_plan]))
+    return copy_plan, RC_OK
+# =============================================================================
+_zero_copy_unsupported = set()  # (methode, dev source, dev destination) sans support noyau
+# =============================================================================
+def _copy_with_copy_file_range(fd_src: int, fd_dst: int, offset: int, size: int) -> int:
+    while offset < size:
+        copied = os.copy_file_range(fd_src, fd_dst, size - offset, offset, offset)
+        if copied == 0:
+            break
+        offset += copied
+    return offset
+# =============================================================================
+def _copy_with_sendfile(fd_src: int, fd_dst: int, offset: int, size: int) -> int:
+    os.lseek(fd_dst, offset, os.SEEK_SET)
+    while offset < size:
+        sent = os.sendfile(fd_dst, fd_src, offset, size - offset)
+        if sent == 0:
+            break
+        offset += sent
+    return offset
+# =============================================================================
+def _copy_with_buffer(fd_src: int, fd_dst: int, offset: int, buffer_size: int) -> int:
+    os.lseek(fd_src, offset, os.SEEK_SET)
+    os.lseek(fd_dst, offset, os.SEEK_SET)
+    while True:
+        chunk = os.read(fd_src, buffer_size)
+        if not chunk:
+            break
+        view = memoryview(chunk)
+        while view:
+            written = os.write(fd_dst, view)
+            view = view[written:]
+        offset += len(chunk)
+    return offset
+# =============================================================================
+def copy_file_fast(source_path: str, destination_path: str, buffer_size: int = None,
+                   resume_offset: int = 0) -> tuple:
+    """
+    Copie 'source_path' vers 'destination_path' puis reporte les metadonnees
+    (equivalent shutil.copy2). La copie utilise, par ordre de preference:
+        - os.copy_file_range : copie cote noyau (voire cote serveur NFS 4.2)
+        - os.sendfile        : copie noyau sans passage par un buffer Python
+        - lecture/ecriture bufferisee de 'buffer_size' octets (param_copy_buffer_size)
+    Une methode refusee par le noyau (errno ZERO_COPY_UNSUPPORTED_ERRNOS) est
+    memorisee pour le couple de peripheriques source/destination et la copie
+    reprend a l'offset atteint avec la methode suivante.
+
+    Avec 'resume_offset' > 0, 'destination_path' existant est conserve jusqu'a cet
+    offset et la copie reprend a partir de la (reprise d'un transfert partiel).
+
+    Retour:
+        (copied_bytes, method): taille finale du fichier et derniere methode utilisee
+    """
+    if buffer_size is None:
+        buffer_size = param_copy_buffer_size
+
+    run_metrics.count(METRIC_OPEN, 2)
+    with open(source_path, 'rb') as fsrc, open(destination_path, 'r+b' if resume_offset else 'wb') as fdst:
+        fd_src, fd_dst = fsrc.fileno(), fdst.fileno()
+        if resume_offset:
+            os.ftruncate(fd_dst, resume_offset)
+        src_stat = os.fstat(fd_src)
+        devices = (src_stat.st_dev, os.fstat(fd_dst).st_dev)
+        size = src_stat.st_size
+        offset = resume_offset
+        method = COPY_METHOD_BUFFERED
+
+        if ENABLE_ZERO_COPY and size > 0:
+            for method_name, copy_func, available in (
+                    (COPY_METHOD_COPY_FILE_RANGE, _copy_with_copy_file_range, hasattr(os, 'copy_file_range')),
+                    (COPY_METHOD_SENDFILE, _copy_with_sendfile, hasattr(os, 'sendfile'))):
+                if not available or (method_name,) + devices in _zero_copy_unsupported:
+                    continue
+                try:
+                    offset = copy_func(fd_src, fd_dst, offset, size)
+                    method = method_name
+                    break
+                except OSError as error:
+                    if error.errno not in ZERO_COPY_UNSUPPORTED_ERRNOS:
+                        raise
+                    _zero_copy_unsupported.add((method_name,) + devices)
+                    # reprise a l'offset reellement ecrit
+                    offset = os.fstat(fd_dst).st_size
+
+        if method == COPY_METHOD_BUFFERED or offset < size:
+            # Repli bufferise (ou fin de fichier non couverte par la copie noyau)
+            offset = _copy_with_buffer(fd_src, fd_dst, offset, buffer_size)
+
+    shutil.copystat(source_path, destination_path)
+    return offset, method
+# =============================================================================
+def partial_transfer_name(destination_filename: str) -> str:
+    return PARTIAL_TRANSFER_PREFIX + destination_filename + PARTIAL_TRANSFER_SUFFIX
+# =============================================================================
+def is_partial_transfer_name(filename: str) -> bool:
+    return filename.startswith(PARTIAL_TRANSFER_PREFIX) and filename.endswith(PARTIAL_TRANSFER_SUFFIX)
+# =============================================================================
+def find_partial_transfers(destination_dir: str) -> set:
+    """Noms des transferts partiels ('.<nom>.part') presents dans 'destination_dir'."""
+    partial_names = set()
+    try:
+        run_metrics.count(METRIC_LISTDIR)
+        with os.scandir(destination_dir) as scan:
+            for entry in scan:
+                if is_partial_transfer_name(entry.name) and entry.is_file():
+                    partial_names.add(entry.name)
+    except Exception as error:
+        logger.warning('Erreur recherche transferts partiels [%s] (%s)' % (destination_dir, str(error)))
+    return partial_names
+# =============================================================================
+def copy_file_atomic(source_path: str, destination_path: str, resume_partial: bool = False,
+                     source_stat=None) -> tuple:
+    """
+    Copie 'source_path' vers 'destination_path' sans jamais exposer de fichier
+    tronque: ecriture dans '.<nom>.part' du meme dossier puis os.replace.
+    Un arret brutal ne laisse donc que le fichier .part, jamais le nom final.
+
+    Avec 'resume_partial', un .part laisse par un run precedent est repris a
+    partir de sa taille s'il est plus court que la source et posterieur a la
+    derniere modification de la source; sinon il est recopie depuis le debut.
+    'source_stat' (os.stat_result / FileEntry du scan) evite de relire le stat source.
+
+    Retour:
+        (copied_bytes, method, resumed_bytes)
+    """
+    destination_dir, destination_filename = os.path.split(destination_path)
+    partial_path = os.path.join(destination_dir, partial_transfer_name(destination_filename))
+
+    resume_offset = 0
+    if resume_partial:
+        try:
+            run_metrics.count(METRIC_STAT)
+            partial_stat = os.stat(partial_path)
+            if source_stat is None:
+                run_metrics.count(METRIC_STAT)
+                source_stat = os.stat(source_path)
+            if partial_stat.st_size < source_stat.st_size \
+                    and partial_stat.st_mtime_ns >= source_stat.st_mtime_ns:
+                resume_offset = partial_stat.st_size
+        except FileNotFoundError:
+            pass
+
+    copied_bytes, method = copy_file_fast(source_path, partial_path, resume_offset=resume_offset)
+    os.replace(partial_path, destination_path)
+    return copied_bytes, method, resume_offset
+# =============================================================================
+def cleanup_partial_transfers(run_context) -> None:
+    """
+    Supprime les transferts partiels d'un run precedent qui n'ont pas ete repris
+    (fichier deja present, source disparue...). Non bloquant en cas d'erreur.
+    """
+    removed = 0
+    for destination_dir, partial_names in run_context.partial_transfers.items():
+        for partial_name in sorted(partial_names):
+            partial_path = os.path.join(destination_dir, partial_name)
+            try:
+                os.remove(partial_path)
+                removed += 1
+                logger.info('Nettoyage transfert partiel [%s]' % partial_path)
+            except FileNotFoundError:
+                pass
+            except Exception as error:
+                logger.warning('Erreur suppression transfert partiel [%s] (%s)' % (partial_path, str(error)))
+        partial_names.clear()
+    if removed or run_context.resumed_transfers:
+        logger.info('Transferts partiels: repris [%s] nettoyes [%s]' % (run_context.resumed_transfers, removed))
+# =============================================================================
+class CopyRunContext:
+    """
+    Etat partage d'un run de copie, sequentiel ou parallele: index DONE,
+    destinations purgees, cache d'empreintes, transferts partiels trouves par
+    destination et debits par destination.
+    Les mises a jour concurrentes passent par 'lock'.
+    """
+
+    def __init__(self, fingerprint_store: FingerprintStore = None):
+        self.done_index_cache = {}
+        self.purged_destinations = set()
+        self.fingerprint_store = fingerprint_store
+        self.partial_transfers = {}
+        self.resumed_transfers = 0
+        self.updated_files = 0
+        self.transfer_stats = {}
+        self.lock = threading.Lock()
+
+    def take_partial_transfer(self, destination_dir: str, destination_filename: str) -> bool:
+        """True si un transfert partiel existait pour ce fichier (retire de la liste a nettoyer)."""
+        partial_name = partial_transfer_name(destination_filename)
+        with self.lock:
+            partial_names = self.partial_transfers.get(destination_dir)
+            if partial_names and partial_name in partial_names:
+                partial_names.discard(partial_name)
+                return True
+        return False
+
+    def record_transfer(self, destination_dir: str, copied_bytes: int, elapsed: float) -> None:
+        run_metrics.count(METRIC_FILES_COPIED)
+        run_metrics.count(METRIC_BYTES_COPIED, copied_bytes)
+        with self.lock:
+            stats = self.transfer_stats.setdefault(destination_dir, {"files": 0, "bytes": 0, "seconds": 0.0})
+            stats["files"] += 1
+            stats["bytes"] += copied_bytes
+            stats["seconds"] += elapsed
+
+    def log_transfer_stats(self) -> None:
+        for destination_dir, stats in self.transfer_stats.items():
+            logger.info('Debit destination [%s] fichiers [%s] octets [%s] duree [%.3fs] debit [%s]'
+                        % (destination_dir, stats["files"], stats["bytes"], stats["seconds"],
+                           format_throughput(stats["bytes"], stats["seconds"])))
+# =============================================================================
+def format_throughput(copied_bytes: int, elapsed: float) -> str:
+    if elapsed <= 0:
+        return 'n/a'
+    return '%.2f Mo/s' % (copied_bytes / elapsed / (1024 * 1024))
+# =============================================================================
+def export_copy_plan(copy_plan: list, plan_path: str) -> int:
+    """
+    Ecrit le plan de copie resolu en JSON: sources, destinations, drapeau purge
+    et fichiers avec leur taille au moment du scan. Un plan vide est ecrit aussi,
+    pour que l'execution differee (--plan_in) retourne RC_NOTHING_TO_DO.
 
-        copy_plan.append({
-            "source": source_path,
-            "destination": destination_path,
-            "files": matching_files,
-            "purge": purge_flag
+    Retour:
+        int: RC_OK / RC_RUNTIME_ERROR
+    """
+    tasks = []
+    total_files = 0
+    for task in copy_plan:
+        files = []
+        for file_name in task["files"]:
+            file_entry = task_file_entry(task, file_name)
+            if file_entry is not None:
+                file_size = file_entry.st_size
+            else:
+                try:
+                    file_size = os.stat(os.path.join(task["source"], file_name)).st_size
+                except OSError:
+                    file_size = None
+            files.append({"name": file_name, "size": file_size})
+        total_files += len(files)
+        tasks.append({
+            "source": task["source"],
+            "destination": task["destination"],
+            "purge": bool(task["purge"]),
+            "files": files,
         })
 
+    plan_document = {
+        "version": PLAN_FILE_VERSION,
+        "program": THIS_PROGRAM,
+        "generated_at": datetime.now().isoformat(timespec='seconds'),
+        "date_plan": param_date_traitement,
+        "mode_copie": param_mode_copie or MODE_COPY_PAR,
+        "ref_mapping": param_ref_mapping_path,
+        "tasks": tasks,
+    }
+    tmp_path = plan_path + ".tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as plan_file:
+            json.dump(plan_document, plan_file, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, plan_path)
+    except Exception as error:
+        logger.error('Ecriture plan JSON impossible [%s] (%s)' % (plan_path, str(error)))
+        return RC_RUNTIME_ERROR
+
+    logger.info('Plan JSON ecrit [%s] taches [%s] fichiers [%s]' % (plan_path, len(tasks), total_files))
+    return RC_OK
+# =============================================================================
+def load_copy_plan(plan_path: str) -> tuple:
+    """
+    Relit un plan JSON produit par export_copy_plan. La date plan du fichier doit
+    correspondre a -d (les destinations contiennent la date).
+
+    Retour:
+        (copy_plan, rc): meme format que prepare_copy_plan_from_reference
+    """
+    if not path_exists(plan_path):
+        logger.error('Plan JSON introuvable [%s]' % plan_path)
+        return [], RC_CONFIG_NOT_FOUND
+
+    try:
+        with open(plan_path, 'r', encoding='utf-8') as plan_file:
+            plan_document = json.load(plan_file)
+        if plan_document.get("version") != PLAN_FILE_VERSION:
+            raise ValueError('version [%s] non supportee' % plan_document.get("version"))
+        copy_plan = [CopyTask(
+            task["source"],
+            task["destination"],
+            [file_entry["name"] for file_entry in task["files"]],
+            bool(task.get("purge", False)),
+        ) for task in plan_document["tasks"]]
+    except Exception as error:
+        logger.error('Plan JSON invalide [%s] (%s)' % (plan_path, str(error)))
+        return [], RC_CONFIG_INVALID
+
+    if plan_document.get("date_plan") != param_date_traitement:
+        logger.error('Plan JSON date [%s] differente de la date plan [%s]'
+                     % (plan_document.get("date_plan"), param_date_traitement))
+        return [], RC_CONFIG_INVALID
+
+    logger.info('Plan JSON charge [%s] genere le [%s] taches [%s]'
+                % (plan_path, plan_document.get("generated_at"), len(copy_plan)))
     if not copy_plan:
         return [], RC_NOTHING_TO_DO
-
-    logger.debug('Plan copie genere:\n%s' % pprint.pformat(copy_plan))
     return copy_plan, RC_OK
 # =============================================================================
-def copy_files_to_webdav(copy_plan: list) -> tuple:
+def destination_filename_for(file_name: str) -> str:
+    """
+    Nom du fichier en destination: ajout de l'extension .txt si le fichier
+    source n'est pas deja en .txt.
+    """
+    if file_name.lower().endswith(".txt"):
+        return file_name
+    return file_name + ".txt"
+# =============================================================================
+def destination_needs_update(source_path: str, destination_path: str, destination_stat: os.stat_result,
+                             sync_mode: str, run_context: CopyRunContext, source_stat=None) -> bool:
+    """
+    Decide si un fichier deja present en destination doit etre recopie.
+        - exists   : jamais (skip des qu'il existe)
+        - stat     : taille differente ou mtime ecarte de plus de SYNC_MTIME_TOLERANCE_NS
+        - checksum : comme stat, puis confirmation par empreinte du contenu. Si le
+                     contenu est identique, seul le mtime destination est realigne
+                     (le prochain run s'arrete a la comparaison stat)
+    'source_stat' (FileEntry du scan) evite de relire le stat source.
+    """
+    if sync_mode == SYNC_MODE_EXISTS:
+        return False
+
+    if source_stat is None:
+        run_metrics.count(METRIC_STAT)
+        source_stat = os.stat(source_path)
+    if source_stat.st_size != destination_stat.st_size:
+        return True
+    if abs(source_stat.st_mtime_ns - destination_stat.st_mtime_ns) <= SYNC_MTIME_TOLERANCE_NS:
+        return False
+    if sync_mode == SYNC_MODE_STAT:
+        return True
+
+    fingerprint_store = run_context.fingerprint_store
+    if fingerprint_store is not None:
+        source_digest, _ = fingerprint_store.fingerprint(source_path, source_stat)
+        destination_digest, _ = fingerprint_store.fingerprint(destination_path, destination_stat)
+    else:
+        source_digest = hash_file_streaming(source_path)
+        destination_digest = hash_file_streaming(destination_path)
+    if source_digest != destination_digest:
+        return True
+
+    shutil.copystat(source_path, destination_path)
+    return False
+# =============================================================================
+def copy_plan_file(source_dir: str,
+                   destination_dir: str,
+                   file_name: str,
+                   kind: str,
+                   done_dir: str,
+                   run_context: CopyRunContext,
+                   source_entry: FileEntry = None) -> tuple:
+    """
+    Copie un fichier du plan vers sa destination en appliquant la politique
+    WAIT/DONE et la copie incrementale (cf. destination_needs_update). Utilisee par la copie sequentielle et
+    par la copie parallele (--workers).
+
+    Parametres:
+        source_dir (str):          dossier source de la tache
+        destination_dir (str):     dossier destination de la tache
+        file_name (str):           nom du fichier source
+        kind (str):                'WAIT' / 'DONE' / None (cf. match_domain_destination)
+        done_dir (str):            dossier DONE du domaine, ou None
+        run_context (CopyRunContext): etat partage du run (index DONE, purges,
+                                   cache d'empreintes, debits)
+        source_entry (FileEntry):  stat source releve au scan, ou None (stat a la copie)
+
+    Retour:
+        (status, source_path, destination_path):
+            status (str): COPY_STATUS_COPIED / COPY_STATUS_SKIPPED / COPY_STATUS_ERROR
+    """
+    source_path = os.path.join(source_dir, file_name)
+    destination_filename = destination_filename_for(file_name)
+
+    # Renommage optionnel (desactive par defaut)
+    if ENABLE_RENAME:
+        destination_filename = resolve_duplicate_name(
+            destination_dir=destination_dir,
+            dest_filename=destination_filename,
+            purged_destinations=run_context.purged_destinations,
+            relance_tag="-Doublon",
+            allow_sequence=True
+        )
+
+    destination_path = os.path.join(destination_dir, destination_filename)
+
+    # Variables pour le log
+    short_source = os.path.basename(source_path)
+    short_dest = destination_dir.split('/batchs', 1)[-1] if '/batchs' in destination_dir else destination_dir
+
+    # WAIT policy: if key exists in DONE, compare (if WAIT exists), log info if different, remove WAIT, skip copy
+    if kind == "WAIT" and done_dir and path_exists(done_dir):
+        done_index = run_context.done_index_cache.get(done_dir, {})
+        key = compute_logical_key(os.path.basename(destination_path))
+        done_equiv_path = done_index.get(key)
+
+        if done_equiv_path:
+            if path_exists(destination_path):
+                # Comparaison unique par couple (le WAIT est supprime ensuite): lecture en flux,
+                # arret au premier bloc different
+                is_diff = files_are_different_streaming(destination_path, done_equiv_path)
+                if is_diff:
+                    logger.info(
+                        'Doublon avec contenu different WAIT[%s] DONE[%s]',
+                        os.path.basename(destination_path), os.path.basename(done_equiv_path)
+                    )
+                try:
+                    os.remove(destination_path)
+                    if run_context.fingerprint_store is not None:
+                        run_context.fingerprint_store.forget(destination_path)
+                    logger.info('Netoyage doublon WAIT [%s]',
+                                os.path.basename(destination_path))
+                except Exception as error:
+                    logger.error('Erreur suppression fichier WAIT [%s] (%s)', destination_path, str(error))
+                    return COPY_STATUS_ERROR, source_path, destination_path
+
+            logger.debug('[SKIP] Fichier deja present en DONE/WAIT [%s]', short_source)
+            run_metrics.count(METRIC_FILES_SKIPPED)
+            return COPY_STATUS_SKIPPED, source_path, destination_path
+
+    # Copie incrementale: skip si existe et a jour selon --sync_mode
+    try:
+        try:
+            run_metrics.count(METRIC_STAT)
+            destination_stat = os.stat(destination_path)
+        except FileNotFoundError:
+            destination_stat = None
+
+        if destination_stat is not None:
+            if not destination_needs_update(source_path, destination_path, destination_stat,
+                                            param_sync_mode, run_context, source_stat=source_entry):
+                logger.debug('[SKIP] Source [%s] deja present destination [%s]', short_source, short_dest)
+                run_metrics.count(METRIC_FILES_SKIPPED)
+                return COPY_STATUS_SKIPPED, source_path, destination_path
+            with run_context.lock:
+                run_context.updated_files += 1
+            logger.info('Mise a jour fichier modifie [%s] dest [%s]', short_source, short_dest)
+
+        resume_partial = run_context.take_partial_transfer(destination_dir, destination_filename)
+        start_time = time.perf_counter()
+        copied_bytes, copy_method, resumed_bytes = copy_file_atomic(
+            source_path, destination_path, resume_partial=resume_partial, source_stat=source_entry)
+        elapsed = time.perf_counter() - start_time
+        run_context.record_transfer(destination_dir, copied_bytes - resumed_bytes, elapsed)
+        if resumed_bytes:
+            with run_context.lock:
+                run_context.resumed_transfers += 1
+            logger.info('Reprise transfert partiel [%s] a l\'offset [%s]', short_source, resumed_bytes)
+        logger.debug('Debit copie [%s] octets [%s] duree [%.3fs] debit [%s] methode [%s]',
+                     short_source, copied_bytes - resumed_bytes, elapsed,
+                     format_throughput(copied_bytes - resumed_bytes, elapsed), copy_method)
+
+        if kind == "DONE" and done_dir and done_dir in run_context.done_index_cache:
+            key = compute_logical_key(os.path.basename(destination_path))
+            with run_context.lock:
+                if key not in run_context.done_index_cache[done_dir]:
+                    run_context.done_index_cache[done_dir][key] = destination_path
+
+    except Exception as error:
+        logger.error('Echec copie [%s] (%s)' % (source_path, str(error)))
+        return COPY_STATUS_ERROR, source_path, destination_path
+
+    return COPY_STATUS_COPIED, source_path, destination_path
+# =============================================================================
+def prepare_destination_dir(destination_dir: str, run_context: CopyRunContext) -> tuple:
+    """
+    Cree le dossier destination si besoin, releve les transferts partiels
+    laisses par un run precedent et indexe le DONE du domaine (une seule fois
+    par dossier).
+
+    Retour:
+        (ok, kind, done_dir): ok=False si la creation du dossier a echoue
+    """
+    try:
+        if not path_exists(destination_dir):
+            os.makedirs(destination_dir, exist_ok=True)
+            logger.info('Creation repertoire [%s]' % destination_dir)
+    except Exception as error:
+        logger.error('Erreur creation repertoire [%s] (%s)' % (destination_dir, str(error)))
+        return False, None, None
+
+    if destination_dir not in run_context.partial_transfers:
+        run_context.partial_transfers[destination_dir] = find_partial_transfers(destination_dir)
+
+    domain, kind, wait_dir, done_dir = match_domain_destination(destination_dir)
+
+    done_index_cache = run_context.done_index_cache
+    if done_dir and done_dir not in done_index_cache and path_exists(done_dir):
+        done_index_cache[done_dir] = build_done_index(done_dir)
+
+    return True, kind, done_dir
+# =============================================================================
+def purge_destination_dir(destination_dir: str, dry_run: bool) -> tuple:
+    """
+    Supprime les fichiers (pas les sous-dossiers) de 'destination_dir' en une
+    seule passe os.scandir. En dry-run, les fichiers sont seulement journalises.
+
+    Retour:
+        (ok, deleted_count, deleted_bytes): ok=False au premier echec de suppression
+    """
+    deleted_count = 0
+    deleted_bytes = 0
+    try:
+        run_metrics.count(METRIC_LISTDIR)
+        with os.scandir(destination_dir) as scan:
+            for entry in scan:
+                if entry.is_dir(follow_symlinks=False):
+                    continue
+                file_size = entry.stat(follow_symlinks=False).st_size
+                if dry_run:
+                    logger.info('[DRY-RUN] Purge [%s] (%s octets)' % (entry.path, file_size))
+                else:
+                    os.remove(entry.path)
+                    logger.debug('Purge [%s]' % entry.path)
+                deleted_count += 1
+                deleted_bytes += file_size
+    except FileNotFoundError:
+        # Destination pas encore creee: rien a purger
+        pass
+    except Exception as error:
+        logger.error('Erreur purge repertoire [%s] (%s)' % (destination_dir, str(error)))
+        return False, deleted_count, deleted_bytes
+    return True, deleted_count, deleted_bytes
+# =============================================================================
+@timed_phase('purge')
+def purge_destinations(copy_plan: list, run_context: CopyRunContext, workers: int, dry_run: bool) -> int:
+    """
+    Phase de purge (colonne purge=YES), executee avant toute copie:
+        - une seule purge par dossier destination, meme si plusieurs lignes le ciblent
+        - destinations purgees en parallele (au plus 'workers' a la fois)
+        - dossiers purges ajoutes a run_context.purged_destinations (cf. resolve_duplicate_name)
+
+    Retour:
+        int: RC_OK, ou RC_RUNTIME_ERROR au premier echec de suppression
+    """
+    destinations = []
+    for task in copy_plan:
+        if task["purge"] and task["destination"] not in destinations:
+            destinations.append(task["destination"])
+    if not destinations:
+        return RC_OK
+
+    logger.info('Debut purge de [%s] repertoire(s) destination%s'
+                % (len(destinations), ' (dry-run)' if dry_run else ''))
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(destinations)))) as executor:
+        futures = {executor.submit(purge_destination_dir, destination_dir, dry_run): destination_dir
+                   for destination_dir in destinations}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+
+    total_count, total_bytes, rc = 0, 0, RC_OK
+    for destination_dir in destinations:
+        ok, deleted_count, deleted_bytes = results[destination_dir]
+        total_count += deleted_count
+        total_bytes += deleted_bytes
+        logger.info('Purge [%s] fichiers [%s] octets [%s]' % (destination_dir, deleted_count, deleted_bytes))
+        if not dry_run and run_context.fingerprint_store is not None:
+            run_context.fingerprint_store.forget_directory(destination_dir)
+        if not ok:
+            rc = RC_RUNTIME_ERROR
+        elif not dry_run:
+            run_context.purged_destinations.add(destination_dir)
+
+    logger.info('Fin purge: fichiers %s [%s] octets [%s]'
+                % ('a supprimer' if dry_run else 'supprimes', total_count, total_bytes))
+    return rc
+# =============================================================================
+@timed_phase('copy')
+def copy_files_to_webdav(copy_plan: list, workers: int = None, dry_run: bool = None) -> tuple:
     """
     Execute la copie selon le plan fourni. Purge eventuelle, puis copie des fichiers
     Arrete au premier echec critique et renvoie un code d'erreur
 
     Parametres:
-        copy_plan (list[dict]): liste des taches {"source","destination","files","purge"}
+        copy_plan (list[CopyTask | dict]): liste des taches {"source","destination","files","purge"}
+        workers (int):          copies simultanees (defaut: param_workers). Au-dela de 1,
+                                la copie est deleguee a copy_files_to_webdav_parallel
+        dry_run (bool):         simulation (defaut: param_dry_run): purge journalisee,
+                                aucune suppression ni copie, retour RC_OK
 
     Retour:
         (final_total, rc):
@@ -775,111 +2405,80 @@ def copy_files_to_webdav(copy_plan: list) -> tuple:
             rc (int): RC_OK / RC_NOTHING_TO_DO / RC_RUNTIME_ERROR
     Effets de bord:
         - Creation des dossiers destination si absents
-        - Purge de fichiers dans la destination si demande
+        - Purge de fichiers dans la destination si demande (cf. purge_destinations)
+        - Mise a jour du cache d'empreintes --sync_mode checksum (ENABLE_FINGERPRINT_STORE)
+        - Reprise ou suppression des transferts partiels '.<nom>.part'
     """
 
-    final_total = 0
-    total_skipped = 0
-    purged_destinations = set()
-    done_index_cache = {}
-
     # Rien a faire si pas de plan de copie
     if not copy_plan:
         return 0, RC_NOTHING_TO_DO
 
+    if workers is None:
+        workers = param_workers
+    if dry_run is None:
+        dry_run = param_dry_run
+
+    if dry_run:
+        rc_purge = purge_destinations(copy_plan, CopyRunContext(), workers, dry_run=True)
+        planned_files = sum(len(task["files"]) for task in copy_plan)
+        logger.info('[DRY-RUN] Copie non executee: [%s] fichiers planifies sur [%s] taches'
+                    % (planned_files, len(copy_plan)))
+        return 0, rc_purge
+
+    run_context = CopyRunContext(fingerprint_store=open_fingerprint_store())
+    try:
+        if purge_destinations(copy_plan, run_context, workers, dry_run=False) != RC_OK:
+            return 0, RC_RUNTIME_ERROR
+        if workers > 1:
+            final_total, rc = copy_files_to_webdav_parallel(copy_plan, workers, run_context)
+        else:
+            final_total, rc = copy_files_to_webdav_sequential(copy_plan, run_context)
+        # Apres un arret sur erreur, les .part non traites sont conserves pour reprise
+        if rc != RC_RUNTIME_ERROR:
+            cleanup_partial_transfers(run_context)
+        return final_total, rc
+    finally:
+        if run_context.updated_files:
+            logger.info('Fichiers mis a jour (sync_mode %s): [%s]' % (param_sync_mode, run_context.updated_files))
+        run_context.log_transfer_stats()
+        close_fingerprint_store(run_context.fingerprint_store)
+# =============================================================================
+def copy_files_to_webdav_sequential(copy_plan: list, run_context: CopyRunContext) -> tuple:
+    """
+    Copie sequentielle, tache par tache dans l'ordre du plan.
+
+    Retour:
+        (final_total, rc): identique a copy_files_to_webdav
+    """
+    final_total = 0
+    total_skipped = 0
+
     logger.info('Debut deroulement copie de tous les plans de correspondance')
-    for index, task in enumerate(copy_plan):
+    for task in copy_plan:
         source_dir = task["source"]
         destination_dir = task["destination"]
         files_to_copy = task["files"]
 
         # Creation du dossier destination si besoin
-        try:
-            if not os.path.exists(destination_dir):
-                os.makedirs(destination_dir, exist_ok=True)
-                logger.info('Creation repertoire [%s]' % destination_dir)
-        except Exception as error:
-            logger.error('Erreur creation repertoire [%s] (%s)' % (destination_dir, str(error)))
+        ok, kind, done_dir = prepare_destination_dir(destination_dir, run_context)
+        if not ok:
             return final_total, RC_RUNTIME_ERROR
 
-        domain, kind, wait_dir, done_dir = match_domain_destination(destination_dir)
-
-        if done_dir and done_dir not in done_index_cache and os.path.exists(done_dir):
-            done_index_cache[done_dir] = build_done_index(done_dir)
-
         logger.info('Debut copie des fichiers depuis src[%s] dest[%s]' % (source_dir, destination_dir))
         for file_name in files_to_copy:
-            source_path = os.path.join(source_dir, file_name)
+            status, source_path, _ = copy_plan_file(
+                source_dir, destination_dir, file_name, kind, done_dir,
+                run_context, task_file_entry(task, file_name))
 
-            # Ajout .txt si besoin
-            if file_name.lower().endswith(".txt"):
-                dest_filename_extension_txt = file_name
-            else:
-                dest_filename_extension_txt = file_name + ".txt"
-
-            destination_filename = dest_filename_extension_txt
-
-            # Renommage optionnel (desactive par defaut)
-            if ENABLE_RENAME:
-                destination_filename = resolve_duplicate_name(
-                    destination_dir=destination_dir,
-                    dest_filename=destination_filename,
-                    purged_destinations=purged_destinations,
-                    relance_tag="-Doublon",
-                    allow_sequence=True
-                )
-
-            destination_path = os.path.join(destination_dir, destination_filename)
-
-            # Variables pour le log
-            short_source = os.path.basename(source_path)
-            short_dest = destination_dir.split('/batchs', 1)[-1] if '/batchs' in destination_dir else destination_dir
-
-            # WAIT policy: if key exists in DONE, compare (if WAIT exists), log info if different, remove WAIT, skip copy
-            if kind == "WAIT" and done_dir and os.path.exists(done_dir):
-                done_index = done_index_cache.get(done_dir, {})
-                key = compute_logical_key(os.path.basename(destination_path))
-                done_equiv_path = done_index.get(key)
-
-                if done_equiv_path:
-                    if os.path.exists(destination_path):
-                        is_diff = files_are_different_streaming(destination_path, done_equiv_path)
-                        if is_diff:
-                            logger.info(
-                                'Doublon avec contenu different WAIT[%s] DONE[%s]',
-                                os.path.basename(destination_path), os.path.basename(done_equiv_path)
-                            )
-                        try:
-                            os.remove(destination_path)
-                            logger.info('Netoyage doublon WAIT [%s]',
-                                        os.path.basename(destination_path))
-                        except Exception as error:
-                            logger.error('Erreur suppression fichier WAIT [%s] (%s)', destination_path, str(error))
-                            return final_total, RC_RUNTIME_ERROR
-
-                    logger.debug('[SKIP] Fichier deja present en DONE/WAIT [%s]', short_source)
-                    total_skipped += 1
-                    continue
-
-            # Copie incrementale: skip si existe
-            try:
-                if os.path.exists(destination_path):
-                    total_skipped += 1
-                    logger.debug('[SKIP] Source [%s] deja present destination [%s]', short_source, short_dest)
-                    continue
-
-                shutil.copy2(source_path, destination_path)
-                final_total += 1
-                logger.info('Source: [%s] [%s]' % (final_total, short_source))
-
-                if kind == "DONE" and done_dir and done_dir in done_index_cache:
-                    key = compute_logical_key(os.path.basename(destination_path))
-                    if key not in done_index_cache[done_dir]:
-                        done_index_cache[done_dir][key] = destination_path
-
-            except Exception as error:
-                logger.error('Echec copie [%s] (%s)' % (source_path, str(error)))
+            if status == COPY_STATUS_ERROR:
                 return final_total, RC_RUNTIME_ERROR
+            if status == COPY_STATUS_SKIPPED:
+                total_skipped += 1
+                continue
+
+            final_total += 1
+            logger.info('Source: [%s] [%s]' % (final_total, os.path.basename(source_path)))
 
         logger.info('Fin copie fichier depuis [%s] vers [%s]' % (source_dir, destination_dir))
 
@@ -889,11 +2488,494 @@ def copy_files_to_webdav(copy_plan: list) -> tuple:
 
     return final_total, RC_OK
 # =============================================================================
+def copy_files_to_webdav_parallel(copy_plan: list, workers: int, run_context: CopyRunContext) -> tuple:
+    """
+    Variante parallele de copy_files_to_webdav (pool de threads borne a 'workers').
+
+    Garanties conservees:
+        - Les taches sont traitees par phase de priorite (copy_task_priority):
+          toutes les copies DONE sont terminees avant de demarrer les WAIT
+        - Les fichiers visant le meme chemin destination sont copies dans l'ordre
+          du plan, par le meme worker (pas de course sur un meme fichier)
+        - Arret au premier echec critique: plus aucune copie n'est lancee et
+          RC_RUNTIME_ERROR est retourne avec le total exact deja copie
+
+    Retour:
+        (final_total, rc): identique a copy_files_to_webdav
+    """
+    counters = {"copied": 0, "skipped": 0}
+    counters_lock = threading.Lock()
+    stop_event = threading.Event()
+
+    # Regroupement des taches par priorite en conservant l'ordre du plan
+    phases = {}
+    for task in copy_plan:
+        phases.setdefault(copy_task_priority(task), []).append(task)
+
+    def run_copy_unit(unit_items: list) -> bool:
+        # Copie sequentielle des fichiers d'une meme destination; False si echec critique
+        for source_dir, destination_dir, file_name, kind, done_dir, source_entry in unit_items:
+            if stop_event.is_set():
+                return True
+            status, source_path, _ = copy_plan_file(
+                source_dir, destination_dir, file_name, kind, done_dir,
+                run_context, source_entry)
+            if status == COPY_STATUS_ERROR:
+                stop_event.set()
+                return False
+            with counters_lock:
+                if status == COPY_STATUS_SKIPPED:
+                    counters["skipped"] += 1
+                    continue
+                counters["copied"] += 1
+                logger.info('Source: [%s] [%s]' % (counters["copied"], os.path.basename(source_path)))
+        return True
+
+    logger.info('Debut deroulement copie parallele [%s] workers' % workers)
+    for priority in sorted(phases):
+        # Creation des dossiers et index DONE avant de lancer les copies de la phase
+        copy_units = {}
+        for task in phases[priority]:
+            source_dir = task["source"]
+            destination_dir = task["destination"]
+            ok, kind, done_dir = prepare_destination_dir(destination_dir, run_context)
+            if not ok:
+                return counters["copied"], RC_RUNTIME_ERROR
+            logger.info('Debut copie des fichiers depuis src[%s] dest[%s]' % (source_dir, destination_dir))
+            for file_name in task["files"]:
+                unit_key = os.path.join(destination_dir, destination_filename_for(file_name))
+                copy_units.setdefault(unit_key, []).append(
+                    (source_dir, destination_dir, file_name, kind, done_dir,
+                     task_file_entry(task, file_name)))
+
+        phase_failed = False
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(run_copy_unit, unit_items) for unit_items in copy_units.values()]
+            for future in as_completed(futures):
+                if not future.result():
+                    phase_failed = True
+                    for pending in futures:
+                        pending.cancel()
+
+        if phase_failed:
+            return counters["copied"], RC_RUNTIME_ERROR
+
+    if counters["copied"] == 0:
+        logger.info('Total fichiers skip deja present [%s]', str(counters["skipped"]))
+        return 0, RC_NOTHING_TO_DO
+
+    return counters["copied"], RC_OK
+# =============================================================================
+class CopyPipeline:
+    """
+    Etat d'un run copy_files_to_webdav_pipeline. Toutes les methodes async
+    s'executent dans la meme boucle asyncio: compteurs et dictionnaires sont
+    mis a jour sans verrou; les E/S (planification, purge, copie) sont deleguees
+    a des threads.
+    """
+
+    def __init__(self, mapping_rows: list, workers: int, run_context: CopyRunContext,
+                 listing_cache: dict = None, resolution_cache: dict = None):
+        self.mapping_rows = mapping_rows
+        self.listing_cache = listing_cache
+        self.resolution_cache = resolution_cache
+        self.workers = workers
+        self.run_context = run_context
+        self.copy_plan = []
+        self.copied = 0
+        self.skipped = 0
+        self.failed = False
+        self.stop_event = threading.Event()  # lu par le thread du planificateur
+        self.loop = None
+        self.executor = None
+        self.prepare_lock = None
+        self.purge_pending = {}  # destination purgeable -> asyncio.Event (purge faite ou plan complet)
+        self.purge_runs = {}  # destination -> asyncio.Task de purge
+        self.prepared = {}  # destination -> asyncio.Task (ok, kind, done_dir, montage)
+        self.file_locks = {}  # chemin destination -> asyncio.Lock (ordre du plan)
+        self.mount_ids = {}  # dossier -> st_dev
+        self.mount_semaphores = {}  # st_dev -> asyncio.Semaphore
+
+    async def run(self) -> tuple:
+        """
+        Retour:
+            (copy_plan, rc_plan, final_total, rc_copy)
+        """
+        self.loop = asyncio.get_running_loop()
+        self.prepare_lock = asyncio.Lock()
+        task_queue = asyncio.Queue()
+        for row in self.mapping_rows:
+            if row.purge:
+                self.purge_pending.setdefault(mapping_destination_path(row), asyncio.Event())
+
+        phases = {}
+        copies = []
+        with ThreadPoolExecutor(max_workers=max(2, self.workers * 2)) as executor, \
+                ThreadPoolExecutor(max_workers=1) as planner_executor:
+            self.executor = executor
+            planner = self.loop.run_in_executor(planner_executor, self._plan, task_queue)
+
+            # Phase DONE copiee au fil de l'eau, autres phases mises en attente
+            while True:
+                copy_task = await task_queue.get()
+                if copy_task is None:
+                    break
+                self.copy_plan.append(copy_task)
+                if copy_task["purge"]:
+                    self._start_purge(copy_task["destination"])
+                priority = copy_task_priority(copy_task)
+                if priority == 0:
+                    copies.extend(self._dispatch(copy_task))
+                else:
+                    phases.setdefault(priority, []).append(copy_task)
+
+            rc_plan = await planner
+            # Plan complet: les destinations purgeables sans tache ne seront pas purgees
+            for purge_event in self.purge_pending.values():
+                purge_event.set()
+            await asyncio.gather(*copies)
+
+            for priority in sorted(phases):
+                if self.failed:
+                    break
+                phase_copies = []
+                for copy_task in phases[priority]:
+                    phase_copies.extend(self._dispatch(copy_task))
+                await asyncio.gather(*phase_copies)
+            await asyncio.gather(*self.purge_runs.values())
+
+        if self.failed:
+            return self.copy_plan, rc_plan, self.copied, RC_RUNTIME_ERROR
+        if rc_plan != RC_OK:
+            return self.copy_plan, rc_plan, 0, rc_plan
+        if self.copied == 0:
+            logger.info('Total fichiers skip deja present [%s]', str(self.skipped))
+            return self.copy_plan, rc_plan, 0, RC_NOTHING_TO_DO
+        return self.copy_plan, rc_plan, self.copied, RC_OK
+
+    def _plan(self, task_queue: asyncio.Queue) -> int:
+        # Thread du planificateur: chaque tache est publiee dans la file de la boucle
+        start = time.perf_counter()
+        plan_stream = iter_copy_plan_from_reference(self.listing_cache, self.resolution_cache, self.mapping_rows)
+        planned_tasks = 0
+        try:
+            while True:
+                try:
+                    copy_task = next(plan_stream)
+                except StopIteration as stop:
+                    return stop.value
+                planned_tasks += 1
+                self.loop.call_soon_threadsafe(task_queue.put_nowait, copy_task)
+                if self.stop_event.is_set():
+                    plan_stream.close()
+                    logger.warning('Construction du plan interrompue apres [%s] taches' % planned_tasks)
+                    return RC_OK
+        finally:
+            run_metrics.add_time('plan', time.perf_counter() - start)
+            self.loop.call_soon_threadsafe(task_queue.put_nowait, None)
+
+    def _fail(self) -> None:
+        self.failed = True
+        self.stop_event.set()
+
+    def _dispatch(self, copy_task: dict) -> list:
+        # Une coroutine par fichier, creees dans l'ordre du plan (ordre d'acces aux verrous)
+        logger.info('Debut copie des fichiers depuis src[%s] dest[%s]'
+                    % (copy_task["source"], copy_task["destination"]))
+        return [self.loop.create_task(self._copy_file(copy_task["source"], copy_task["destination"], file_name,
+                                                      task_file_entry(copy_task, file_name)))
+                for file_name in copy_task["files"]]
+
+    def _start_purge(self, destination_dir: str) -> None:
+        if destination_dir not in self.purge_runs:
+            self.purge_runs[destination_dir] = self.loop.create_task(self._purge(destination_dir))
+
+    async def _purge(self, destination_dir: str) -> None:
+        ok, deleted_count, deleted_bytes = await self.loop.run_in_executor(
+            self.executor, purge_destination_dir, destination_dir, False)
+        logger.info('Purge [%s] fichiers [%s] octets [%s]' % (destination_dir, deleted_count, deleted_bytes))
+        if ok:
+            self.run_context.purged_destinations.add(destination_dir)
+        else:
+            self._fail()
+        self.purge_pending.setdefault(destination_dir, asyncio.Event()).set()
+
+    async def _mount_id(self, path: str):
+        mount_id = self.mount_ids.get(path)
+        if mount_id is None:
+            try:
+                mount_id = (await self.loop.run_in_executor(self.executor, os.stat, path)).st_dev
+            except OSError:
+                mount_id = path
+            self.mount_ids[path] = mount_id
+        return mount_id
+
+    def _prepare(self, destination_dir: str) -> asyncio.Task:
+        prepared = self.prepared.get(destination_dir)
+        if prepared is None:
+            prepared = self.loop.create_task(self._prepare_destination(destination_dir))
+            self.prepared[destination_dir] = prepared
+        return prepared
+
+    async def _prepare_destination(self, destination_dir: str) -> tuple:
+        # Une destination purgeable n'est preparee qu'apres sa purge (ou le plan complet)
+        purge_event = self.purge_pending.get(destination_dir)
+        if purge_event is not None:
+            await purge_event.wait()
+        if self.failed:
+            return False, None, None, None
+        async with self.prepare_lock:
+            ok, kind, done_dir = await self.loop.run_in_executor(
+                self.executor, prepare_destination_dir, destination_dir, self.run_context)
+        if not ok:
+            return False, None, None, None
+        return ok, kind, done_dir, await self._mount_id(destination_dir)
+
+    async def _copy_file(self, source_dir: str, destination_dir: str, file_name: str,
+                         source_entry: FileEntry = None) -> None:
+        destination_path = os.path.join(destination_dir, destination_filename_for(file_name))
+        file_lock = self.file_locks.setdefault(destination_path, asyncio.Lock())
+        async with file_lock:
+            if self.failed:
+                return
+            ok, kind, done_dir, destination_mount = await self._prepare(destination_dir)
+            if not ok:
+                self._fail()
+                return
+            source_mount = await self._mount_id(source_dir)
+
+            # Contre-pression: 'workers' copies au plus par montage (acquisition ordonnee)
+            semaphores = []
+            for mount_id in sorted({source_mount, destination_mount}, key=str):
+                if mount_id not in self.mount_semaphores:
+                    self.mount_semaphores[mount_id] = asyncio.Semaphore(self.workers)
+                semaphores.append(self.mount_semaphores[mount_id])
+            for semaphore in semaphores:
+                await semaphore.acquire()
+            try:
+                if self.failed:
+                    return
+                status, source_path, _ = await self.loop.run_in_executor(
+                    self.executor, copy_plan_file, source_dir, destination_dir, file_name, kind, done_dir,
+                    self.run_context, source_entry)
+            finally:
+                for semaphore in reversed(semaphores):
+                    semaphore.release()
+
+        if status == COPY_STATUS_ERROR:
+            self._fail()
+            return
+        if status == COPY_STATUS_SKIPPED:
+            self.skipped += 1
+            return
+        self.copied += 1
+        logger.info('Source: [%s] [%s]' % (self.copied, os.path.basename(source_path)))
+# =============================================================================
+@timed_phase('pipeline')
+def copy_files_to_webdav_pipeline(workers: int = None, mapping_rows: list = None,
+                                  listing_cache: dict = None, resolution_cache: dict = None) -> tuple:
+    """
+    Construction du plan et copie en pipeline (boucle asyncio, E/S dans des threads):
+    le planificateur publie chaque tache des que sa ligne CSV est resolue et les
+    copies demarrent sans attendre la fin du plan.
+
+    Garanties conservees (cf. copy_files_to_webdav):
+        - purge=YES: la purge d'une destination precede toute copie vers elle
+          (les copies vers une destination purgeable attendent sa purge ou la fin du plan)
+        - DONE avant WAIT: seules les taches DONE sont copiees pendant la planification,
+          chaque phase suivante demarre une fois le plan complet et la phase precedente terminee
+        - fichiers visant le meme chemin destination copies dans l'ordre du plan
+        - arret au premier echec critique: planification interrompue, plus aucune copie lancee
+    Contre-pression: au plus 'workers' copies simultanees par point de montage
+    (st_dev) source et destination.
+
+    Parametres:
+        workers (int):           copies simultanees par montage (defaut: param_workers)
+        mapping_rows (list):     lignes deja chargees (sinon load_reference_mapping)
+        listing_cache (dict):    cf. iter_copy_plan_from_reference
+        resolution_cache (dict): cf. iter_copy_plan_from_reference
+
+    Retour:
+        (copy_plan, rc_plan, final_total, rc_copy):
+            copy_plan (list[CopyTask]): taches planifiees (ordre de planification)
+            rc_plan (int):          code retour du plan (cf. prepare_copy_plan_from_reference)
+            final_total (int):      nombre de fichiers copies
+            rc_copy (int):          RC_OK / RC_NOTHING_TO_DO / RC_RUNTIME_ERROR (ou rc_plan)
+    """
+    if workers is None:
+        workers = param_workers
+
+    if mapping_rows is None:
+        mapping_rows, rc_mapping = load_reference_mapping()
+        if rc_mapping != RC_OK:
+            return [], rc_mapping, 0, rc_mapping
+
+    logger.info('Debut pipeline planification/copie [%s] copie(s) par montage' % workers)
+    run_context = CopyRunContext(fingerprint_store=open_fingerprint_store())
+    try:
+        copy_plan, rc_plan, final_total, rc_copy = asyncio.run(
+            CopyPipeline(mapping_rows, workers, run_context, listing_cache, resolution_cache).run())
+        # Apres un arret sur erreur, les .part non traites sont conserves pour reprise
+        if rc_copy != RC_RUNTIME_ERROR:
+            cleanup_partial_transfers(run_context)
+        return copy_plan, rc_plan, final_total, rc_copy
+    finally:
+        if run_context.updated_files:
+            logger.info('Fichiers mis a jour (sync_mode %s): [%s]' % (param_sync_mode, run_context.updated_files))
+        run_context.log_transfer_stats()
+        close_fingerprint_store(run_context.fingerprint_store)
+# =============================================================================
+def get_run_summary_path() -> str:
+    """Resume JSON du run, a cote du log rapport-*-batch (meme nom, extension .json)."""
+    summary_filename = f"{REFERENCE_BATCH_PREFIX_LOG_FILENAME}-{THIS_PROGRAM}-{SELF_LOG_DATETIME}.json"
+    return os.path.join(this_program_log_path, summary_filename)
+# =============================================================================
+def write_run_summary(rc: int, summary_path: str = None, date_results: list = None) -> None:
+    """
+    Ecrit le resume machine du run: parametres, code retour global et par date
+    plan, duree par phase et compteurs d'appels fichiers / octets (cf. RunMetrics).
+    Un echec d'ecriture n'est pas bloquant.
+
+    Parametres:
+        date_results (list): [(date plan, rc), ...] (defaut: date en cours et rc)
+    """
+    if summary_path is None:
+        summary_path = get_run_summary_path()
+    if date_results is None:
+        date_results = [(param_date_traitement, rc)]
+    summary = {
+        "version": RUN_SUMMARY_VERSION,
+        "program": PROGRAM_NAME,
+        "program_version": VERSION,
+        "date_plan": DATE_PLAN_LIST_SEPARATOR.join(date_plan for date_plan, _ in date_results),
+        "dates": [{"date_plan": date_plan, "rc": date_rc} for date_plan, date_rc in date_results],
+        "parameters": {
+            "mode_copie": param_mode_copie or MODE_COPY_PAR,
+            "ref_mapping": param_ref_mapping_path,
+            "workers": param_workers,
+            "sync_mode": param_sync_mode,
+            "pipeline": param_pipeline,
+            "dry_run": param_dry_run,
+            "plan_in": param_plan_in_path,
+            "plan_out": param_plan_out_path,
+        },
+        "rc": rc,
+    }
+    summary.update(run_metrics.summary())
+
+    tmp_path = summary_path + ".tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as summary_file:
+            json.dump(summary, summary_file, indent=2)
+        os.replace(tmp_path, summary_path)
+        logger.info('Resume du run ecrit [%s]' % summary_path)
+    except Exception as error:
+        logger.warning('Ecriture resume du run impossible [%s] (%s)' % (summary_path, str(error)))
+# =============================================================================
+def run_distribution(mapping_rows: list = None, listing_cache: dict = None,
+                     resolution_cache: dict = None) -> int:
+    """
+    Construction du plan (CSV ou --plan_in), export eventuel (--plan_out),
+    puis execution de la copie pour la date plan en cours (param_date_traitement).
+    Retourne le code retour du run.
+
+    Parametres:
+        mapping_rows, listing_cache, resolution_cache: partages entre les dates
+            d'un run multi-dates (cf. run_distribution_dates), sinon crees ici
+    """
+    # Construire le plan (ou le relire depuis --plan_in); en pipeline, la copie
+    # se deroule pendant la construction du plan
+    pipeline = param_pipeline and not (param_plan_in_path or param_plan_out_path or param_dry_run)
+    if pipeline:
+        copy_plan, rc_plan, final_total, rc_copy = copy_files_to_webdav_pipeline(
+            mapping_rows=mapping_rows, listing_cache=listing_cache, resolution_cache=resolution_cache)
+        if rc_copy == RC_RUNTIME_ERROR:
+            rc_plan = RC_OK
+    elif param_plan_in_path:
+        copy_plan, rc_plan = load_copy_plan(param_plan_in_path)
+    else:
+        copy_plan, rc_plan = prepare_copy_plan_from_reference(listing_cache, resolution_cache, mapping_rows)
+
+    if param_plan_out_path and rc_plan in (RC_OK, RC_NOTHING_TO_DO):
+        copy_plan.sort(key=copy_task_priority)
+        rc_export = export_copy_plan(copy_plan, param_plan_out_path)
+        return rc_export if rc_export != RC_OK else rc_plan
+
+    if rc_plan != RC_OK:
+        if rc_plan == RC_NOTHING_TO_DO:
+            logger.warning('Aucun fichier a copier RC[%s]' % rc_plan)
+        return rc_plan
+
+    copy_plan.sort(key=copy_task_priority)
+
+    logger.info('Plan copie genere avec [%s] taches' % str(len(copy_plan)))
+
+    # Copie (plan non vide si RC_OK)
+    if not pipeline:
+        final_total, rc_copy = copy_files_to_webdav(copy_plan)
+    if rc_copy == RC_OK and param_dry_run:
+        logger.info('Simulation terminee (dry-run), WebDAV non modifie')
+    elif rc_copy == RC_OK:
+        logger.info('Copie terminee vers WebDAV Total[%s] fichiers' % str(final_total))
+    elif rc_copy == RC_NOTHING_TO_DO:
+        logger.info('WebDAV a jour RC[%s]' % rc_copy)
+    else:
+        # RC_RUNTIME_ERROR
+        logger.error('Traitement interrompu suite a une erreur critique RC[%s]' % rc_copy)
+    return rc_copy
+# =============================================================================
+def combine_date_return_codes(return_codes: list) -> int:
+    """Code retour global d'un run multi-dates: le plus grave (cf. RC_DATES_PRECEDENCE)."""
+    for rc in RC_DATES_PRECEDENCE:
+        if rc in return_codes:
+            return rc
+    return RC_NOTHING_TO_DO
+# =============================================================================
+def run_distribution_dates(date_plans: list = None) -> tuple:
+    """
+    Execute run_distribution pour chaque date plan (-d liste ou plage), dans
+    l'ordre. Avec plusieurs dates, le mapping n'est charge qu'une fois et les
+    listings / resolutions des dossiers source sont partages entre les dates;
+    seule l'arborescence destination (<webdav>/<date>/pars/...) change.
+    Arret au premier echec critique: les dates suivantes ne sont pas traitees.
+
+    Retour:
+        (rc, date_results): rc global (cf. combine_date_return_codes),
+                            [(date plan, rc), ...] des dates traitees
+    """
+    global param_date_traitement
+    if date_plans is None:
+        date_plans = param_dates_traitement or [param_date_traitement]
+
+    mapping_rows, listing_cache, resolution_cache = None, None, None
+    if len(date_plans) > 1:
+        mapping_rows, rc_mapping = load_reference_mapping()
+        if rc_mapping != RC_OK:
+            return rc_mapping, [(date_plan, rc_mapping) for date_plan in date_plans]
+        listing_cache, resolution_cache = {}, {}
+
+    date_results = []
+    for index, date_plan in enumerate(date_plans, start=1):
+        param_date_traitement = date_plan
+        if len(date_plans) > 1:
+            logger.info('Date plan [%s] (%s/%s)' % (date_plan, index, len(date_plans)))
+        rc = run_distribution(mapping_rows, listing_cache, resolution_cache)
+        date_results.append((date_plan, rc))
+        if rc == RC_RUNTIME_ERROR and index < len(date_plans):
+            logger.error('Dates plan non traitees suite a erreur critique %s' % date_plans[index:])
+            break
+
+    if len(date_plans) > 1:
+        logger.info('Bilan dates plan: %s'
+                    % ' '.join('%s:RC[%s]' % (date_plan, rc) for date_plan, rc in date_results))
+    return combine_date_return_codes([rc for _, rc in date_results]), date_results
+# =============================================================================
 def main() -> int:
     """
     Point d'entree principal
     - Initialisation du logger une fois les args parses
-    - Construction du plan puis execution de la copie
+    - Execution du run pour chaque date plan (cf. run_distribution_dates)
+    - Resume JSON du run a cote du log (cf. write_run_summary)
     - Retourne un code de sortie unique, utilise par __main__ pour sys.exit()
     """
     # Parse des arguments (capture d'une eventuelle erreur argparse)
@@ -911,33 +2993,12 @@ def main() -> int:
     startLogger()
 
     logger.info(PREFIX_MSG + ' Demarrage')
+    rc, date_results = run_distribution_dates()
 
-    # Construire le plan
-    copy_plan, rc_plan = prepare_copy_plan_from_reference()
-    if rc_plan != RC_OK:
-        if rc_plan == RC_NOTHING_TO_DO:
-            logger.warning('Aucun fichier a copier RC[%s]' % rc_plan)
-        logger.info(PREFIX_MSG + ' Fin')
-        return rc_plan
-
-    copy_plan.sort(key=copy_task_priority)
-
-    logger.info('Plan copie genere avec [%s] taches' % str(len(copy_plan)))
-
-    # Copie si plan non vide
-    if copy_plan:
-        final_total, rc_copy = copy_files_to_webdav(copy_plan)
-        if rc_copy == RC_OK:
-            logger.info('Copie terminee vers WebDAV Total[%s] fichiers' % str(final_total))
-        elif rc_copy == RC_NOTHING_TO_DO:
-            logger.info('WebDAV a jour RC[%s]' % rc_copy)
-        else:
-            # RC_RUNTIME_ERROR
-            logger.error('Traitement interrompu suite a une erreur critique RC[%s]' % rc_copy)
-            logger.info(PREFIX_MSG + ' Fin')
-            return rc_copy
+    run_metrics.log_summary()
+    write_run_summary(rc, date_results=date_results)
     logger.info(PREFIX_MSG + ' Fin')
-    return rc_copy
+    return rc
 # =============================================================================
 if __name__ == '__main__':
     # Traces initiales avant logger
@@ -0,0 +1,185 @@
+# bench_distribution.py
+# -*- coding: utf-8 -*-
+"""
+Benchmark du planificateur et du copieur de distribution_par_webdav sur une
+arborescence synthetique (cf. lab_builder.build_synthetic_lab).
+
+Chaque execution ajoute une ligne JSON au fichier de resultats (--results):
+volumes, durees plan/copie, debit, latence par fichier, RSS max et compteurs
+du run (run_metrics). La ligne precedente de meme configuration est affichee
+pour comparaison.
+
+Usage:
+    python tests/bench_distribution.py --files 10000 --rows 200 --workers 4
+    python tests/bench_distribution.py --files 500000 --rows 400 --archive_days 1500 \
+        --done_files 200000 --pipeline --label nightly
+"""
+import argparse
+import json
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE))
+sys.path.insert(0, str(HERE.parent / "distribution_par"))
+
+from lab_builder import build_synthetic_lab, clean_dir  # noqa: E402
+
+
+def peak_rss_kb() -> int:
+    # ru_maxrss: Ko sous Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=str(HERE), check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except Exception:
+        return ""
+
+
+def configure_module(dpw, lab: dict, interfaces_root: Path, dateplan: str, args) -> None:
+    """Parametres du script positionnes comme par parseArgs (sans log fichier)."""
+    dpw.logger = dpw.logging.getLogger("bench_distribution")
+    dpw.logger.setLevel(dpw.logging.WARNING)
+    dpw.param_date_traitement = dateplan
+    dpw.param_mode_copie = ""
+    dpw.param_interface_path = str(interfaces_root) + "/"
+    dpw.param_webdav_path = str(lab["webdav_tech"]) + "/"
+    dpw.param_ref_mapping_path = str(lab["csv_path"])
+    dpw.param_workers = args.workers
+    dpw.param_sync_mode = args.sync_mode
+    dpw.param_pipeline = args.pipeline
+
+
+def run_benchmark(args) -> dict:
+    import distribution_par_webdav as dpw
+
+    work_dir = Path(args.work_dir) if args.work_dir else Path(tempfile.mkdtemp(prefix="bench_distribution_"))
+    interfaces_root = work_dir / "interfaces"
+    webdav_root = work_dir / "webdav"
+    out_dir = work_dir / "out"
+    for path in (interfaces_root, webdav_root, out_dir):
+        clean_dir(path)
+
+    dateplan = args.date
+    print("Generation arborescence synthetique [%s]..." % work_dir)
+    build_start = time.perf_counter()
+    lab = build_synthetic_lab(interfaces_root, webdav_root, out_dir, dateplan,
+                              files=args.files, rows=args.rows, archive_days=args.archive_days,
+                              done_files=args.done_files, file_size=args.file_size)
+    build_seconds = time.perf_counter() - build_start
+    configure_module(dpw, lab, interfaces_root, dateplan, args)
+
+    try:
+        if args.pipeline:
+            copy_start = time.perf_counter()
+            copy_plan, rc_plan, final_total, rc_copy = dpw.copy_files_to_webdav_pipeline(args.workers)
+            plan_seconds = dpw.run_metrics.timers.get("plan", {}).get("seconds", 0.0)
+            copy_seconds = time.perf_counter() - copy_start
+        else:
+            plan_start = time.perf_counter()
+            copy_plan, rc_plan = dpw.prepare_copy_plan_from_reference()
+            plan_seconds = time.perf_counter() - plan_start
+            copy_plan.sort(key=dpw.copy_task_priority)
+            copy_start = time.perf_counter()
+            final_total, rc_copy = dpw.copy_files_to_webdav(copy_plan, workers=args.workers)
+            copy_seconds = time.perf_counter() - copy_start
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    metrics = dpw.run_metrics.summary()
+    planned_files = sum(len(task["files"]) for task in copy_plan)
+    bytes_copied = metrics["counters"].get(dpw.METRIC_BYTES_COPIED, 0)
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "label": args.label,
+        "revision": git_revision(),
+        "python": "%s.%s.%s" % sys.version_info[:3],
+        "config": {
+            "files": args.files, "rows": args.rows, "archive_days": args.archive_days,
+            "done_files": args.done_files, "file_size": args.file_size,
+            "workers": args.workers, "pipeline": args.pipeline, "sync_mode": args.sync_mode,
+        },
+        "rc_plan": rc_plan,
+        "rc_copy": rc_copy,
+        "build_seconds": round(build_seconds, 3),
+        "plan_seconds": round(plan_seconds, 3),
+        "copy_seconds": round(copy_seconds, 3),
+        "planned_tasks": len(copy_plan),
+        "planned_files": planned_files,
+        "copied_files": final_total,
+        "files_per_second": round(final_total / copy_seconds, 1) if copy_seconds > 0 else None,
+        "mb_per_second": round(bytes_copied / copy_seconds / (1024 * 1024), 3) if copy_seconds > 0 else None,
+        "latency_ms_per_file": round(copy_seconds * 1000 / planned_files, 4) if planned_files else None,
+        "peak_rss_kb": peak_rss_kb(),
+        "timers": metrics["timers"],
+        "counters": metrics["counters"],
+    }
+
+
+def previous_result(results_path: Path, result: dict) -> dict or None:
+    if not results_path.exists():
+        return None
+    previous = None
+    with open(results_path, "r", encoding="utf-8") as results_file:
+        for line in results_file:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get("label") == result["label"] and entry.get("config") == result["config"]:
+                previous = entry
+    return previous
+
+
+def print_result(result: dict, previous: dict or None) -> None:
+    keys = ["plan_seconds", "copy_seconds", "files_per_second", "mb_per_second",
+            "latency_ms_per_file", "peak_rss_kb"]
+    print("Resultat [%s] rc plan/copie [%s/%s] fichiers planifies [%s] copies [%s]"
+          % (result["label"], result["rc_plan"], result["rc_copy"],
+             result["planned_files"], result["copied_files"]))
+    for key in keys:
+        line = "  %-20s : %s" % (key, result[key])
+        if previous is not None and previous.get(key) not in (None, 0) and result[key] is not None:
+            line += "   (precedent %s, %+.1f%%)" % (previous[key], (result[key] - previous[key]) * 100.0 / previous[key])
+        print(line)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark planification/copie distribution_par_webdav")
+    ap.add_argument("--files", type=int, default=10000, help="Nombre de fichiers .par sources (defaut: 10000)")
+    ap.add_argument("--rows", type=int, default=200, help="Nombre de lignes du mapping CSV (defaut: 200)")
+    ap.add_argument("--archive_days", type=int, default=365,
+                    help="Sous-dossiers YYYYMMDD par archive LATEST_YYYYMMDD (defaut: 365)")
+    ap.add_argument("--done_files", type=int, default=10000, help="Fichiers deja presents en DONE (defaut: 10000)")
+    ap.add_argument("--file_size", type=int, default=64, help="Taille des fichiers en octets (defaut: 64)")
+    ap.add_argument("--workers", type=int, default=1, help="--workers du script (defaut: 1)")
+    ap.add_argument("--pipeline", action="store_true", help="Mode --pipeline (planification et copie simultanees)")
+    ap.add_argument("--sync_mode", default="exists", choices=["exists", "stat", "checksum"])
+    ap.add_argument("-d", "--date", default=datetime.now().strftime("%Y%m%d"), help="Date plan AAAAMMJJ")
+    ap.add_argument("--work_dir", help="Dossier de travail (defaut: dossier temporaire)")
+    ap.add_argument("--keep", action="store_true", help="Conserver l'arborescence generee")
+    ap.add_argument("--label", default="default", help="Libelle de la serie de mesures")
+    ap.add_argument("--results", default=str(HERE / "bench_results.jsonl"),
+                    help="Fichier de resultats JSON lines (defaut: tests/bench_results.jsonl)")
+    args = ap.parse_args()
+
+    result = run_benchmark(args)
+    results_path = Path(args.results)
+    print_result(result, previous_result(results_path, result))
+    with open(results_path, "a", encoding="utf-8") as results_file:
+        results_file.write(json.dumps(result) + "\n")
+    print("Resultats ajoutes a [%s]" % results_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# bench_mapping_loader.py
+# -*- coding: utf-8 -*-
+"""
+Mesure du cout de demarrage de la lecture du CSV de mapping:
+  - import pandas (processus neuf) vs import csv
+  - pd.read_csv + iterrows (ancienne lecture) vs load_mapping_rows
+  - load_compiled_mapping: compilation complete vs rechargement du cache JSON
+
+Usage:
+    python tests/bench_mapping_loader.py --rows 200 --repeat 20
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE))
+sys.path.insert(0, str(HERE.parent / "distribution_par"))
+
+from lab_builder import build_csv  # noqa: E402
+
+
+def time_import(module_name: str, repeat: int) -> float:
+    """Meilleur temps (s) d'un 'import <module>' dans un interpreteur neuf, moins l'interpreteur vide."""
+    def best(code: str) -> float:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], check=True)
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+    return best("import %s" % module_name) - best("pass")
+
+
+def time_call(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def build_mapping(csv_path: Path, row_count: int) -> None:
+    rows = []
+    for index in range(row_count):
+        rows.append({
+            "type": "CLEVA" if index % 2 == 0 else "DSN",
+            "source": "in/flow%03d" % index,
+            "destination": "pars/CCO/WAIT",
+            "prefix01": "X_%03d_" % index,
+            "prefix02": "",
+            "extension01": ".par",
+            "exclude_prefix01": "*DSN*",
+            "date_policy": "",
+        })
+    build_csv(csv_path, rows)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark lecture CSV mapping (pandas vs csv)")
+    ap.add_argument("--rows", type=int, default=200, help="Nombre de lignes du mapping (defaut: 200)")
+    ap.add_argument("--repeat", type=int, default=10, help="Nombre de mesures, on garde la meilleure (defaut: 10)")
+    args = ap.parse_args()
+
+    import distribution_par_webdav as dpw
+    dpw.logger = dpw.logging.getLogger("bench_mapping_loader")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = Path(tmp_dir) / "mapping.csv"
+        build_mapping(csv_path, args.rows)
+
+        print("Mapping: %s lignes, meilleur temps sur %s mesures" % (args.rows, args.repeat))
+        print("  import csv              : %8.2f ms" % (time_import("csv", args.repeat) * 1000))
+        try:
+            import pandas as pd
+        except ImportError:
+            pd = None
+            print("  import pandas           : pandas non installe")
+        if pd is not None:
+            print("  import pandas           : %8.2f ms" % (time_import("pandas", args.repeat) * 1000))
+
+            def read_with_pandas():
+                df = pd.read_csv(csv_path, sep=";", dtype=str).fillna('')
+                df.columns = df.columns.str.strip()
+                return [row["type"].strip().upper() for _, row in df.iterrows()]
+            print("  read_csv + iterrows     : %8.2f ms" % (time_call(read_with_pandas, args.repeat) * 1000))
+
+        print("  load_mapping_rows       : %8.2f ms"
+              % (time_call(lambda: dpw.load_mapping_rows(str(csv_path)), args.repeat) * 1000))
+
+        compiled_path = dpw.get_compiled_mapping_path(str(csv_path))
+
+        def compile_without_cache():
+            if os.path.exists(compiled_path):
+                os.remove(compiled_path)
+            return dpw.load_compiled_mapping(str(csv_path))
+        print("  compilation (sans cache): %8.2f ms" % (time_call(compile_without_cache, args.repeat) * 1000))
+        print("  mapping compile (cache) : %8.2f ms"
+              % (time_call(lambda: dpw.load_compiled_mapping(str(csv_path)), args.repeat) * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 import sys
 from pathlib import Path
 
-# Ajoute .../Outillage/src au sys.path pour que "import distribution_par_webdav" fonctionne
+# Ajoute .../Outillage/src et les dossiers des scripts au sys.path pour que
+# "import distribution_par_webdav" / "import customizer_pars" fonctionnent
 SRC = Path(__file__).resolve().parents[1]
-sys.path.insert(0, str(SRC))
+for module_dir in (SRC, SRC / "distribution_par", SRC / "customizer"):
+    sys.path.insert(0, str(module_dir))
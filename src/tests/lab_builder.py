@@ -46,6 +46,97 @@ def build_csv(csv_path: Path, rows: list) -> None:
         lines.append(";".join(line))
     write_text(csv_path, "\n".join(lines) + "\n")
 
+def build_synthetic_lab(interfaces_root: Path, webdav_root: Path, out_dir: Path, dateplan: str,
+                        domain: str = "CCO", files: int = 10000, rows: int = 100, archive_days: int = 365,
+                        done_files: int = 10000, file_size: int = 64) -> dict:
+    """
+    Arborescence synthetique pour les benchmarks (cf. bench_distribution.py):
+      - 'files' fichiers .par repartis sur rows/2 dossiers sources (+ 10% de fichiers
+        parasites .xml et *_DSN-*.par exclus)
+      - un dossier source sur 4 est une archive avec 'archive_days' sous-dossiers
+        YYYYMMDD (LATEST_YYYYMMDD), les fichiers sont dans le plus recent
+      - chaque dossier source est cible par 2 lignes CSV (DONE puis WAIT) si rows le permet
+      - DONE pre-rempli avec 'done_files' fichiers dont ~1% d'equivalents des sources
+    Retourne un dict des chemins et volumes generes.
+    """
+    webdav_tech = webdav_root / "tech"
+    wait_dir = webdav_tech / dateplan / "pars" / domain / "WAIT"
+    done_dir = webdav_tech / dateplan / "pars" / domain / "DONE"
+    ensure_dir(wait_dir)
+    ensure_dir(done_dir)
+
+    source_count = max(1, rows // 2)
+    payload = (b"X" * (file_size - 1)) + b"\n" if file_size > 0 else b""
+    latest_day = datetime.strptime(dateplan, "%Y%m%d").toordinal()
+
+    # --- Sources ---
+    sources = []
+    for source_index in range(source_count):
+        is_archive = source_index % 4 == 3
+        relative = f"in/arch{source_index:04d}" if is_archive else f"in/flow{source_index:04d}"
+        source_dir = interfaces_root / relative
+        if is_archive:
+            for day in range(archive_days):
+                ensure_dir(source_dir / datetime.fromordinal(latest_day - day).strftime("%Y%m%d"))
+            files_dir = source_dir / dateplan
+        else:
+            files_dir = source_dir
+        ensure_dir(files_dir)
+        sources.append((relative, files_dir, is_archive))
+
+    created = 0
+    for file_index in range(files):
+        relative, files_dir, _ = sources[file_index % source_count]
+        source_index = file_index % source_count
+        name = f"P{source_index:04d}_{file_index:07d}.par"
+        with open(files_dir / name, "wb") as f:
+            f.write(payload)
+        created += 1
+        if file_index % 10 == 0:
+            # Parasites: non retenus par le masque, ou exclus par *_DSN-*
+            stray = f"P{source_index:04d}_{file_index:07d}_DSN-1.par" if file_index % 20 == 0 \
+                else f"P{source_index:04d}_{file_index:07d}.xml"
+            with open(files_dir / stray, "wb") as f:
+                f.write(payload)
+
+    # --- DONE pre-rempli ---
+    for done_index in range(done_files):
+        if done_index % 100 == 0 and done_index < files:
+            name = f"P{done_index % source_count:04d}_{done_index:07d}.par.txt"
+        else:
+            name = f"OLD_{done_index:07d}.par.txt"
+        with open(done_dir / name, "wb") as f:
+            f.write(payload)
+
+    # --- Mapping CSV ---
+    mapping_rows = []
+    for row_index in range(rows):
+        relative, _, is_archive = sources[row_index % source_count]
+        source_index = row_index % source_count
+        kind = "DONE" if (row_index // source_count) % 2 == 0 else "WAIT"
+        mapping_rows.append({
+            "type": "CLEVA",
+            "source": relative,
+            "destination": f"pars/{domain}/{kind}",
+            "prefix01": f"P{source_index:04d}_*",
+            "extension01": ".par",
+            "exclude_prefix01": "*_DSN-*.par",
+            "date_policy": "LATEST_YYYYMMDD" if is_archive else "",
+        })
+    csv_path = out_dir / "distribution_webdav_synthetic.csv"
+    build_csv(csv_path, mapping_rows)
+
+    return {
+        "csv_path": csv_path,
+        "webdav_tech": webdav_tech,
+        "wait_dir": wait_dir,
+        "done_dir": done_dir,
+        "source_dirs": source_count,
+        "source_files": created,
+        "mapping_rows": rows,
+        "done_files": done_files,
+    }
+
 def main():
     ap = argparse.ArgumentParser(
         description="Génère une arborescence LAB pour tester distribution_par_webdav.py"
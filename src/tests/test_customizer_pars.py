@@ -0,0 +1,438 @@
+# tests/test_customizer_pars.py
+import os
+import importlib
+import logging
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+
+# -------- Helpers --------
+
+def _make_logger(name="test-customizer"):
+    log = logging.getLogger(name)
+    log.handlers.clear()
+    log.setLevel(logging.DEBUG)
+    log.addHandler(logging.NullHandler())
+    return log
+
+
+def _reload_module():
+    import customizer_pars as m
+    importlib.reload(m)
+    return m
+
+
+def _rules_df(cz, rules):
+    """
+    rules: list[(RULES_NUM, BATCH_CODE, MODE, KEY, VALUE)] -> DataFrame des regles valides
+    """
+    return pd.DataFrame(
+        [{cz.RULE_NUM: num, cz.RULE_ACTIVE: "true", cz.BATCH_CODE: batch_code, cz.MODE_TRT: mode,
+          cz.ARGUMENT: key, cz.VALEUR: value} for num, batch_code, mode, key, value in rules])
+
+
+def _par_lines(batch_code, *key_values, fin=True):
+    lines = ["# PAR genere\n", "BATCH_CODE\t%s\n" % batch_code]
+    lines += ["%s\t%s\n" % (key, value) for key, value in key_values]
+    if fin:
+        lines.append("FIN\n")
+    return lines
+
+
+def _write_par(path: Path, lines):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("".join(lines), encoding="utf-8")
+    return path
+
+
+def _baseline_apply_rules_on_single_par_file(cz, par_file_lines, rules_to_apply, date_traitement_YYYYMMDD):
+    # Boucle DataFrame d'origine (avant compile_rules_plans), reference de non-regression
+    for idx, rule in rules_to_apply.iterrows():
+        KEY_SEARCH = rule[cz.ARGUMENT]
+        RULENAME_OR_FIXVALUE = rule[cz.VALEUR]
+        MODE_UPDATE_OR_NEW = rule[cz.MODE_TRT].lower()
+        if RULENAME_OR_FIXVALUE == cz.RULE__DATE_MOIS_PRECEDENT:
+            (success, value) = cz.genere_rule_mois_principal_declare(date_traitement_YYYYMMDD)
+            if not success:
+                continue
+            RULENAME_OR_FIXVALUE = value
+        key_found = False
+        for lineno, line in enumerate(par_file_lines):
+            if line.startswith(f"{KEY_SEARCH}\t"):
+                key_found = True
+                par_file_lines[lineno] = f"{KEY_SEARCH}\t{RULENAME_OR_FIXVALUE}\n"
+                break
+        if not key_found and MODE_UPDATE_OR_NEW == 'new':
+            for index, line in enumerate(par_file_lines):
+                if line.strip() == 'FIN':
+                    par_file_lines.insert(index, f"{KEY_SEARCH}\t{RULENAME_OR_FIXVALUE}\n")
+                    break
+    return par_file_lines
+
+
+@pytest.fixture()
+def cz(tmp_path):
+    """
+    Recharge le module a chaque test et initialise des globals coherents.
+    """
+    m = _reload_module()
+    m.logger = _make_logger()
+    m.archive_original_files = False
+    m.param_workers = 1
+    m.param_workers_mode = m.WORKERS_MODE_THREAD
+    m.param_par_full_scan = False
+    m.param_incremental = False
+    return m
+
+
+# -------- Tests: Plan de regles compile (compile_rules_plans) --------
+
+def test_compile_rules_plans_groups_rules_by_batch_code_in_order(cz):
+    plans = cz.compile_rules_plans(_rules_df(cz, [
+        ("R001", "BC-A", "NEW", "k1", "v1"),
+        ("R002", "BC-B", "update", "k2", "v2"),
+        ("R003", "BC-A", "update", "k3", "v3"),
+    ]), "20251223")
+
+    assert sorted(plans) == ["BC-A", "BC-B"]
+    assert [(rule.rule_num, rule.mode, rule.key, rule.value) for rule in plans["BC-A"].rules] == [
+        ("R001", "new", "k1", "v1"), ("R003", "update", "k3", "v3")]
+    assert plans["BC-A"].keys == frozenset({"k1", "k3"})
+
+
+def test_compile_rules_plans_resolves_date_mois_precedent_once(cz, monkeypatch):
+    calls = []
+    real_generate = cz.genere_rule_mois_principal_declare
+    monkeypatch.setattr(cz, "genere_rule_mois_principal_declare",
+                        lambda date: calls.append(date) or real_generate(date))
+
+    plans = cz.compile_rules_plans(_rules_df(cz, [
+        ("R001", "BC-A", "new", "moisPrincipalDeclare", "DATE_MOIS_PRECEDENT"),
+        ("R002", "BC-B", "new", "moisPrincipalDeclare", "DATE_MOIS_PRECEDENT"),
+        ("R003", "BC-B", "new", "autre", "FIXE"),
+    ]), "20251223")
+
+    assert calls == ["20251223"]
+    assert plans["BC-A"].rules[0].value == "01/11/2025"
+    assert plans["BC-B"].rules[0].value == "01/11/2025"
+    assert plans["BC-B"].rules[0].source_value == "DATE_MOIS_PRECEDENT"
+
+
+# -------- Tests: Application d'un plan sur un .par --------
+
+def test_apply_rules_updates_existing_key_and_adds_new_key(cz):
+    plans = cz.compile_rules_plans(_rules_df(cz, [
+        ("R001", "BC-A", "new", "existing", "NEWVAL"),
+        ("R002", "BC-A", "new", "added", "ADDVAL"),
+    ]), "20251223")
+    lines = _par_lines("BC-A", ("existing", "OLDVAL"), ("other", "X"))
+
+    success, updated = cz.apply_rules_on_single_par_file(lines, plans["BC-A"], "20251223", "BC-A", "a.par")
+
+    assert success is True
+    assert updated == _par_lines("BC-A", ("existing", "NEWVAL"), ("other", "X"), ("added", "ADDVAL"))
+
+
+def test_apply_rules_update_mode_leaves_missing_key_untouched(cz):
+    plans = cz.compile_rules_plans(_rules_df(cz, [("R001", "BC-A", "update", "absent", "V")]), "20251223")
+    lines = _par_lines("BC-A", ("other", "X"))
+
+    success, updated = cz.apply_rules_on_single_par_file(list(lines), plans["BC-A"], "20251223", "BC-A", "a.par")
+
+    assert success is False
+    assert updated == lines
+
+
+def test_apply_rules_new_keys_inserted_before_fin_in_rule_order(cz):
+    plans = cz.compile_rules_plans(_rules_df(cz, [
+        ("R001", "BC-A", "new", "zeta", "1"),
+        ("R002", "BC-A", "new", "alpha", "2"),
+        ("R003", "BC-A", "new", "mid", "3"),
+    ]), "20251223")
+    lines = _par_lines("BC-A", ("other", "X")) + ["apres\tFIN\n"]
+
+    success, updated = cz.apply_rules_on_single_par_file(lines, plans["BC-A"], "20251223", "BC-A", "a.par")
+
+    assert success is True
+    assert updated[-5:] == ["zeta\t1\n", "alpha\t2\n", "mid\t3\n", "FIN\n", "apres\tFIN\n"]
+
+
+def test_apply_rules_without_fin_line_adds_nothing(cz):
+    plans = cz.compile_rules_plans(_rules_df(cz, [
+        ("R001", "BC-A", "new", "added", "V"),
+        ("R002", "BC-A", "update", "other", "Y"),
+    ]), "20251223")
+    lines = _par_lines("BC-A", ("other", "X"), fin=False)
+
+    success, updated = cz.apply_rules_on_single_par_file(lines, plans["BC-A"], "20251223", "BC-A", "a.par")
+
+    # seule la mise a jour est appliquee, pas d'ajout sans FIN
+    assert success is True
+    assert updated == _par_lines("BC-A", ("other", "Y"), fin=False)
+
+
+def test_apply_rules_matches_baseline_dataframe_loop_byte_for_byte(cz):
+    rules = [
+        ("R001", "BC-A", "new", "moisPrincipalDeclare", "DATE_MOIS_PRECEDENT"),
+        ("R002", "BC-A", "NEW", "existing", "NEWVAL"),
+        ("R003", "BC-A", "update", "absent", "IGNORED"),
+        ("R004", "BC-A", "update", "dup", "FIRST_ONLY"),
+        ("R005", "BC-A", "new", "zz_added", "Z"),
+        # KEY repetees : regle suivante sur une KEY ajoutee ou deja mise a jour
+        ("R006", "BC-A", "new", "k", "v1"),
+        ("R007", "BC-A", "update", "k", "v2"),
+        ("R008", "BC-A", "new", "k2", "w1"),
+        ("R009", "BC-A", "new", "k2", "w2"),
+        ("R010", "BC-A", "update", "existing", "AGAIN"),
+        ("R011", "BC-A", "new", "zz_added", "Z2"),
+    ]
+    df_rules = _rules_df(cz, rules)
+    plans = cz.compile_rules_plans(df_rules, "20251210")
+    samples = [
+        _par_lines("BC-A", ("existing", "OLD"), ("dup", "1"), ("dup", "2"), ("existingSuffix", "S")),
+        _par_lines("BC-A", ("moisPrincipalDeclare", "01/01/2020"), ("dup", "1")) + ["APRES_FIN\tX\n"],
+        _par_lines("BC-A", ("existing", "OLD"), fin=False),
+        ["BATCH_CODE\tBC-A\r\n", "existing\tOLD\r\n", "  FIN  \r\n"],
+        ["BATCH_CODE\tBC-A\n", "a\t1\n", "FIN\n"],
+        _par_lines("BC-A", ("k2", "present")),
+    ]
+
+    for sample in samples:
+        expected = "".join(_baseline_apply_rules_on_single_par_file(cz, list(sample), df_rules, "20251210"))
+        _, updated = cz.apply_rules_on_single_par_file(list(sample), plans["BC-A"], "20251210", "BC-A", "a.par")
+        assert "".join(updated).encode("utf-8") == expected.encode("utf-8")
+
+
+def test_apply_rules_repeated_key_updates_line_added_by_previous_rule(cz):
+    lines = ["BATCH_CODE\tB\n", "a\t1\n", "FIN\n"]
+    for second_mode in ("update", "new"):
+        plans = cz.compile_rules_plans(_rules_df(cz, [
+            ("R001", "B", "new", "k", "v1"),
+            ("R002", "B", second_mode, "k", "v2"),
+        ]), "20251223")
+
+        success, updated = cz.apply_rules_on_single_par_file(list(lines), plans["B"], "20251223", "B", "b.par")
+
+        assert success is True
+        assert updated == ["BATCH_CODE\tB\n", "a\t1\n", "k\tv2\n", "FIN\n"]
+
+
+# -------- Tests: Personnalisation des .par (--workers) et code retour --------
+
+@pytest.mark.parametrize("workers_mode", ["thread", "process"])
+def test_failing_par_in_workers_returns_failed_apply_rules(cz, tmp_path, workers_mode):
+    pars = tmp_path / "pars"
+    _write_par(pars / "X_BC-A_1.par", _par_lines("BC-A"))
+    _write_par(pars / "X_BC-A_2.par", _par_lines("BC-A"))
+    (pars / "illisible.par").write_bytes(b"BATCH_CODE\t\xff\xfe\nFIN\n")
+    cz.param_workers = 2
+    cz.param_workers_mode = workers_mode
+    plans = cz.compile_rules_plans(_rules_df(cz, [("R001", "BC-A", "new", "k", "v")]), "20251223")
+
+    rc = cz.apply_rules_on_par_files(plans, str(pars) + "/", "20251223")
+
+    assert rc == cz.RC_FAILED_APPLY_RULES
+    # les autres .par sont personnalises malgre l'erreur
+    assert sorted(p.name for p in pars.glob("*_updated.par")) == ["X_BC-A_1_updated.par", "X_BC-A_2_updated.par"]
+
+
+def test_main_propagates_failed_apply_rules(cz, tmp_path, monkeypatch):
+    pars = tmp_path / "pars"
+    (pars / "illisible.par").parent.mkdir(parents=True)
+    (pars / "illisible.par").write_bytes(b"\xff\xfe")
+    df_rules = _rules_df(cz, [("R001", "BC-A", "new", "k", "v")])
+    monkeypatch.setattr(cz, "parseArgs", lambda: True)
+    monkeypatch.setattr(cz, "logger_path_generation", lambda: "./")
+    monkeypatch.setattr(cz, "startLogger", lambda: "")
+    monkeypatch.setattr(cz, "check_rules_file", lambda *args: (True, df_rules))
+    cz.par_file_path = str(pars) + "/"
+    cz.param_dateTraitement = "20251223"
+
+    assert cz.main() == cz.RC_FAILED_APPLY_RULES
+
+    (pars / "illisible.par").unlink()
+    _write_par(pars / "X_BC-A_1.par", _par_lines("BC-A"))
+    assert cz.main() == cz.RC_SUCCESS
+
+
+# -------- Tests: BATCH_CODE lu en entete et cache par .par --------
+
+def test_batch_code_cache_hit_then_invalidated_on_mtime_or_size_change(cz, tmp_path, monkeypatch):
+    pars = tmp_path / "pars"
+    par = _write_par(pars / "horsconvention.par", _par_lines("BC-A"))
+    plans = cz.compile_rules_plans(_rules_df(cz, [("R001", "BC-B", "new", "k", "v")]), "20251223")
+    par_file_path = str(pars) + "/"
+
+    assert cz.apply_rules_on_par_files(plans, par_file_path, "20251223") == cz.RC_SUCCESS
+    cache = cz.load_batch_code_cache(str(pars / cz.BATCH_CODE_CACHE_FILENAME))
+    assert cache["horsconvention.par"] == cz.par_file_signature(str(par)) + ["BC-A"]
+
+    # .par inchange : BATCH_CODE repris du cache, entete non relue
+    sniffed = []
+    real_sniff = cz.sniff_par_batch_code
+    monkeypatch.setattr(cz, "sniff_par_batch_code", lambda path: sniffed.append(path) or real_sniff(path))
+    cz.apply_rules_on_par_files(plans, par_file_path, "20251223")
+    assert sniffed == []
+
+    # mtime modifiee, puis taille modifiee : entete relue
+    stat = par.stat()
+    os.utime(par, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+    cz.apply_rules_on_par_files(plans, par_file_path, "20251223")
+    assert sniffed == [str(par)]
+    _write_par(par, _par_lines("BC-A", ("autre", "X")))
+    cz.apply_rules_on_par_files(plans, par_file_path, "20251223")
+    assert sniffed == [str(par), str(par)]
+
+
+def test_batch_code_cache_keeps_entries_of_par_not_read_by_the_run(cz, tmp_path):
+    pars = tmp_path / "pars"
+    ignored = _write_par(pars / "X_BC-Z_1.par", _par_lines("BC-Z"))
+    _write_par(pars / "horsconvention.par", _par_lines("BC-A"))
+    cache_path = str(pars / cz.BATCH_CODE_CACHE_FILENAME)
+    cz.save_batch_code_cache(cache_path, {
+        "X_BC-Z_1.par": cz.par_file_signature(str(ignored)) + ["BC-Z"],
+        "disparu.par": [1, 1, "BC-Z"],
+    })
+    plans = cz.compile_rules_plans(_rules_df(cz, [("R001", "BC-B", "new", "k", "v")]), "20251223")
+
+    cz.apply_rules_on_par_files(plans, str(pars) + "/", "20251223")
+
+    # X_BC-Z_1.par ecarte par son nom (non lu) : entree conservee ; .par disparu retire
+    assert sorted(cz.load_batch_code_cache(cache_path)) == ["X_BC-Z_1.par", "horsconvention.par"]
+
+
+def test_sniff_batch_code_bounded_to_header(cz, tmp_path, monkeypatch):
+    monkeypatch.setattr(cz, "PAR_HEADER_SNIFF_MAX_BYTES", 64)
+    short = _write_par(tmp_path / "court.par", ["# entete\n", "BATCH_CODE\tBC-A\n", "FIN\n"])
+    no_code = _write_par(tmp_path / "sans.par", ["# entete\n", "FIN\n"])
+    late = _write_par(tmp_path / "tardif.par", ["# %s\n" % ("x" * 70), "BATCH_CODE\tBC-A\n", "FIN\n"])
+    cut = _write_par(tmp_path / "coupe.par", ["# %s\n" % ("x" * 50), "BATCH_CODE\tBC-A" + "A" * 20 + "\n"])
+
+    assert cz.sniff_par_batch_code(str(short)) == "BC-A"
+    assert cz.sniff_par_batch_code(str(no_code)) == ""
+    # BATCH_CODE au-dela de la limite, ou coupe par la limite : non trouve
+    assert cz.sniff_par_batch_code(str(late)) is None
+    assert cz.sniff_par_batch_code(str(cut)) is None
+
+    # .par ignore sans mise en cache d'un BATCH_CODE inconnu
+    plans = cz.compile_rules_plans(_rules_df(cz, [("R001", "BC-A", "new", "k", "v")]), "20251223")
+    status, records, batch_code, written = cz.customize_par_file(str(late), None, plans, "20251223", False)
+    assert (status, batch_code, written) == (cz.PAR_STATUS_SKIPPED, None, None)
+    assert any("BATCH_CODE not found in PAR header" in msg for _, msg in records)
+
+
+# -------- Tests: Selection des .par par convention de nommage --------
+
+def test_par_file_masks_follow_batch_launcher_unanchored_interface_match(cz):
+    assert cz.par_file_masks_for_batch_code("INTERFACE-ABC") == ["GenericBatch_INTERFACE-ABC_*.par"]
+    assert cz.par_file_masks_for_batch_code("DSN-INTERFACE-ABC") == ["GenericBatch_DSN-INTERFACE-ABC_*.par"]
+    assert cz.par_file_masks_for_batch_code("DSN-EXPORT") == ["*_DSN-EXPORT_*.par"]
+
+
+def test_par_files_selected_by_name_with_content_fallback(cz, tmp_path):
+    pars = tmp_path / "pars"
+    for name, batch_code in [
+        ("GenericBatch_DSN-INTERFACE-ABC_1.par", "DSN-INTERFACE-ABC"),  # index par nom (INTERFACE)
+        ("CLEVA_BC-A_20251223.par", "BC-A"),                            # index par nom (PROGICIEL)
+        ("CLEVA_BC-Z_20251223.par", "BC-A"),                            # convention, autre BATCH_CODE
+        ("horsconvention.par", "BC-A"),                                  # repli sur le contenu
+    ]:
+        _write_par(pars / name, _par_lines(batch_code))
+    _write_par(pars / ".cache_BC-A_x.par", _par_lines("BC-A"))
+    par_file_path = str(pars) + "/"
+
+    index, fallback, ignored = cz.index_par_files_by_batch_code(par_file_path, {"BC-A", "DSN-INTERFACE-ABC"})
+    assert index == {"BC-A": [par_file_path + "CLEVA_BC-A_20251223.par"],
+                     "DSN-INTERFACE-ABC": [par_file_path + "GenericBatch_DSN-INTERFACE-ABC_1.par"]}
+    assert fallback == [par_file_path + "horsconvention.par"]
+    assert ignored == 1
+
+    plans = cz.compile_rules_plans(_rules_df(cz, [
+        ("R001", "BC-A", "new", "k", "v"),
+        ("R002", "DSN-INTERFACE-ABC", "new", "k", "v"),
+    ]), "20251223")
+    assert cz.apply_rules_on_par_files(plans, par_file_path, "20251223") == cz.RC_SUCCESS
+    # le .par nomme pour BC-Z n'est ni lu ni personnalise, meme si son contenu porte BC-A
+    assert sorted(p.name for p in pars.glob("[!.]*.par")) == [
+        "CLEVA_BC-A_20251223_updated.par", "CLEVA_BC-Z_20251223.par",
+        "GenericBatch_DSN-INTERFACE-ABC_1_updated.par", "horsconvention_updated.par"]
+
+
+# -------- Tests: Mode incremental (journal SQLite) --------
+
+def _journaled_par_filenames(cz, pars):
+    par_journal = cz.open_par_journal(str(pars) + "/")
+    try:
+        return sorted(cz.load_par_journal(par_journal))
+    finally:
+        par_journal.close()
+
+
+@pytest.fixture()
+def incremental(cz, tmp_path, monkeypatch):
+    """
+    .par BC-A dans tmp_path/pars, mode incremental actif ; customized liste les .par traites par run.
+    """
+    pars = tmp_path / "pars"
+    _write_par(pars / "X_BC-A_1.par", _par_lines("BC-A"))
+    cz.param_incremental = True
+    customized = []
+    real_customize = cz.customize_par_file
+    monkeypatch.setattr(cz, "customize_par_file",
+                        lambda parfilepath, *args, **kwargs: customized.append(os.path.basename(parfilepath))
+                        or real_customize(parfilepath, *args, **kwargs))
+
+    def run(value="v", date="20251223"):
+        customized.clear()
+        plans = cz.compile_rules_plans(_rules_df(cz, [("R001", "BC-A", "new", "k", value)]), date)
+        rc = cz.apply_rules_on_par_files(plans, str(pars) + "/", date)
+        return rc, list(customized)
+    return pars, run
+
+
+def test_incremental_skips_par_already_customized(cz, incremental):
+    pars, run = incremental
+    assert run() == (cz.RC_SUCCESS, ["X_BC-A_1.par"])
+    assert _journaled_par_filenames(cz, pars) == ["X_BC-A_1_updated.par"]
+
+    assert run() == (cz.RC_SUCCESS, [])
+    # identite modifiee mais contenu identique : toujours ignore
+    par = pars / "X_BC-A_1_updated.par"
+    par.write_bytes(par.read_bytes())
+    assert run() == (cz.RC_SUCCESS, [])
+
+
+def test_incremental_reapplies_when_rules_or_date_plan_change(cz, incremental):
+    pars, run = incremental
+    run()
+
+    assert run(value="v2") == (cz.RC_SUCCESS, ["X_BC-A_1_updated.par"])
+    assert "k\tv2\n" in (pars / "X_BC-A_1_updated.par").read_text(encoding="utf-8")
+    assert run(value="v2") == (cz.RC_SUCCESS, [])
+
+    assert run(value="v2", date="20251224") == (cz.RC_SUCCESS, ["X_BC-A_1_updated.par"])
+    assert run(value="v2", date="20251224") == (cz.RC_SUCCESS, [])
+
+
+def test_incremental_reapplies_when_par_edited_after_journal(cz, incremental):
+    pars, run = incremental
+    run()
+    par = pars / "X_BC-A_1_updated.par"
+    # meme taille, contenu different
+    par.write_text(par.read_text(encoding="utf-8").replace("k\tv", "k\tw"), encoding="utf-8")
+    stat = par.stat()
+    os.utime(par, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+
+    assert run() == (cz.RC_SUCCESS, ["X_BC-A_1_updated.par"])
+    assert "k\tv\n" in par.read_text(encoding="utf-8")
+
+
+def test_incremental_does_not_journal_par_that_failed_to_save(cz, incremental, monkeypatch):
+    pars, run = incremental
+    monkeypatch.setattr(cz, "save_updated_file", lambda *args, **kwargs: False)
+
+    assert run() == (cz.RC_FAILED_APPLY_RULES, ["X_BC-A_1.par"])
+    assert _journaled_par_filenames(cz, pars) == []
+    assert run() == (cz.RC_FAILED_APPLY_RULES, ["X_BC-A_1.par"])
@@ -2,6 +2,7 @@
 import os
 import stat
 import csv
+import json
 import importlib
 import logging
 from pathlib import Path
@@ -196,6 +197,64 @@ def test_plan_latest_yyyymmdd_selects_latest(mod, tmp_path):
     assert plan[0]["files"] == ["A.par"]
 
 
+def test_latest_yyyymmdd_ignores_invalid_dates_and_files(mod, tmp_path):
+    base = tmp_path / "arch"
+    for name in ["20240229", "20250101", "20251301", "20250230", "2025010", "notadate"]:
+        _mk_yyyymmdd_dir(base, name)
+    _touch(base / "20991231", b"stray file")
+
+    assert mod.find_latest_yyyymmdd_subdir(str(base)) == str(base / "20250101")
+    assert mod.list_yyyymmdd_subdirs(str(base), limit=5) == [str(base / "20250101"), str(base / "20240229")]
+    assert mod.list_yyyymmdd_subdirs(str(base), not_after="20241231") == [str(base / "20240229")]
+    assert mod.find_latest_yyyymmdd_subdir(str(base), not_after="20231231") is None
+
+
+def test_plan_latest_yyyymmdd_dateplan_selects_latest_on_or_before_plan_date(mod, tmp_path):
+    base = tmp_path / "interfaces" / "in" / "arch"
+    _touch(_mk_yyyymmdd_dir(base, "20250101") / "A.par", b"a1")
+    _touch(_mk_yyyymmdd_dir(base, "20251201") / "A.par", b"a2")
+    mod.param_date_traitement = "20250601"
+
+    _write_csv(Path(mod.param_ref_mapping_path), rows=[{
+        "type": "CLEVA", "source": "in/arch", "destination": "pars/CCO/WAIT",
+        "prefix01": "*.par", "date_policy": "latest_yyyymmdd_dateplan",
+    }])
+
+    plan, rc = mod.prepare_copy_plan_from_reference()
+    assert rc == mod.RC_OK
+    assert plan[0]["source"].replace("\\", "/").endswith("/in/arch/20250101")
+
+
+def test_plan_rows_sharing_source_and_policy_resolved_once(mod, tmp_path, monkeypatch):
+    base = tmp_path / "interfaces" / "in" / "arch"
+    _touch(_mk_yyyymmdd_dir(base, "20250101") / "A.par", b"a1")
+    _touch(_mk_yyyymmdd_dir(base, "20251201") / "A.par", b"a2")
+
+    _write_csv(Path(mod.param_ref_mapping_path), rows=[
+        {"type": "CLEVA", "source": "in/arch", "destination": "pars/CCO/WAIT",
+         "prefix01": "*.par", "extension01": "", "date_policy": "LATEST_YYYYMMDD"},
+        {"type": "CLEVA", "source": "in/arch", "destination": "pars/CCO/DONE",
+         "prefix01": "A", "extension01": ".par", "date_policy": "LATEST_YYYYMMDD"},
+        {"type": "CLEVA", "source": "in/missing", "destination": "pars/CCO/WAIT", "prefix01": "*.par"},
+        {"type": "CLEVA", "source": "in/missing", "destination": "pars/CCO/DONE", "prefix01": "*.par"},
+    ])
+
+    latest_calls = []
+    find_latest = mod.find_latest_yyyymmdd_subdir
+
+    def spy(path, fs_stats=None, **kwargs):
+        latest_calls.append(path)
+        return find_latest(path, fs_stats, **kwargs)
+    monkeypatch.setattr(mod, "find_latest_yyyymmdd_subdir", spy)
+
+    resolution_cache = {}
+    plan, rc = mod.prepare_copy_plan_from_reference(resolution_cache=resolution_cache)
+    assert rc == mod.RC_OK
+    assert len(latest_calls) == 1
+    assert len(resolution_cache) == 2
+    assert [p["source"].replace("\\", "/").endswith("/in/arch/20251201") for p in plan] == [True, True]
+
+
 def test_plan_latest_yyyymmdd_no_valid_subdir_ignored(mod, tmp_path):
     base = tmp_path / "interfaces" / "in" / "arch"
     (base / "bad").mkdir(parents=True, exist_ok=True)
@@ -233,6 +292,172 @@ def test_plan_star_prefix_removed_when_specific_exists(mod, tmp_path):
     assert plan[0]["files"] == ["AA.par"]
 
 
+def test_plan_rows_sharing_source_list_directory_once(mod, tmp_path):
+    src = tmp_path / "interfaces" / "in" / "flow"
+    _touch(src / "A.par", b"a")
+    _touch(src / "B.xml", b"b")
+    _touch(src / ".hidden.par", b"h")
+
+    _write_csv(Path(mod.param_ref_mapping_path), rows=[
+        {"type": "CLEVA", "source": "in/flow", "destination": "pars/CCO/WAIT",
+         "prefix01": "*.par", "prefix02": "*.xml"},
+        {"type": "CLEVA", "source": "in/flow", "destination": "pars/CCO/DONE",
+         "prefix01": "*.par", "prefix02": ""},
+    ])
+
+    listing_cache = {}
+    plan, rc = mod.prepare_copy_plan_from_reference(listing_cache=listing_cache)
+    assert rc == mod.RC_OK
+    assert len(listing_cache) == 1
+    assert plan[0]["files"] == ["A.par", "B.xml"]
+    assert plan[1]["files"] == ["A.par"]
+
+
+def test_plan_generator_yields_task_before_next_row_is_resolved(mod, tmp_path):
+    _touch(tmp_path / "interfaces" / "in" / "flow1" / "A.par", b"a")
+    _touch(tmp_path / "interfaces" / "in" / "flow2" / "B.par", b"b")
+    _write_csv(Path(mod.param_ref_mapping_path), rows=[
+        {"type": "CLEVA", "source": "in/flow1", "destination": "pars/CCO/WAIT", "prefix01": "*.par"},
+        {"type": "CLEVA", "source": "in/flow2", "destination": "pars/CCO/DONE", "prefix01": "*.par"},
+    ])
+
+    resolution_cache = {}
+    plan_stream = mod.iter_copy_plan_from_reference(resolution_cache=resolution_cache)
+    first = next(plan_stream)
+    assert len(resolution_cache) == 1
+    assert isinstance(first, mod.CopyTask)
+    assert (first["files"], first.get("purge"), first.get("missing", "x")) == (["A.par"], False, "x")
+    assert first == {"source": first.source, "destination": first.destination, "files": ["A.par"], "purge": False}
+
+    second = next(plan_stream)
+    assert second.files == ["B.par"]
+    with pytest.raises(StopIteration) as stop:
+        next(plan_stream)
+    assert stop.value.value == mod.RC_OK
+
+
+def test_plan_tasks_carry_scan_stat_reused_by_copy(mod, tmp_path, monkeypatch):
+    src = tmp_path / "interfaces" / "in" / "flow"
+    _touch(src / "A.par", b"abc")
+    dest = tmp_path / "webdav" / "tech" / mod.param_date_traitement / "pars" / "CCO" / "DONE"
+    _touch(dest / "A.par.txt", b"stale")
+    _write_csv(Path(mod.param_ref_mapping_path), rows=[
+        {"type": "CLEVA", "source": "in/flow", "destination": "pars/CCO/DONE", "prefix01": "*.par"},
+    ])
+
+    plan, rc = mod.prepare_copy_plan_from_reference()
+    assert rc == mod.RC_OK
+    entry = plan[0].file_entries["A.par"]
+    assert (entry.name, entry.st_size) == ("A.par", 3)
+    assert entry.st_mtime_ns == (src / "A.par").stat().st_mtime_ns
+
+    # Comparaison sync_mode sur le stat du scan, sans nouveau stat de la source
+    seen = []
+    real_needs_update = mod.destination_needs_update
+    monkeypatch.setattr(mod, "destination_needs_update",
+                        lambda *args, **kwargs: seen.append(kwargs["source_stat"]) or real_needs_update(*args, **kwargs))
+    mod.param_sync_mode = mod.SYNC_MODE_STAT
+    assert mod.copy_files_to_webdav(plan) == (1, mod.RC_OK)
+    assert seen == [entry]
+    assert (dest / "A.par.txt").read_bytes() == b"abc"
+
+
+def test_filename_matcher_classify_single_pass(mod):
+    matcher = mod.FilenameMatcher(["X_*.par", "C.par.txt", ".*.par"], ["*DSN-*.par", "X_002.par"])
+    entries = [
+        ("X_001.par", True),
+        ("X_002.par", True),       # exclusion litterale
+        ("X_DSN-1.par", True),     # exclusion par motif
+        ("C.par.txt", True),       # inclusion litterale
+        (".X_003.par", True),      # cache: retenu uniquement via le motif '.*.par'
+        ("X_dir.par", False),      # dossier: ignore
+        ("Y_001.par", True),
+    ]
+    matched, excluded = matcher.classify(entries)
+    assert matched == ["X_001.par", "C.par.txt", ".X_003.par"]
+    assert excluded == ["X_002.par", "X_DSN-1.par"]
+
+
+def test_load_mapping_rows_typed_rows_with_bom_and_blank_lines(mod, tmp_path):
+    csv_path = tmp_path / "mapping_bom.csv"
+    csv_path.write_text(
+        "\ufefftype ; source;destination;prefix01;prefix02;extension01;exclude_prefix01;purge;date_policy\n"
+        "cleva;in/flow;/pars/CCO/WAIT;A_;;.par;*DSN*;yes;latest_yyyymmdd\n"
+        "\n"
+        "DSN;in/dsn;pars/DSN/DONE\n",
+        encoding="utf-8",
+    )
+    rows, rc = mod.load_mapping_rows(str(csv_path))
+    assert rc == mod.RC_OK
+    assert len(rows) == 2
+    first, second = rows
+    assert (first.row_type, first.source, first.destination) == ("CLEVA", "in/flow", "pars/CCO/WAIT")
+    assert first.prefixes == ["A_"]
+    assert first.extensions == [".par"]
+    assert first.exclude_prefixes == ["*DSN*"]
+    assert first.purge is True
+    assert first.date_policy == "LATEST_YYYYMMDD"
+    assert (second.row_type, second.prefixes, second.purge, second.date_policy) == ("DSN", [], False, "")
+
+
+def test_load_mapping_rows_too_many_values_is_invalid(mod, tmp_path):
+    csv_path = tmp_path / "mapping_bad.csv"
+    csv_path.write_text("type;source;destination\nCLEVA;in/flow;pars/CCO/WAIT;extra\n", encoding="utf-8")
+    rows, rc = mod.load_mapping_rows(str(csv_path))
+    assert rows == []
+    assert rc == mod.RC_CONFIG_INVALID
+
+
+def test_compiled_mapping_reused_then_invalidated_on_csv_change(mod, tmp_path, monkeypatch):
+    src = tmp_path / "interfaces" / "in" / "flow"
+    _touch(src / "A.par", b"a")
+    _touch(src / "B.xml", b"b")
+    mapping_path = Path(mod.param_ref_mapping_path)
+    _write_csv(mapping_path, rows=[{"type": "CLEVA", "source": "in/flow", "destination": "pars/CCO/WAIT",
+                                    "prefix01": "*", "prefix02": "A", "extension01": "**.par"}])
+
+    plan, rc = mod.prepare_copy_plan_from_reference()
+    assert rc == mod.RC_OK
+    assert plan[0]["files"] == ["A.par"]
+    compiled_path = Path(mod.get_compiled_mapping_path(str(mapping_path)))
+    assert json.loads(compiled_path.read_text(encoding="utf-8"))["rows"][0]["filename_masks"] == ["A*.par"]
+
+    # CSV inchange: lignes recharges depuis le cache JSON, matchers reconstruits, sans relecture du CSV
+    def fail_load(mapping_path):
+        raise AssertionError("CSV relu malgre le mapping compile")
+    monkeypatch.setattr(mod, "load_mapping_rows", fail_load)
+    rows, rc = mod.load_compiled_mapping(str(mapping_path))
+    assert rc == mod.RC_OK
+    assert rows[0].filename_masks == ["A*.par"]
+    assert rows[0].prefixes == ["A"]
+    assert rows[0].matcher.is_included("A.par")
+    assert not rows[0].matcher.is_included("B.xml")
+
+    # CSV modifie: cache invalide, recompilation
+    monkeypatch.undo()
+    _write_csv(mapping_path, rows=[{"type": "CLEVA", "source": "in/flow", "destination": "pars/CCO/WAIT",
+                                    "prefix01": "*.xml"}])
+    plan, rc = mod.prepare_copy_plan_from_reference()
+    assert rc == mod.RC_OK
+    assert plan[0]["files"] == ["B.xml"]
+
+
+def test_compiled_mapping_invalid_cache_entry_recompiled(mod, tmp_path):
+    mapping_path = Path(mod.param_ref_mapping_path)
+    _write_csv(mapping_path, rows=[{"type": "CLEVA", "source": "in/flow", "destination": "pars/CCO/WAIT",
+                                    "prefix01": "*.par"}])
+    mod.load_compiled_mapping(str(mapping_path))
+    compiled_path = Path(mod.get_compiled_mapping_path(str(mapping_path)))
+    compiled = json.loads(compiled_path.read_text(encoding="utf-8"))
+    compiled["rows"][0]["basename_masks"] = "*"
+    compiled_path.write_text(json.dumps(compiled), encoding="utf-8")
+
+    rows, rc = mod.load_compiled_mapping(str(mapping_path))
+    assert rc == mod.RC_OK
+    assert rows[0].basename_masks == ["*.par"]
+    assert json.loads(compiled_path.read_text(encoding="utf-8"))["rows"][0]["basename_masks"] == ["*.par"]
+
+
 # -------- Tests: Copy (copy_plan -> fs) --------
 
 def test_copy_creates_destination_dir_and_copies_with_txt(mod, tmp_path):
@@ -460,3 +685,463 @@ def test_match_domain_destination_exact_wait_and_done(mod, tmp_path):
     domain, kind, w, d = mod.match_domain_destination(str(done))
     assert domain == "CCO"
     assert kind == "DONE"
+
+
+# -------- Tests: Copie parallele (--workers) --------
+
+def test_parallel_copy_copies_all_files_with_exact_total(mod, tmp_path):
+    src = tmp_path / "interfaces" / "in" / "flow"
+    names = ["F%03d.par" % i for i in range(40)]
+    for name in names:
+        _touch(src / name, name.encode())
+
+    dest = tmp_path / "webdav" / "tech" / mod.param_date_traitement / "pars" / "CCO" / "WAIT"
+    _touch(dest / "F000.par.txt", b"already")
+
+    plan = [{
+        "source": str(src),
+        "destination": str(dest).replace("\\", "/"),
+        "files": names,
+        "purge": False,
+    }]
+
+    total, rc = mod.copy_files_to_webdav(plan, workers=8)
+    assert rc == mod.RC_OK
+    assert total == len(names) - 1
+    assert (dest / "F000.par.txt").read_bytes() == b"already"
+    assert (dest / "F039.par.txt").read_bytes() == b"F039.par"
+
+
+def test_parallel_copy_done_before_wait(mod, tmp_path):
+    """
+    Plan non trie (WAIT avant DONE): en parallele, DONE est copie en premier,
+    le WAIT equivalent est donc ignore.
+    """
+    src = tmp_path / "interfaces" / "in" / "flow"
+    _touch(src / "A.par", b"a")
+
+    base = tmp_path / "webdav" / "tech" / mod.param_date_traitement / "pars" / "CCO"
+    plan = [
+        {"source": str(src), "destination": str(base / "WAIT").replace("\\", "/"),
+         "files": ["A.par"], "purge": False},
+        {"source": str(src), "destination": str(base / "DONE").replace("\\", "/"),
+         "files": ["A.par"], "purge": False},
+    ]
+
+    total, rc = mod.copy_files_to_webdav(plan, workers=4)
+    assert rc == mod.RC_OK
+    assert total == 1
+    assert (base / "DONE" / "A.par.txt").exists()
+    assert not (base / "WAIT" / "A.par.txt").exists()
+
+
+def test_pipeline_purges_then_copies_done_before_wait(mod, tmp_path):
+    src = tmp_path / "interfaces" / "in" / "flow"
+    _touch(src / "A.par", b"a")
+    _touch(src / "B.xml", b"b")
+
+    base = tmp_path / "webdav" / "tech" / mod.param_date_traitement / "pars" / "CCO"
+    _touch(base / "DONE" / "OLD.par.txt", b"old")
+    _touch(base / "DONE" / "A.par.txt", b"stale")
+
+    # WAIT planifie avant DONE, DONE purge=YES
+    _write_csv(Path(mod.param_ref_mapping_path), rows=[
+        {"type": "CLEVA", "source": "in/flow", "destination": "pars/CCO/WAIT",
+         "prefix01": "*.par", "prefix02": "*.xml", "purge": ""},
+        {"type": "CLEVA", "source": "in/flow", "destination": "pars/CCO/DONE",
+         "prefix01": "A.*", "prefix02": "", "purge": "YES"},
+    ])
+
+    plan, rc_plan, total, rc_copy = mod.copy_files_to_webdav_pipeline(workers=2)
+    assert rc_plan == mod.RC_OK
+    assert (total, rc_copy) == (2, mod.RC_OK)
+    assert [task["destination"].rsplit("/", 1)[-1] for task in plan] == ["WAIT", "DONE"]
+    assert sorted(p.name for p in (base / "DONE").iterdir()) == ["A.par.txt"]
+    assert (base / "DONE" / "A.par.txt").read_bytes() == b"a"
+    # A.par deja en DONE: non copie en WAIT
+    assert sorted(p.name for p in (base / "WAIT").iterdir()) == ["B.xml.txt"]
+
+
+def test_pipeline_reports_plan_return_code(mod):
+    plan, rc_plan, total, rc_copy = mod.copy_files_to_webdav_pipeline(workers=2)
+    assert (plan, rc_plan, total, rc_copy) == ([], mod.RC_CONFIG_NOT_FOUND, 0, mod.RC_CONFIG_NOT_FOUND)
+
+
+def test_parallel_copy_stops_on_first_error(mod, tmp_path):
+    src = tmp_path / "interfaces" / "in" / "flow"
+    src.mkdir(parents=True, exist_ok=True)
+    dest = tmp_path / "webdav" / "tech" / mod.param_date_traitement / "pars" / "CCO" / "DONE"
+
+    plan = [{
+        "source": str(src),
+        "destination": str(dest).replace("\\", "/"),
+        "files": ["missing.par"],
+        "purge": False,
+    }]
+
+    total, rc = mod.copy_files_to_webdav(plan, workers=4)
+    assert rc == mod.RC_RUNTIME_ERROR
+    assert total == 0
+
+
+# -------- Tests: Index DONE persistant --------
+
+def test_done_index_cache_reused_then_updated_incrementally(mod, tmp_path, monkeypatch):
+    done = tmp_path / "webdav" / "tech" / mod.param_date_traitement / "pars" / "CCO" / "DONE"
+    _touch(done / "A.par.txt", b"a")
+    _touch(done / "AAA_endtime_20251223_010203.par.txt", b"x")
+    past = 1_600_000_000
+    os.utime(done, (past, past))
+
+    index = mod.build_done_index(str(done))
+    assert set(index) == {"A.par.txt", "AAA.par.txt"}
+    assert (done.parent / mod.DONE_INDEX_CACHE_FILENAME).exists()
+
+    # Dossier inchange: aucune cle recalculee
+    calls = []
+    real_compute = mod.compute_logical_key
+    monkeypatch.setattr(mod, "compute_logical_key", lambda name: calls.append(name) or real_compute(name))
+    assert mod.build_done_index(str(done)) == index
+    assert calls == []
+
+    # Nouveau fichier: seul celui-ci est indexe, les disparus sont retires
+    (done / "A.par.txt").unlink()
+    _touch(done / "B.par.txt", b"b")
+    index = mod.build_done_index(str(done))
+    assert calls == ["B.par.txt"]
+    assert set(index) == {"AAA.par.txt", "B.par.txt"}
+
+
+# -------- Tests: Cache d'empreintes (--sync_mode checksum) --------
+
+def test_fingerprint_store_hit_after_reload_and_forget(mod, tmp_path, monkeypatch):
+    first = _touch(tmp_path / "DONE" / "A.par.txt", b"same")
+    second = _touch(tmp_path / "DONE" / "B.par.txt", b"diff")
+    store_path = tmp_path / "fingerprints.json"
+
+    store = mod.FingerprintStore(str(store_path))
+    digest, cached = store.fingerprint(str(first), first.stat())
+    assert cached is False
+    store.fingerprint(str(second), second.stat())
+    store.save()
+
+    # Nouveau run: signatures stat inchangees -> aucune relecture
+    reloaded = mod.FingerprintStore(str(store_path))
+    reloaded.load()
+    monkeypatch.setattr(mod, "hash_file_streaming", lambda path: pytest.fail("relecture inattendue"))
+    assert reloaded.fingerprint(str(first), first.stat()) == (digest, True)
+    assert (reloaded.hits, reloaded.misses) == (1, 0)
+
+    reloaded.forget(str(first))
+    assert sorted(reloaded.entries) == [str(second)]
+    reloaded.forget_directory(str(tmp_path / "DONE"))
+    assert reloaded.entries == {}
+
+
+def test_wait_duplicate_compared_once_by_streaming_and_forgotten(mod, tmp_path, monkeypatch):
+    src = tmp_path / "interfaces" / "in" / "flow"
+    _touch(src / "A.par", b"new")
+    base_dir = tmp_path / "webdav" / "tech" / mod.param_date_traitement
+    done = base_dir / "pars" / "CCO" / "DONE"
+    wait = base_dir / "pars" / "CCO" / "WAIT"
+    _touch(done / "A.par.txt", b"done")
+    wait_file = _touch(wait / "A.par.txt", b"wait")
+    # empreinte laissee par un run precedent (--sync_mode checksum) pour le WAIT
+    store = mod.FingerprintStore(str(base_dir / mod.FINGERPRINT_STORE_FILENAME))
+    store.fingerprint(str(wait_file), wait_file.stat())
+    store.save()
+
+    compares = []
+    real_compare = mod.files_are_different_streaming
+    monkeypatch.setattr(mod, "files_are_different_streaming",
+                        lambda wait_path, done_path: compares.append(wait_path) or real_compare(wait_path, done_path))
+    plan = [{"source": str(src), "destination": str(wait), "files": ["A.par"], "purge": False}]
+
+    # 1er passage par copy_plan_file: comparaison en flux, WAIT supprime et retire du cache
+    assert mod.copy_files_to_webdav(plan) == (0, mod.RC_NOTHING_TO_DO)
+    assert compares == [str(wait_file)]
+    assert not wait_file.exists()
+    entries = json.loads((base_dir / mod.FINGERPRINT_STORE_FILENAME).read_text(encoding="utf-8"))["entries"]
+    assert str(wait_file) not in entries
+
+    # 2e passage: doublon DONE deja connu, plus de comparaison ni d'empreinte
+    monkeypatch.setattr(mod, "hash_file_streaming", lambda path: pytest.fail("empreinte inattendue"))
+    assert mod.copy_files_to_webdav(plan) == (0, mod.RC_NOTHING_TO_DO)
+    assert compares == [str(wait_file)]
+
+
+# -------- Tests: Moteur de copie --------
+
+def test_copy_file_fast_buffered_fallback_and_metadata(mod, tmp_path, monkeypatch):
+    src = _touch(tmp_path / "src" / "A.par", b"0123456789" * 1000)
+    os.utime(src, (1_600_000_000, 1_600_000_000))
+
+    def refuse(*args, **kwargs):
+        raise OSError(mod.errno.EXDEV, "cross-device")
+
+    monkeypatch.setattr(mod.os, "copy_file_range", refuse, raising=False)
+    monkeypatch.setattr(mod.os, "sendfile", refuse, raising=False)
+
+    dst = tmp_path / "dst" / "A.par.txt"
+    dst.parent.mkdir()
+    copied, method = mod.copy_file_fast(str(src), str(dst), buffer_size=4096)
+    assert (copied, method) == (10000, mod.COPY_METHOD_BUFFERED)
+    assert dst.read_bytes() == src.read_bytes()
+    assert int(dst.stat().st_mtime) == 1_600_000_000
+
+
+def test_copy_file_fast_kernel_copy(mod, tmp_path):
+    src = _touch(tmp_path / "src" / "A.par", b"abc" * 5000)
+    dst = tmp_path / "dst" / "A.par.txt"
+    dst.parent.mkdir()
+    copied, method = mod.copy_file_fast(str(src), str(dst))
+    assert copied == 15000
+    assert dst.read_bytes() == src.read_bytes()
+    if hasattr(os, "copy_file_range"):
+        assert method == mod.COPY_METHOD_COPY_FILE_RANGE
+
+
+# -------- Tests: Ecriture atomique / transferts partiels --------
+
+def test_copy_resumes_partial_transfer_and_cleans_orphans(mod, tmp_path):
+    src = tmp_path / "interfaces" / "in" / "flow"
+    _touch(src / "A.par", b"0123456789")
+    os.utime(src / "A.par", (1_600_000_000, 1_600_000_000))
+
+    dest = tmp_path / "webdav" / "tech" / mod.param_date_traitement / "pars" / "CCO" / "WAIT"
+    _touch(dest / ".A.par.txt.part", b"01234")          # run precedent interrompu
+    _touch(dest / ".GONE.par.txt.part", b"orphan")      # source disparue
+
+    plan = [{
+        "source": str(src),
+        "destination": str(dest).replace("\\", "/"),
+        "files": ["A.par"],
+        "purge": False,
+    }]
+
+    total, rc = mod.copy_files_to_webdav(plan)
+    assert rc == mod.RC_OK
+    assert total == 1
+    assert (dest / "A.par.txt").read_bytes() == b"0123456789"
+    assert sorted(p.name for p in dest.iterdir()) == ["A.par.txt"]
+
+
+def test_copy_restarts_partial_transfer_older_than_source(mod, tmp_path):
+    src = tmp_path / "interfaces" / "in" / "flow"
+    _touch(src / "A.par", b"NEW-CONTENT")
+
+    dest = tmp_path / "webdav" / "tech" / mod.param_date_traitement / "pars" / "CCO" / "WAIT"
+    partial = _touch(dest / ".A.par.txt.part", b"OLD")
+    os.utime(partial, (1_600_000_000, 1_600_000_000))
+
+    total, rc = mod.copy_files_to_webdav([{
+        "source": str(src),
+        "destination": str(dest).replace("\\", "/"),
+        "files": ["A.par"],
+        "purge": False,
+    }])
+    assert rc == mod.RC_OK
+    assert (dest / "A.par.txt").read_bytes() == b"NEW-CONTENT"
+    assert not partial.exists()
+
+
+# -------- Tests: Synchronisation incrementale (--sync_mode) --------
+
+def _sync_plan(src, dest):
+    return [{
+        "source": str(src),
+        "destination": str(dest).replace("\\", "/"),
+        "files": ["A.par", "B.par"],
+        "purge": False,
+    }]
+
+
+def test_sync_mode_stat_recopies_only_changed_files(mod, tmp_path):
+    src = tmp_path / "interfaces" / "in" / "flow"
+    dest = tmp_path / "webdav" / "tech" / mod.param_date_traitement / "pars" / "CCO" / "DONE"
+    _touch(src / "A.par", b"regenerated")
+    _touch(src / "B.par", b"b")
+    assert mod.copy_files_to_webdav(_sync_plan(src, dest)) == (2, mod.RC_OK)
+
+    _touch(src / "A.par", b"regenerated-v2")
+    mod.param_sync_mode = mod.SYNC_MODE_STAT
+    total, rc = mod.copy_files_to_webdav(_sync_plan(src, dest))
+    assert (total, rc) == (1, mod.RC_OK)
+    assert (dest / "A.par.txt").read_bytes() == b"regenerated-v2"
+
+    # exists: le fichier modifie n'est pas repris
+    _touch(src / "A.par", b"regenerated-v3")
+    mod.param_sync_mode = mod.SYNC_MODE_EXISTS
+    assert mod.copy_files_to_webdav(_sync_plan(src, dest)) == (0, mod.RC_NOTHING_TO_DO)
+
+
+def test_sync_mode_checksum_skips_same_content_with_other_mtime(mod, tmp_path):
+    src = tmp_path / "interfaces" / "in" / "flow"
+    dest = tmp_path / "webdav" / "tech" / mod.param_date_traitement / "pars" / "CCO" / "DONE"
+    _touch(src / "A.par", b"same")
+    _touch(src / "B.par", b"b")
+    _touch(dest / "A.par.txt", b"same")
+    _touch(dest / "B.par.txt", b"B")
+    os.utime(dest / "A.par.txt", (1_600_000_000, 1_600_000_000))
+    os.utime(dest / "B.par.txt", (1_600_000_000, 1_600_000_000))
+
+    mod.param_sync_mode = mod.SYNC_MODE_CHECKSUM
+    total, rc = mod.copy_files_to_webdav(_sync_plan(src, dest))
+    assert (total, rc) == (1, mod.RC_OK)
+    assert (dest / "B.par.txt").read_bytes() == b"b"
+    # contenu identique: pas de recopie, mtime realigne sur la source
+    assert (dest / "A.par.txt").stat().st_mtime_ns == (src / "A.par").stat().st_mtime_ns
+
+
+# -------- Tests: Purge (purge=YES) --------
+
+def test_purge_once_per_destination_before_copy(mod, tmp_path):
+    src = tmp_path / "interfaces" / "in" / "flow"
+    _touch(src / "A.par", b"a")
+    _touch(src / "B.par", b"b")
+
+    dest = tmp_path / "webdav" / "tech" / mod.param_date_traitement / "pars" / "CCO" / "DONE"
+    _touch(dest / "OLD.par.txt", b"old-content")
+    _touch(dest / "A.par.txt", b"stale")
+    (dest / "subdir").mkdir()
+
+    destination = str(dest).replace("\\", "/")
+    plan = [
+        {"source": str(src), "destination": destination, "files": ["A.par"], "purge": True},
+        {"source": str(src), "destination": destination, "files": ["B.par"], "purge": True},
+    ]
+
+    total, rc = mod.copy_files_to_webdav(plan)
+    assert (total, rc) == (2, mod.RC_OK)
+    assert sorted(p.name for p in dest.iterdir()) == ["A.par.txt", "B.par.txt", "subdir"]
+    assert (dest / "A.par.txt").read_bytes() == b"a"
+
+
+def test_purge_dry_run_deletes_and_copies_nothing(mod, tmp_path):
+    src = tmp_path / "interfaces" / "in" / "flow"
+    _touch(src / "A.par", b"a")
+    dest = tmp_path / "webdav" / "tech" / mod.param_date_traitement / "pars" / "CCO" / "DONE"
+    _touch(dest / "OLD.par.txt", b"old")
+
+    plan = [{"source": str(src), "destination": str(dest).replace("\\", "/"),
+             "files": ["A.par"], "purge": True}]
+
+    total, rc = mod.copy_files_to_webdav(plan, dry_run=True)
+    assert (total, rc) == (0, mod.RC_OK)
+    assert sorted(p.name for p in dest.iterdir()) == ["OLD.par.txt"]
+
+
+# -------- Tests: Export / import du plan JSON --------
+
+def test_plan_export_then_load_roundtrip(mod, tmp_path):
+    src = tmp_path / "interfaces" / "in" / "flow"
+    _touch(src / "A.par", b"abc")
+    _touch(src / "B.par", b"b")
+
+    _write_csv(Path(mod.param_ref_mapping_path), rows=[{
+        "type": "CLEVA",
+        "source": "in/flow",
+        "destination": "pars/CCO/WAIT",
+        "prefix01": "*.par",
+        "purge": "YES",
+    }])
+    plan, rc = mod.prepare_copy_plan_from_reference()
+    assert rc == mod.RC_OK
+
+    plan_path = tmp_path / "plan.json"
+    assert mod.export_copy_plan(plan, str(plan_path)) == mod.RC_OK
+    document = json.loads(plan_path.read_text(encoding="utf-8"))
+    assert document["date_plan"] == mod.param_date_traitement
+    assert document["tasks"][0]["files"] == [{"name": "A.par", "size": 3}, {"name": "B.par", "size": 1}]
+    assert document["tasks"][0]["purge"] is True
+
+    loaded, rc = mod.load_copy_plan(str(plan_path))
+    assert rc == mod.RC_OK
+    assert loaded == plan
+
+    mod.param_date_traitement = "20251224"
+    assert mod.load_copy_plan(str(plan_path)) == ([], mod.RC_CONFIG_INVALID)
+
+
+def test_plan_load_missing_file(mod, tmp_path):
+    assert mod.load_copy_plan(str(tmp_path / "absent.json")) == ([], mod.RC_CONFIG_NOT_FOUND)
+
+
+# -------- Tests: Instrumentation / resume JSON du run --------
+
+def test_run_summary_reports_phases_copy_counts_and_stat_calls(mod, tmp_path):
+    src = tmp_path / "interfaces" / "in" / "flow"
+    _touch(src / "A.par", b"abc")
+    _touch(src / "B.par", b"b")
+    _write_csv(Path(mod.param_ref_mapping_path), rows=[
+        {"type": "CLEVA", "source": "in/flow", "destination": "pars/CCO/DONE", "prefix01": "*.par"},
+    ])
+    dest = tmp_path / "webdav" / "tech" / mod.param_date_traitement / "pars" / "CCO" / "DONE"
+    _touch(dest / "B.par.txt", b"b")
+
+    # les controles d'existence du mapping et du plan JSON passent par path_exists
+    stat_calls = mod.run_metrics.counters[mod.METRIC_STAT]
+    mod.load_reference_mapping()
+    mod.load_copy_plan(str(tmp_path / "absent.json"))
+    assert mod.run_metrics.counters[mod.METRIC_STAT] == stat_calls + 2
+
+    rc = mod.run_distribution()
+    assert rc == mod.RC_OK
+    summary_path = tmp_path / "summary.json"
+    mod.write_run_summary(rc, str(summary_path))
+    summary = json.loads(summary_path.read_text(encoding="utf-8"))
+
+    assert summary["rc"] == mod.RC_OK
+    assert {"mapping", "plan", "copy"} <= set(summary["timers"])
+    assert summary["timers"]["mapping"]["calls"] == 2
+    assert summary["timers"]["copy"]["calls"] == 1
+    counters = summary["counters"]
+    assert counters[mod.METRIC_FILES_COPIED] == 1
+    assert counters[mod.METRIC_FILES_SKIPPED] == 1
+    assert counters[mod.METRIC_BYTES_COPIED] == 3
+    assert counters[mod.METRIC_STAT] > stat_calls + 2
+    assert counters[mod.METRIC_LISTDIR] >= 1
+
+
+# -------- Tests: Rattrapage multi-dates (-d liste / plage) --------
+
+def test_parse_date_plans_list_and_range(mod):
+    assert mod.parse_date_plans("20251230..20260102,20251224,20251231") == [
+        "20251230", "20251231", "20260101", "20260102", "20251224"]
+    for value in ("20251223..20251220", "20251232", "20250101..20260105", ","):
+        with pytest.raises(ValueError):
+            mod.parse_date_plans(value)
+
+
+def test_run_distribution_dates_loads_mapping_once_with_rc_per_date(mod, tmp_path, monkeypatch):
+    src = tmp_path / "interfaces" / "in" / "flow"
+    _touch(src / "A.par", b"a")
+    _write_csv(Path(mod.param_ref_mapping_path), rows=[
+        {"type": "CLEVA", "source": "in/flow", "destination": "pars/CCO/DONE", "prefix01": "*.par"},
+    ])
+    webdav = Path(mod.param_webdav_path)
+    _touch(webdav / "20251221" / "pars" / "CCO" / "DONE" / "A.par.txt", b"a")
+
+    loads = []
+    real_load = mod.load_reference_mapping
+    monkeypatch.setattr(mod, "load_reference_mapping", lambda: loads.append(1) or real_load())
+    listings = []
+    real_list = mod.list_source_directory
+    monkeypatch.setattr(mod, "list_source_directory",
+                        lambda path, cache, stats: listings.append(len(cache)) or real_list(path, cache, stats))
+
+    rc, date_results = mod.run_distribution_dates(["20251220", "20251221", "20251222"])
+    assert rc == mod.RC_OK
+    assert date_results == [("20251220", mod.RC_OK), ("20251221", mod.RC_NOTHING_TO_DO),
+                            ("20251222", mod.RC_OK)]
+    # mapping charge une fois, dossier source liste une fois pour les 3 dates
+    assert len(loads) == 1
+    assert listings == [0, 1, 1]
+    assert (webdav / "20251222" / "pars" / "CCO" / "DONE" / "A.par.txt").read_bytes() == b"a"
+    assert mod.param_date_traitement == "20251222"
+
+    summary_path = tmp_path / "summary.json"
+    mod.write_run_summary(rc, str(summary_path), date_results)
+    summary = json.loads(summary_path.read_text(encoding="utf-8"))
+    assert summary["date_plan"] == "20251220,20251221,20251222"
+    assert [entry["rc"] for entry in summary["dates"]] == [mod.RC_OK, mod.RC_NOTHING_TO_DO, mod.RC_OK]